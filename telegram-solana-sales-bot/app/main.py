@@ -1,25 +1,52 @@
 import asyncio
+import bisect
+import cProfile
+import gzip
+import hashlib
+import io
 import json
 import logging
+import marshal
+import math
 import os
-import urllib.request
 import html
+import pstats
+import random
+import re
+import sqlite3
+import struct
+import sys
+import threading
 import time
-from collections import deque
-from datetime import datetime, timezone
+import traceback
+import tracemalloc
+import zlib
+from array import array
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from itertools import accumulate, chain
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
 
 from dotenv import load_dotenv
+import httpx
 import secrets
 
-from fastapi import Depends, FastAPI, Form, HTTPException, Request, status
-from fastapi.responses import HTMLResponse, StreamingResponse
+try:
+    import brotli
+except ImportError:  # optional; responses fall back to gzip
+    brotli = None
+
+from fastapi import Depends, FastAPI, Form, HTTPException, Query, Request, status
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from telegram import Bot
-from telegram.error import TelegramError
+from telegram import Bot, InputMediaPhoto
+from telegram.error import NetworkError, RetryAfter, TelegramError, TimedOut
+from telegram.request import HTTPXRequest
 
 load_dotenv()
 
@@ -41,19 +68,119 @@ ADMIN_USER = os.getenv("ADMIN_USER", "").strip()
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "").strip()
 HELIUS_API_KEY = os.getenv("HELIUS_API_KEY", "").strip()
 TENSOR_COLLECTION_ID = os.getenv("TENSOR_COLLECTION_ID", "").strip()
+TENSOR_COLLECTION_IDS = _parse_csv(os.getenv("TENSOR_COLLECTION_IDS", ""))
+FLOOR_REFRESH_SEC = float(os.getenv("FLOOR_REFRESH_SEC", "60") or 60)
+FLOOR_MAX_BACKOFF_SEC = float(os.getenv("FLOOR_MAX_BACKOFF_SEC", "900") or 900)
 HOWRARE_API_KEY = os.getenv("HOWRARE_API_KEY", "").strip()
+HOWRARE_COLLECTION = os.getenv("HOWRARE_COLLECTION", "galacticgeckos").strip()
+RARITY_SOURCE = os.getenv("RARITY_SOURCE", "howrare").strip().lower() or "howrare"
+RARITY_REFRESH_SEC = float(os.getenv("RARITY_REFRESH_SEC", "21600") or 21600)
+RARITY_MIN_COVERAGE = float(os.getenv("RARITY_MIN_COVERAGE", "0.99") or 0.99)
 WHALE_SOL = float(os.getenv("WHALE_SOL", "50") or 50)
 SWEEP_COUNT = int(os.getenv("SWEEP_COUNT", "3") or 3)
 SWEEP_WINDOW_SEC = int(os.getenv("SWEEP_WINDOW_SEC", "120") or 120)
 ALERT_GIF_URL = os.getenv("ALERT_GIF_URL", "").strip()
 SEND_LISTING_ALERTS = os.getenv("SEND_LISTING_ALERTS", "false").strip().lower() in {"1", "true", "yes"}
-WATCH_MINTS = set(_parse_csv(os.getenv("WATCH_MINTS", "")))
 _watch_sources_env = _parse_csv(os.getenv("WATCH_SOURCES", ""))
 WATCH_SOURCES = set(s.lower() for s in _watch_sources_env) if _watch_sources_env else {"tensor"}
 WATCH_MINTLIST_URL = os.getenv("WATCH_MINTLIST_URL", "").strip()
+MINTLIST_REFRESH_SEC = float(os.getenv("MINTLIST_REFRESH_SEC", "3600") or 3600)
+# Upstream base URLs; overridden to point the bot at local stand-ins (scripts/bench_upstreams.py).
+HELIUS_RPC_URL = os.getenv("HELIUS_RPC_URL", "https://mainnet.helius-rpc.com").strip().rstrip("/")
+TENSOR_API_URL = os.getenv("TENSOR_API_URL", "https://api.tensor.so").strip().rstrip("/")
+HOWRARE_API_URL = os.getenv("HOWRARE_API_URL", "https://api.howrare.is").strip().rstrip("/")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org").strip().rstrip("/")
+HTTP_TIMEOUT_SEC = float(os.getenv("HTTP_TIMEOUT_SEC", "15") or 15)
+HTTP_CONNECT_TIMEOUT_SEC = float(os.getenv("HTTP_CONNECT_TIMEOUT_SEC", "5") or 5)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100") or 100)
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "10") or 10)
+HTTP_KEEPALIVE_SEC = float(os.getenv("HTTP_KEEPALIVE_SEC", "30") or 30)
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "1000") or 1000)
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "4") or 4)
+INGEST_RETRY_AFTER_SEC = int(os.getenv("INGEST_RETRY_AFTER_SEC", "5") or 5)
+INGEST_DRAIN_SEC = float(os.getenv("INGEST_DRAIN_SEC", "10") or 10)
+TELEGRAM_CHAT_RATE_PER_MIN = float(os.getenv("TELEGRAM_CHAT_RATE_PER_MIN", "20") or 20)
+TELEGRAM_CHAT_BURST = float(os.getenv("TELEGRAM_CHAT_BURST", "3") or 3)
+TELEGRAM_GLOBAL_RATE_PER_SEC = float(os.getenv("TELEGRAM_GLOBAL_RATE_PER_SEC", "30") or 30)
+TELEGRAM_SEND_RETRIES = int(os.getenv("TELEGRAM_SEND_RETRIES", "3") or 3)
+TELEGRAM_POOL_SIZE = int(os.getenv("TELEGRAM_POOL_SIZE", "16") or 16)
+TELEGRAM_CONNECT_TIMEOUT_SEC = float(os.getenv("TELEGRAM_CONNECT_TIMEOUT_SEC", "5") or 5)
+TELEGRAM_READ_TIMEOUT_SEC = float(os.getenv("TELEGRAM_READ_TIMEOUT_SEC", "10") or 10)
+TELEGRAM_WRITE_TIMEOUT_SEC = float(os.getenv("TELEGRAM_WRITE_TIMEOUT_SEC", "20") or 20)
+TELEGRAM_POOL_TIMEOUT_SEC = float(os.getenv("TELEGRAM_POOL_TIMEOUT_SEC", "5") or 5)
+ALERT_COALESCE_WINDOW_SEC = float(os.getenv("ALERT_COALESCE_WINDOW_SEC", "3") or 0)
+LISTING_DIGEST_SEC = float(os.getenv("LISTING_DIGEST_SEC", "60") or 0)
+LISTING_DIGEST_MAX_LINES = int(os.getenv("LISTING_DIGEST_MAX_LINES", "25") or 25)
+METADATA_CACHE_SIZE = int(os.getenv("METADATA_CACHE_SIZE", "5000") or 5000)
+METADATA_CACHE_TTL_SEC = float(os.getenv("METADATA_CACHE_TTL_SEC", "604800") or 604800)
+METADATA_NEGATIVE_TTL_SEC = float(os.getenv("METADATA_NEGATIVE_TTL_SEC", "300") or 300)
+METADATA_BATCH_WINDOW_MS = float(os.getenv("METADATA_BATCH_WINDOW_MS", "10") or 0)
+METADATA_BATCH_MAX = int(os.getenv("METADATA_BATCH_MAX", "100") or 100)
+IPFS_GATEWAYS = _parse_csv(os.getenv("IPFS_GATEWAYS", "")) or [
+    "https://ipfs.io/ipfs/",
+    "https://nftstorage.link/ipfs/",
+    "https://dweb.link/ipfs/",
+]
+ARWEAVE_GATEWAYS = _parse_csv(os.getenv("ARWEAVE_GATEWAYS", "")) or [
+    "https://arweave.net/",
+    "https://ar-io.net/",
+]
+OFFCHAIN_HEDGE_DELAY_MS = float(os.getenv("OFFCHAIN_HEDGE_DELAY_MS", "400") or 400)
+OFFCHAIN_CACHE_SIZE = int(os.getenv("OFFCHAIN_CACHE_SIZE", "5000") or 5000)
+OFFCHAIN_CACHE_TTL_SEC = float(os.getenv("OFFCHAIN_CACHE_TTL_SEC", "2592000") or 2592000)
+PREWARM_METADATA = os.getenv("PREWARM_METADATA", "false").strip().lower() in {"1", "true", "yes"}
+PREWARM_CONCURRENCY = int(os.getenv("PREWARM_CONCURRENCY", "8") or 8)
+_PREWARM_RETRY_DELAYS = (5.0, 15.0, 45.0)
+STREAM_REPLAY_SIZE = int(os.getenv("STREAM_REPLAY_SIZE", "200") or 200)
+STREAM_KEEPALIVE_SEC = float(os.getenv("STREAM_KEEPALIVE_SEC", "15") or 15)
+STREAM_CLIENT_BUFFER = int(os.getenv("STREAM_CLIENT_BUFFER", "100") or 100)
+EVENT_STORE_BATCH_MAX = int(os.getenv("EVENT_STORE_BATCH_MAX", "500") or 500)
+EVENT_STORE_FLUSH_MS = float(os.getenv("EVENT_STORE_FLUSH_MS", "200") or 200)
+EVENT_STORE_QUEUE_SIZE = int(os.getenv("EVENT_STORE_QUEUE_SIZE", "10000") or 10000)
+EVENT_PAGE_MAX = 200
+# Candle width in seconds and how many buckets of each resolution are kept.
+CANDLE_RESOLUTIONS: Dict[str, Tuple[int, int]] = {
+    "1m": (60, 1440),
+    "15m": (900, 2880),
+    "1h": (3600, 4320),
+    "1d": (86400, 1825),
+}
+CANDLE_DEFAULT_POINTS = 168
+# Signature dedupe: an exact set of the most recent signatures in front of rotating Bloom filters
+# that remember DEDUPE_CAPACITY signatures per DEDUPE_WINDOW_SEC in fixed memory.
+DEDUPE_RECENT_SIZE = int(os.getenv("DEDUPE_RECENT_SIZE", "1000") or 1000)
+DEDUPE_WINDOW_SEC = float(os.getenv("DEDUPE_WINDOW_SEC", "86400") or 86400)
+DEDUPE_CAPACITY = int(os.getenv("DEDUPE_CAPACITY", "2000000") or 2000000)
+DEDUPE_FP_RATE = float(os.getenv("DEDUPE_FP_RATE", "0.0001") or 0.0001)
+DEDUPE_GENERATIONS = max(2, int(os.getenv("DEDUPE_GENERATIONS", "4") or 4))
+DEDUPE_CHECKPOINT_SEC = float(os.getenv("DEDUPE_CHECKPOINT_SEC", "60") or 60)
+# Share dedupe, counters and recent activity through SQLite so uvicorn can run with --workers N.
+SHARED_STATE = os.getenv("SHARED_STATE", "false").strip().lower() in {"1", "true", "yes"}
+SHARED_STATE_SYNC_MS = float(os.getenv("SHARED_STATE_SYNC_MS", "500") or 500)
+SHARED_CLAIM_TTL_SEC = float(os.getenv("SHARED_CLAIM_TTL_SEC", "86400") or 86400)
+# Rows other processes add that are older than this (e.g. imports) only feed the windows and candles.
+SHARED_LIVE_SEC = 3600
+RESPONSE_COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "512") or 512)
+# Cached pages are re-rendered at least this often so rolling stats decay while no sales arrive.
+RESPONSE_MAX_AGE_SEC = float(os.getenv("RESPONSE_MAX_AGE_SEC", "5") or 5)
+PROFILE_MAX_SEC = float(os.getenv("PROFILE_MAX_SEC", "300") or 300)
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5") or 5)
+TRACEMALLOC_FRAMES = int(os.getenv("TRACEMALLOC_FRAMES", "10") or 10)
+DIAGNOSTICS_REPORT_LINES = 30
+LOOP_LAG_INTERVAL_MS = float(os.getenv("LOOP_LAG_INTERVAL_MS", "100") or 0)
+LOOP_LAG_WARN_MS = float(os.getenv("LOOP_LAG_WARN_MS", "250") or 0)
+LOOP_LAG_STACK_DEPTH = 20
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "500") or 500)
+TRACE_SLOWEST = int(os.getenv("TRACE_SLOWEST", "20") or 20)
 
 BASE_DIR = Path(__file__).resolve().parent
 ENV_PATH = BASE_DIR.parent / ".env"
+STATE_DIR = Path(os.getenv("STATE_DIR", "").strip() or BASE_DIR.parent / "data")
+CACHE_DB_PATH = STATE_DIR / "cache.sqlite3"
+EVENTS_DB_PATH = STATE_DIR / "events.sqlite3"
+SHARED_DB_PATH = STATE_DIR / "shared.sqlite3"
+DEDUPE_PATH = STATE_DIR / "dedupe.bin"
+MINTLIST_CACHE_PATH = STATE_DIR / "mintlist.bin"
 BUILD_ID = os.getenv("BUILD_ID", "build-2026-02-10")
 
 app = FastAPI(title="Solana NFT Sales Telegram Bot")
@@ -63,30 +190,889 @@ security = HTTPBasic()
 templates.env.globals["build_id"] = BUILD_ID
 
 # Simple in-memory de-dupe for recent signatures
-_recent_signatures = deque(maxlen=500)
+_recent_signatures = deque(maxlen=DEDUPE_RECENT_SIZE)
 _recent_signature_set = set()
+_dedupe_stats: Dict[str, Any] = {
+    "exact_hits": 0,
+    "filter_hits": 0,
+    "loaded": 0,
+    "checkpoints": 0,
+    "checkpoint_at": None,
+    "checkpoint_items": None,
+}
 _recent_sales: Deque[Dict[str, Any]] = deque(maxlen=40)
 _recent_listings: Deque[Dict[str, Any]] = deque(maxlen=40)
 _sales_seen = 0
 _sales_sent = 0
 _last_event_time: Optional[str] = None
-_metadata_cache: Dict[str, Dict[str, Any]] = {}
-_metadata_cache_order: Deque[str] = deque(maxlen=500)
-_floor_cache: Dict[str, Any] = {}
-_floor_cache_time: Optional[float] = None
-_rarity_cache: Dict[str, Dict[str, Any]] = {}
-_rarity_cache_time: Dict[str, float] = {}
-_sales_window: Deque[Tuple[float, float, str]] = deque(maxlen=2000)
+_state_version = 0
+# Distinguishes ETags across restarts, when the version counter starts over.
+_state_epoch = secrets.token_hex(4)
+_response_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_status_payload_cache: "OrderedDict[Optional[int], Tuple[int, str]]" = OrderedDict()
+_response_stats: Dict[str, int] = {"renders": 0, "hits": 0, "not_modified": 0, "compressions": 0}
+_floor_state: Dict[str, Dict[str, Any]] = {}
+_floor_task: Optional[asyncio.Task] = None
+_rarity_index: Dict[str, Any] = {"ranks": {}, "total": 0, "updated_at": None, "complete": False}
+_rarity_state: Dict[str, Any] = {"loading": False, "last_error": None, "coverage": None}
+_rarity_task: Optional[asyncio.Task] = None
+_mintlist_task: Optional[asyncio.Task] = None
+# Serialises mintlist loads; the hot path never takes it.
+_mintlist_lock = asyncio.Lock()
+_buyer_events: Deque[Tuple[float, str]] = deque()
+_buyer_counts: Dict[str, int] = {}
+_http_client: Optional[httpx.AsyncClient] = None
+_http_host_limits: Dict[str, asyncio.Semaphore] = {}
+_ingest_queues: List[asyncio.Queue] = []
+_ingest_workers: List[asyncio.Task] = []
+_ingest_busy_time: List[float] = []
+_ingest_active = 0
+_bot: Optional[Bot] = None
+_bot_lock = asyncio.Lock()
+_background_tasks: set = set()
+_telegram_chat_buckets: Dict[str, "_TokenBucket"] = {}
+_telegram_chat_locks: Dict[str, asyncio.Lock] = {}
+_telegram_latencies: Deque[float] = deque(maxlen=500)
+_telegram_stats: Dict[str, Any] = {
+    "sent": 0,
+    "failed": 0,
+    "retries": 0,
+    "retry_after_hits": 0,
+    "throttle_sec_total": 0.0,
+    "throttle_sec_last": 0.0,
+}
+_metadata_inflight: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+_asset_batch: List[Tuple[str, asyncio.Future]] = []
+_asset_batch_timer: Optional[asyncio.TimerHandle] = None
+_resolver_stats: Dict[str, int] = {"requests": 0, "mints": 0, "max_batch": 0, "coalesced": 0, "failed": 0}
+_offchain_inflight: Dict[str, "asyncio.Future[Optional[Dict[str, Any]]]"] = {}
+_offchain_stats: Dict[str, int] = {"fetches": 0, "failed": 0, "hedges": 0}
+_offchain_wins: Dict[str, int] = {}
+_prewarm_state: Dict[str, Any] = {
+    "running": False,
+    "total": 0,
+    "done": 0,
+    "warmed": 0,
+    "empty": 0,
+    "failed": 0,
+    "started_at": None,
+    "finished_at": None,
+}
+_coalesce_batches: Dict[str, List[Tuple[Dict[str, Any], Dict[str, Any], str]]] = {}
+_listing_digest: List[Tuple[Dict[str, Any], str]] = []
+_alert_stats: Dict[str, int] = {"immediate": 0, "coalesced": 0, "albums": 0, "digests": 0}
+_stream_subscribers: Dict[int, asyncio.Queue] = {}
+_stream_replay: Deque[Tuple[int, str]] = deque(maxlen=STREAM_REPLAY_SIZE)
+_stream_event_id = 0
+_stream_stats: Dict[str, int] = {"published": 0, "connects": 0, "resumes": 0, "dropped_clients": 0}
+_ingest_stats: Dict[str, Any] = {
+    "started_at": 0.0,
+    "enqueued": 0,
+    "processed": 0,
+    "failed": 0,
+    "rejected": 0,
+    "lag_sec": 0.0,
+    "max_lag_sec": 0.0,
+}
+
+
+class _TokenBucket:
+    def __init__(self, rate_per_sec: float, capacity: float) -> None:
+        self.rate_per_sec = rate_per_sec
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        # Take one token now and return how long the caller must wait before using it.
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate_per_sec)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0 or self.rate_per_sec <= 0:
+            return 0.0
+        return -self.tokens / self.rate_per_sec
+
+
+_telegram_global_bucket = _TokenBucket(TELEGRAM_GLOBAL_RATE_PER_SEC, TELEGRAM_GLOBAL_RATE_PER_SEC)
+_cache_db: Optional[sqlite3.Connection] = None
+_cache_db_lock = threading.Lock()
+_events_db: Optional[sqlite3.Connection] = None
+_events_db_lock = threading.Lock()
+_event_store_queue: Optional[asyncio.Queue] = None
+_event_store_task: Optional[asyncio.Task] = None
+_event_store_stats: Dict[str, int] = {"written": 0, "duplicates": 0, "batches": 0, "max_batch": 0, "dropped": 0, "failed": 0}
+_shared_db: Optional[sqlite3.Connection] = None
+_shared_db_lock = threading.Lock()
+# Counter increments waiting for the next sync, the batch being written, and the totals read back.
+_shared_pending: Dict[str, Any] = {}
+_shared_flushing: Dict[str, Any] = {}
+_shared_totals: Dict[str, Any] = {}
+# Last event-store id applied per table; rows past it come from other workers (or are our own).
+_shared_cursors: Dict[str, int] = {"sales": 0, "listings": 0}
+_shared_sync_task: Optional[asyncio.Task] = None
+_local_event_keys: "OrderedDict[Tuple[Any, Any], None]" = OrderedDict()
+_shared_stats: Dict[str, Any] = {"claimed": 0, "claim_conflicts": 0, "remote_events": 0, "syncs": 0, "failed": 0, "last_prune": 0.0}
+# Indexed lookup columns per table; every index ends in (ts, id) to serve keyset pagination.
+_EVENT_TABLES: Dict[str, Tuple[str, ...]] = {
+    "sales": ("mint", "buyer", "seller", "marketplace"),
+    "listings": ("mint", "seller", "marketplace"),
+}
+
+
+class _TieredCache:
+    # LRU with per-entry TTL in memory, written through to the shared SQLite cache file.
+    # A cached value of None is a negative entry and lives for negative_ttl_sec.
+
+    def __init__(self, namespace: str, max_size: int, ttl_sec: float, negative_ttl_sec: float) -> None:
+        self.namespace = namespace
+        self.max_size = max(1, max_size)
+        self.ttl_sec = ttl_sec
+        self.negative_ttl_sec = negative_ttl_sec
+        self.entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "disk_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expired": 0,
+        }
+
+    async def get(self, key: str) -> Tuple[bool, Any]:
+        now = time.time()
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self.entries.move_to_end(key)
+                self.stats["negative_hits" if value is None else "hits"] += 1
+                return True, value
+            del self.entries[key]
+            self.stats["expired"] += 1
+
+        row = await asyncio.to_thread(_cache_db_get, self.namespace, key)
+        if row is not None and row[1] > now:
+            value = json.loads(row[0])
+            self._remember(key, value, row[1])
+            self.stats["disk_hits"] += 1
+            return True, value
+
+        self.stats["misses"] += 1
+        return False, None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        if ttl is None:
+            ttl = self.negative_ttl_sec if value is None else self.ttl_sec
+        expires_at = time.time() + ttl
+        self._remember(key, value, expires_at)
+        await asyncio.to_thread(_cache_db_put, self.namespace, key, json.dumps(value), expires_at)
+
+    def _remember(self, key: str, value: Any, expires_at: float) -> None:
+        self.entries[key] = (expires_at, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["disk_hits"] + self.stats["negative_hits"] + self.stats["misses"]
+        hit_ratio = (lookups - self.stats["misses"]) / lookups if lookups else 0.0
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "ttl_sec": self.ttl_sec,
+            "negative_ttl_sec": self.negative_ttl_sec,
+            "hit_ratio": round(hit_ratio, 4),
+            **self.stats,
+        }
+
+
+class _BloomFilter:
+    __slots__ = ("bits", "started_at", "count")
+
+    def __init__(self, size_bits: int, started_at: float, bits: Optional[bytearray] = None, count: int = 0) -> None:
+        self.bits = bits if bits is not None else bytearray(size_bits // 8)
+        self.started_at = started_at
+        self.count = count
+
+    def contains(self, positions: List[int]) -> bool:
+        bits = self.bits
+        for position in positions:
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def add(self, positions: List[int]) -> None:
+        bits = self.bits
+        for position in positions:
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+
+class _SignatureFilter:
+    # Rotating Bloom filters. The newest filter takes inserts for window / (generations - 1) seconds,
+    # then the oldest is dropped and a fresh one started, so every signature is remembered for at
+    # least window_sec while memory stays at generations * size_bits / 8 bytes.
+
+    _MAGIC = b"GPDD"
+    _HEADER = struct.Struct("<4sHQIId")
+    _GENERATION = struct.Struct("<dQ")
+
+    def __init__(self, window_sec: float, generations: int, capacity: int, fp_rate: float) -> None:
+        self.generations = generations
+        self.span_sec = window_sec / (generations - 1)
+        self.capacity = max(1, math.ceil(capacity / (generations - 1)))
+        # Every live filter is probed, so each gets an equal share of the false-positive budget.
+        per_filter = fp_rate / generations
+        size = math.ceil(-self.capacity * math.log(per_filter) / (math.log(2) ** 2))
+        self.size_bits = (size + 7) // 8 * 8
+        self.hashes = max(1, round(self.size_bits / self.capacity * math.log(2)))
+        self.filters: Deque[_BloomFilter] = deque([_BloomFilter(self.size_bits, time.time())])
+
+    def check_and_add(self, signature: str, now: float) -> bool:
+        # True if the signature was (probably) seen before; it is remembered either way.
+        self._rotate(now)
+        positions = self._positions(signature)
+        if any(bloom.contains(positions) for bloom in self.filters):
+            return True
+        self.filters[-1].add(positions)
+        return False
+
+    def _positions(self, signature: str) -> List[int]:
+        digest = hashlib.blake2b(signature.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        size = self.size_bits
+        return [(first + i * second) % size for i in range(self.hashes)]
+
+    def _rotate(self, now: float) -> None:
+        while now - self.filters[-1].started_at >= self.span_sec:
+            started_at = self.filters[-1].started_at + self.span_sec
+            # After a long idle gap, skip straight to the current span.
+            if now - started_at >= self.span_sec:
+                started_at = now
+            self.filters.append(_BloomFilter(self.size_bits, started_at))
+        # A filter's last insert is span_sec after it started; it must answer for window_sec beyond that.
+        while len(self.filters) > 1 and (
+            len(self.filters) > self.generations or now - self.filters[0].started_at >= self.span_sec * self.generations
+        ):
+            self.filters.popleft()
+
+    def items(self) -> int:
+        return sum(bloom.count for bloom in self.filters)
+
+    def memory_bytes(self) -> int:
+        return sum(len(bloom.bits) for bloom in self.filters)
+
+    def fp_rate(self) -> float:
+        # Chance that a new signature matches at least one live filter, from each filter's fill.
+        miss = 1.0
+        for bloom in self.filters:
+            miss *= 1 - (1 - math.exp(-self.hashes * bloom.count / self.size_bits)) ** self.hashes
+        return 1 - miss
+
+    def to_bytes(self) -> bytes:
+        parts = [self._HEADER.pack(self._MAGIC, 1, self.size_bits, self.hashes, len(self.filters), self.span_sec)]
+        for bloom in self.filters:
+            parts.append(self._GENERATION.pack(bloom.started_at, bloom.count))
+            parts.append(bytes(bloom.bits))
+        return b"".join(parts)
+
+    def load_bytes(self, data: bytes) -> bool:
+        # False if the data was written with other DEDUPE_* settings.
+        magic, version, size_bits, hashes, count, span_sec = self._HEADER.unpack_from(data)
+        expected = (self._MAGIC, 1, self.size_bits, self.hashes, self.span_sec)
+        if (magic, version, size_bits, hashes, span_sec) != expected or count > self.generations:
+            return False
+        filters: Deque[_BloomFilter] = deque()
+        offset = self._HEADER.size
+        for _ in range(count):
+            started_at, items = self._GENERATION.unpack_from(data, offset)
+            offset += self._GENERATION.size
+            bits = bytearray(data[offset : offset + size_bits // 8])
+            offset += size_bits // 8
+            filters.append(_BloomFilter(size_bits, started_at, bits, items))
+        if not filters or offset != len(data):
+            return False
+        self.filters = filters
+        self._rotate(time.time())
+        return True
+
+
+_BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_BASE58_INDEX = {char: index for index, char in enumerate(_BASE58_ALPHABET)}
+
+
+def _decode_mint(mint: str) -> Optional[bytes]:
+    # None unless the address decodes to a 32-byte key.
+    number = 0
+    try:
+        for char in mint:
+            number = number * 58 + _BASE58_INDEX[char]
+    except KeyError:
+        return None
+    zeros = len(mint) - len(mint.lstrip("1"))
+    key = b"\0" * zeros + number.to_bytes((number.bit_length() + 7) // 8, "big")
+    return key if len(key) == 32 else None
+
+
+def _encode_mint(key: bytes) -> str:
+    number = int.from_bytes(key, "big")
+    chars = []
+    while number:
+        number, remainder = divmod(number, 58)
+        chars.append(_BASE58_ALPHABET[remainder])
+    zeros = len(key) - len(key.lstrip(b"\0"))
+    return "1" * zeros + "".join(reversed(chars))
+
+
+class _MintIndex:
+    # Immutable set of mints stored as sorted 32-byte keys in one bytes blob (32 bytes per mint,
+    # against ~120 for a set of base58 strings). offsets[p] is the first key whose two-byte prefix
+    # is >= p, so a lookup binary-searches only the keys sharing its prefix.
+
+    _MAGIC = b"GPMI"
+    _HEADER = struct.Struct("<4sHQd32sI")
+
+    def __init__(self, blob: bytes = b"", offsets: Optional[array] = None) -> None:
+        self.blob = blob
+        self.count = len(blob) // 32
+        self.offsets = offsets if offsets is not None else self._build_offsets(blob)
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[bytes]) -> "_MintIndex":
+        return cls(b"".join(sorted(set(keys))))
+
+    @classmethod
+    def from_mints(cls, mints: Iterable[str]) -> "_MintIndex":
+        return cls.from_keys(key for key in map(_decode_mint, mints) if key is not None)
+
+    @staticmethod
+    def _build_offsets(blob: bytes) -> array:
+        counts = [0] * 65537
+        for start in range(0, len(blob), 32):
+            counts[(blob[start] << 8 | blob[start + 1]) + 1] += 1
+        return array("I", accumulate(counts))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, mint: object) -> bool:
+        if not self.count or not isinstance(mint, str):
+            return False
+        key = _decode_mint(mint)
+        return key is not None and self.contains_key(key)
+
+    def contains_key(self, key: bytes) -> bool:
+        prefix = key[0] << 8 | key[1]
+        low, high = self.offsets[prefix], self.offsets[prefix + 1]
+        blob = self.blob
+        while low < high:
+            middle = (low + high) // 2
+            probe = blob[middle * 32 : middle * 32 + 32]
+            if probe < key:
+                low = middle + 1
+            elif probe > key:
+                high = middle
+            else:
+                return True
+        return False
+
+    def keys(self) -> Iterator[bytes]:
+        blob = self.blob
+        return (blob[start : start + 32] for start in range(0, len(blob), 32))
+
+    def __iter__(self) -> Iterator[str]:
+        return map(_encode_mint, self.keys())
+
+    def memory_bytes(self) -> int:
+        return len(self.blob) + len(self.offsets) * self.offsets.itemsize
+
+    def diff(self, newer: "_MintIndex") -> Tuple[int, int]:
+        if self.blob == newer.blob:
+            return 0, 0
+        # Both key streams are sorted, so one merge pass counts the difference.
+        old_keys, new_keys = self.keys(), newer.keys()
+        old, new = next(old_keys, None), next(new_keys, None)
+        added = removed = 0
+        while old is not None or new is not None:
+            if new is None or (old is not None and old < new):
+                removed += 1
+                old = next(old_keys, None)
+            elif old is None or new < old:
+                added += 1
+                new = next(new_keys, None)
+            else:
+                old, new = next(old_keys, None), next(new_keys, None)
+        return added, removed
+
+    def to_bytes(self, source: bytes, fetched_at: float, meta: bytes = b"") -> bytes:
+        header = self._HEADER.pack(self._MAGIC, 2, self.count, fetched_at, source, len(meta))
+        return header + meta + self.offsets.tobytes() + self.blob
+
+    @classmethod
+    def from_bytes(cls, data: bytes, source: bytes) -> Optional[Tuple["_MintIndex", float, bytes]]:
+        # None if the data was built from another source or is damaged.
+        if len(data) < cls._HEADER.size:
+            return None
+        magic, version, count, fetched_at, stored_source, meta_size = cls._HEADER.unpack_from(data)
+        offsets = array("I")
+        table_start = cls._HEADER.size + meta_size
+        table_size = 65537 * offsets.itemsize
+        if (magic, version, stored_source) != (cls._MAGIC, 2, source) or len(data) != table_start + table_size + count * 32:
+            return None
+        offsets.frombytes(data[table_start : table_start + table_size])
+        return cls(data[table_start + table_size :], offsets), fetched_at, data[cls._HEADER.size : table_start]
+
+
+# Mintlist JSON tokens: a string, a structural character, or a bare literal (number, true, null...).
+_MINTLIST_TOKEN = re.compile(r'\s*(?:"((?:[^"\\]|\\.)*)"|([\[\]{}:,])|([^\s\[\]{}:,"]+))')
+# Fast path for a plain array of mints: a run of complete, escape-free strings each followed by a comma.
+_MINTLIST_RUN = re.compile(r'(?:\s*"[^"\\]*"\s*,)+')
+_MINTLIST_STRING = re.compile(r'"([^"\\]*)"')
+_MINTLIST_WRAPPER_KEYS = {"mints", "result", "data"}
+
+
+class _MintlistParser:
+    # Incremental parser for mintlist JSON: feed() text as it arrives and get back the mints it
+    # completed, without building the document. Accepts a list of mints, a list of objects with
+    # a "mint" field, or either of those under "mints", "result" or "data".
+
+    MINTS, WRAPPER, ITEM, SKIP = range(4)
+
+    def __init__(self) -> None:
+        self.buffer = ""
+        # One frame per open container: [kind, is_object, expecting_key, current_key]
+        self.stack: List[List[Any]] = []
+
+    def feed(self, chunk: str, final: bool = False) -> List[str]:
+        buffer = self.buffer + chunk
+        found: List[str] = []
+        position = 0
+        while True:
+            if self.stack and self.stack[-1][0] == self.MINTS and not self.stack[-1][1]:
+                run = _MINTLIST_RUN.match(buffer, position)
+                if run is not None:
+                    found.extend(_MINTLIST_STRING.findall(buffer, position, run.end()))
+                    position = run.end()
+            match = _MINTLIST_TOKEN.match(buffer, position)
+            # A token touching the end of the buffer may continue in the next chunk.
+            if match is None or (match.end() == len(buffer) and not final and match.group(2) is None):
+                break
+            position = match.end()
+            self._token(*match.groups(), found)
+        self.buffer = buffer[position:]
+        if final and (self.buffer.strip() or self.stack):
+            raise ValueError("Truncated or malformed mintlist JSON")
+        return found
+
+    def _token(self, text: Optional[str], punct: Optional[str], literal: Optional[str], found: List[str]) -> None:
+        frame = self.stack[-1] if self.stack else None
+        if punct in ("[", "{"):
+            self.stack.append([self._child_kind(frame, punct), punct == "{", punct == "{", None])
+        elif punct in ("]", "}"):
+            if not self.stack:
+                raise ValueError("Unbalanced mintlist JSON")
+            self.stack.pop()
+        elif punct == ":":
+            if frame is not None:
+                frame[2] = False
+        elif punct == ",":
+            if frame is not None and frame[1]:
+                frame[2] = True
+        elif frame is not None and frame[1] and frame[2]:
+            frame[3] = text
+        elif frame is not None and text:
+            # Only strings can be mints; numbers, booleans and null are skipped.
+            if frame[0] == self.MINTS or (frame[0] == self.ITEM and frame[3] == "mint"):
+                found.append(text)
+
+    def _child_kind(self, frame: Optional[List[Any]], punct: str) -> int:
+        if frame is None or (frame[0] == self.WRAPPER and frame[3] in _MINTLIST_WRAPPER_KEYS):
+            return self.MINTS if punct == "[" else self.WRAPPER
+        if frame[0] == self.MINTS and punct == "{":
+            return self.ITEM
+        return self.SKIP
+
+
+class _RollingWindow:
+    # Time-bucketed ring over span_sec with running totals, so adds and reads are amortised O(1).
+    # Each bucket also keeps a sparse log-scale price histogram (about 1% relative error) that is
+    # merged into the window histogram for streaming quantiles.
+
+    def __init__(self, span_sec: float, buckets: int = 60) -> None:
+        self.span_sec = span_sec
+        self.size = buckets
+        self.width = span_sec / buckets
+        self.buckets: Deque[List[Any]] = deque()
+        self.volume = 0.0
+        self.count = 0
+        self.histogram: Dict[int, int] = {}
+
+    def add(self, ts: float, price: float, now: float) -> None:
+        self.expire(now)
+        index = int(ts // self.width)
+        if index < self._oldest_index(now):
+            return
+        position = len(self.buckets)
+        while position and self.buckets[position - 1][0] > index:
+            position -= 1
+        if position and self.buckets[position - 1][0] == index:
+            bucket = self.buckets[position - 1]
+        else:
+            bucket = [index, 0.0, 0, {}]
+            self.buckets.insert(position, bucket)
+        price_bin = _price_bin(price)
+        bucket[1] += price
+        bucket[2] += 1
+        bucket[3][price_bin] = bucket[3].get(price_bin, 0) + 1
+        self.volume += price
+        self.count += 1
+        self.histogram[price_bin] = self.histogram.get(price_bin, 0) + 1
+
+    def expire(self, now: float) -> None:
+        oldest = self._oldest_index(now)
+        while self.buckets and self.buckets[0][0] < oldest:
+            _, volume, count, histogram = self.buckets.popleft()
+            self.volume -= volume
+            self.count -= count
+            for price_bin, n in histogram.items():
+                remaining = self.histogram[price_bin] - n
+                if remaining:
+                    self.histogram[price_bin] = remaining
+                else:
+                    del self.histogram[price_bin]
+        if not self.count:
+            self.volume = 0.0
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        target = max(1, math.ceil(q * self.count))
+        seen = 0
+        for price_bin in sorted(self.histogram):
+            seen += self.histogram[price_bin]
+            if seen >= target:
+                return _price_bin_value(price_bin)
+        return None
+
+    def _oldest_index(self, now: float) -> int:
+        return int(now // self.width) - self.size + 1
+
+
+_PRICE_BIN_GAMMA = 1.02
+_PRICE_BIN_LOG = math.log(_PRICE_BIN_GAMMA)
+
+
+def _price_bin(price: float) -> int:
+    if price <= 0:
+        return -(10 ** 6)
+    return math.ceil(math.log(price) / _PRICE_BIN_LOG)
+
+
+def _price_bin_value(price_bin: int) -> float:
+    if price_bin <= -(10 ** 6):
+        return 0.0
+    return _PRICE_BIN_GAMMA ** price_bin * 2 / (1 + _PRICE_BIN_GAMMA)
+
+
+class _Histogram:
+    # Prometheus-style histogram; per-bucket counts are stored flat and made cumulative on render.
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets or _LATENCY_BUCKETS
+        self.series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        counts = self.series.get(labels)
+        if counts is None:
+            # One slot per bucket, one for +Inf, then sum and count.
+            counts = self.series[labels] = [0.0] * (len(self.buckets) + 3)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-2] += value
+        counts[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, counts in sorted(self.series.items()):
+            base = _metric_labels(self.labels, labels)
+            running = 0.0
+            for bound, count in zip([*self.buckets, "+Inf"], counts):
+                running += count
+                le = 'le="+Inf"' if bound == "+Inf" else f'le="{bound:g}"'
+                lines.append(f"{self.name}_bucket{{{base + ',' if base else ''}{le}}} {running:g}")
+            suffix = f"{{{base}}}" if base else ""
+            lines.append(f"{self.name}_sum{suffix} {counts[-2]:.6f}")
+            lines.append(f"{self.name}_count{suffix} {counts[-1]:g}")
+        return lines
+
+
+class _Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            base = _metric_labels(self.labels, labels)
+            lines.append(f"{self.name}{{{base}}} {value:g}" if base else f"{self.name} {value:g}")
+        return lines
+
+
+def _metric_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+def _render_metric_family(name: str, kind: str, help_text: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        base = _metric_labels(tuple(labels), tuple(labels.values()))
+        lines.append(f"{name}{{{base}}} {value:g}" if base else f"{name} {value:g}")
+    return lines
+
+
+@contextmanager
+def _upstream_timer(upstream: str) -> Iterator[None]:
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        _upstream_seconds.observe(time.perf_counter() - started, upstream, outcome)
+
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+_webhook_seconds = _Histogram("geckopulse_webhook_seconds", "Time spent handling a /webhook/helius request.")
+_upstream_seconds = _Histogram(
+    "geckopulse_upstream_seconds",
+    "Upstream request latency by upstream and outcome.",
+    ("upstream", "outcome"),
+)
+_telegram_send_seconds = _Histogram(
+    "geckopulse_telegram_send_seconds", "Telegram Bot API call latency, excluding throttling.", ("method",)
+)
+_event_to_alert_seconds = _Histogram(
+    "geckopulse_event_to_alert_seconds",
+    "Time from the on-chain event timestamp to the Telegram alert being delivered.",
+    ("type",),
+    (1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0, 900.0),
+)
+_dedupe_hits_total = _Counter("geckopulse_dedupe_hits_total", "Webhook events dropped as already-seen signatures.")
+_filter_drops_total = _Counter("geckopulse_filter_drops_total", "Webhook events dropped by filters.", ("reason",))
+_telegram_errors_total = _Counter("geckopulse_telegram_errors_total", "Telegram send errors by exception type.", ("type",))
+_rarity_stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+
+class _StackSampler(threading.Thread):
+    # Samples one thread's Python stack on a timer and folds the stacks for flamegraph tools.
+
+    def __init__(self, thread_id: int, interval_sec: float) -> None:
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval_sec = interval_sec
+        self.stacks: Dict[str, int] = {}
+        self.samples = 0
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval_sec):
+            frame = sys._current_frames().get(self.thread_id)
+            names: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                stack = ";".join(reversed(names))
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+                self.samples += 1
+
+
+# Profiling and tracemalloc are only installed while a session is running, so they cost nothing when off.
+_profile_session: Optional[Dict[str, Any]] = None
+_profile_result: Optional[Dict[str, Any]] = None
+_memory_snapshots: Deque[tracemalloc.Snapshot] = deque(maxlen=2)
+
+
+class _EventTrace:
+    # Wall-clock split of one webhook event across pipeline stages; mark() closes the current stage.
+
+    __slots__ = ("signature", "kind", "started_at", "last", "stages", "outcome")
+
+    def __init__(self, signature: Optional[str], kind: str) -> None:
+        self.signature = signature
+        self.kind = kind
+        self.started_at = time.time()
+        self.last = time.perf_counter()
+        self.stages: List[Tuple[str, float]] = []
+        self.outcome = "dropped"
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.stages.append((stage, now - self.last))
+        self.last = now
+
+    def total(self) -> float:
+        return sum(seconds for _, seconds in self.stages)
+
+
+class _LoopWatchdog(threading.Thread):
+    # Runs off the loop: if the lag monitor's heartbeat goes stale, the loop thread is stuck
+    # in synchronous code, so its current stack is the culprit.
+
+    def __init__(self, thread_id: int, interval_sec: float, threshold_sec: float) -> None:
+        super().__init__(name="loop-watchdog", daemon=True)
+        self.thread_id = thread_id
+        self.interval_sec = interval_sec
+        self.threshold_sec = threshold_sec
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        reported = 0.0
+        while not self.stopped.wait(self.interval_sec):
+            beat = _loop_lag_stats["heartbeat"]
+            if not beat or beat == reported or time.monotonic() - beat - LOOP_LAG_INTERVAL_MS / 1000 < self.threshold_sec:
+                continue
+            reported = beat
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame, limit=LOOP_LAG_STACK_DEPTH))
+            code = frame.f_code
+            _loop_lag_stats["last_stall_frame"] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+            logger.warning("Event loop blocked for over %.0fms in:\n%s", self.threshold_sec * 1000, stack)
+
+
+_event_traces: Deque[Tuple[float, _EventTrace]] = deque(maxlen=TRACE_BUFFER_SIZE)
+_loop_lag_stats: Dict[str, Any] = {
+    "heartbeat": 0.0,
+    "last_ms": 0.0,
+    "max_ms": 0.0,
+    "stalls": 0,
+    "last_stall_ms": None,
+    "last_stall_at": None,
+    "last_stall_frame": None,
+}
+_loop_watchdog: Optional[_LoopWatchdog] = None
+_loop_lag_seconds = _Histogram(
+    "geckopulse_event_loop_lag_seconds",
+    "How late the event loop ran a scheduled wakeup.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+_event_stage_seconds = _Histogram(
+    "geckopulse_event_stage_seconds",
+    "Time a webhook event spent in each pipeline stage.",
+    ("stage",),
+    (0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+
+
+# (resolution, marketplace) -> bucket start -> [open_ts, open, high, low, close, close_ts, volume, count]
+_candles: Dict[Tuple[str, str], Dict[int, List[float]]] = {}
+_candle_state: Dict[str, Any] = {"rebuilding": False, "rebuilt_sales": 0}
+_market_windows: Dict[str, _RollingWindow] = {
+    "5m": _RollingWindow(300),
+    "1h": _RollingWindow(3600),
+    "24h": _RollingWindow(86400),
+    "7d": _RollingWindow(7 * 86400),
+}
+# Replaced wholesale when the mintlist loads, never mutated, so readers need no lock.
+WATCH_MINTS = _MintIndex.from_mints(_parse_csv(os.getenv("WATCH_MINTS", "")))
+_mintlist_state: Dict[str, Any] = {
+    "url": None,
+    "source": None,
+    "listed": 0,
+    "invalid": 0,
+    "added": 0,
+    "removed": 0,
+    "not_modified": 0,
+    "fetched_at": None,
+    "loaded_at": None,
+    "checked_at": None,
+    "last_error": None,
+    "validators": {},
+}
+_signature_filter = _SignatureFilter(DEDUPE_WINDOW_SEC, DEDUPE_GENERATIONS, DEDUPE_CAPACITY, DEDUPE_FP_RATE)
+_metadata_cache = _TieredCache("metadata", METADATA_CACHE_SIZE, METADATA_CACHE_TTL_SEC, METADATA_NEGATIVE_TTL_SEC)
+_offchain_cache = _TieredCache("offchain", OFFCHAIN_CACHE_SIZE, OFFCHAIN_CACHE_TTL_SEC, METADATA_NEGATIVE_TTL_SEC)
+_arweave_hosts = {httpx.URL(gateway).host for gateway in ARWEAVE_GATEWAYS} | {"arweave.net", "www.arweave.net"}
 
 
 @app.on_event("startup")
 async def _startup() -> None:
+    global _shared_sync_task
+    _start_loop_monitor()
+    _get_http_client()
+    await asyncio.to_thread(_open_cache_db)
+    await asyncio.to_thread(_load_signature_filter)
+    _spawn(_dedupe_checkpointer())
+    await asyncio.to_thread(_load_recent_events)
+    # Sales up to this id are replayed into the candles; later ones arrive live.
+    candle_cutoff = await asyncio.to_thread(_max_event_id, "sales")
+    if candle_cutoff:
+        # Awaited, unlike the candles: sweep detection and alert stats read these windows.
+        await _rebuild_market_windows(candle_cutoff)
+    if SHARED_STATE:
+        _shared_cursors["sales"] = candle_cutoff
+        _shared_cursors["listings"] = await asyncio.to_thread(_max_event_id, "listings")
+        await _sync_shared_state_once()
+        _shared_sync_task = _spawn(_shared_state_syncer())
+    _start_event_store()
+    _start_ingest_workers()
+    await _start_bot()
     if not TELEGRAM_BOT_TOKEN:
         logger.warning("TELEGRAM_BOT_TOKEN is not set. Webhook will accept but cannot send messages.")
     if not TELEGRAM_CHAT_ID:
         logger.warning("TELEGRAM_CHAT_ID is not set. Webhook will accept but cannot send messages.")
     if WATCH_MINTLIST_URL:
-        await _load_mintlist(WATCH_MINTLIST_URL)
+        # A cached list lets the bot start filtering at once; the download then refreshes it.
+        if await _load_cached_mintlist(WATCH_MINTLIST_URL):
+            _spawn(_load_mintlist(WATCH_MINTLIST_URL))
+        else:
+            await _load_mintlist(WATCH_MINTLIST_URL)
+        _ensure_mintlist_refresher()
+    if PREWARM_METADATA and HELIUS_API_KEY and WATCH_MINTS:
+        _spawn(_prewarm_metadata())
+    _ensure_rarity_refresher()
+    _ensure_floor_refresher()
+    if candle_cutoff:
+        _spawn(_rebuild_candles(candle_cutoff))
+
+
+@app.on_event("shutdown")
+async def _shutdown() -> None:
+    _stop_profile()
+    await _stop_ingest_workers()
+    await _flush_pending_alerts()
+    await _checkpoint_signature_filter()
+    _close_stream_subscribers()
+    await _stop_event_store()
+    if SHARED_STATE:
+        # Stop the periodic sync first so the final flush is the only one in flight.
+        if _shared_sync_task is not None:
+            _shared_sync_task.cancel()
+            await asyncio.gather(_shared_sync_task, return_exceptions=True)
+        await _sync_shared_state_once()
+    for task in list(_background_tasks):
+        task.cancel()
+    _stop_loop_monitor()
+    await _stop_bot()
+    await _close_http_client()
+    await asyncio.to_thread(_close_cache_db)
+    await asyncio.to_thread(_close_events_db)
+    await asyncio.to_thread(_close_shared_db)
 
 
 @app.get("/health")
@@ -95,13 +1081,12 @@ async def health() -> Dict[str, str]:
 
 
 @app.get("/", response_class=HTMLResponse)
-async def landing(request: Request) -> HTMLResponse:
-    return templates.TemplateResponse(
-        "index.html",
-        {
-            "request": request,
-            "stats": _status_snapshot(),
-        },
+async def landing(request: Request) -> Response:
+    return _versioned_response(
+        request,
+        "page:index",
+        "text/html; charset=utf-8",
+        lambda: templates.get_template("index.html").render({"request": request, "stats": _status_snapshot()}),
     )
 
 
@@ -123,54 +1108,186 @@ def _require_admin(credentials: HTTPBasicCredentials = Depends(security)) -> HTT
 @app.get("/dashboard", response_class=HTMLResponse)
 async def dashboard(request: Request, _: HTTPBasicCredentials = Depends(_require_admin)) -> HTMLResponse:
     return templates.TemplateResponse(
+        request,
         "dashboard.html",
         {
-            "request": request,
             "config": _config_snapshot(),
         },
     )
 
 
 @app.get("/status", response_class=HTMLResponse)
-async def status_page(request: Request) -> HTMLResponse:
-    snapshot = _status_snapshot()
-    return templates.TemplateResponse(
-        "status.html",
-        {
-            "request": request,
-            "stats": snapshot,
-            "recent_sales": list(_recent_sales),
-            "recent_listings": list(_recent_listings),
-        },
-    )
-
-
-@app.get("/api/stream")
-async def api_stream(request: Request) -> StreamingResponse:
-    async def event_generator():
-        while True:
-            if await request.is_disconnected():
-                break
-            payload = {
+async def status_page(request: Request) -> Response:
+    def render() -> str:
+        return templates.get_template("status.html").render(
+            {
+                "request": request,
                 "stats": _status_snapshot(),
                 "recent_sales": list(_recent_sales),
                 "recent_listings": list(_recent_listings),
             }
-            yield f"data: {json.dumps(payload)}\n\n"
-            await asyncio.sleep(5)
+        )
 
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+    return _versioned_response(request, "page:status", "text/html; charset=utf-8", render)
+
+
+@app.get("/api/stream")
+async def api_stream(request: Request) -> StreamingResponse:
+    queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_CLIENT_BUFFER)
+    # Subscribe and take the snapshot or backlog in one step, at the same event id; deltas queued
+    # at or below that id are already part of what the client receives first.
+    _stream_subscribers[id(queue)] = queue
+    backlog = _stream_backlog(request.headers.get("last-event-id"))
+    snapshot = _stream_snapshot_frame() if backlog is None else None
+    start_id = _stream_event_id
+    _stream_stats["connects"] += 1
+
+    async def event_generator():
+        try:
+            yield "retry: 3000\n\n"
+            if snapshot is not None:
+                yield snapshot
+            else:
+                _stream_stats["resumes"] += 1
+                for frame in backlog:
+                    yield frame
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SEC)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                if frame is None:
+                    break
+                event_id, frame = frame
+                if event_id > start_id:
+                    yield frame
+        finally:
+            _stream_subscribers.pop(id(queue), None)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/api/status")
-async def api_status() -> Dict[str, Any]:
+async def api_status(request: Request, since: Optional[int] = None) -> Response:
+    key = "api:status" if since is None else f"api:status:since:{since}"
+    # Rendered on every request: only the versioned part is cached, the live sections keep moving.
+    return _versioned_response(request, key, "application/json", lambda: _api_status_body(since), max_age=0)
+
+
+def _api_status_body(since: Optional[int] = None) -> str:
+    cached = _status_payload_cache.get(since)
+    if cached is None or cached[0] != _state_version:
+        cached = (_state_version, json.dumps(_api_status_payload(since)))
+        _status_payload_cache[since] = cached
+        while len(_status_payload_cache) > 16:
+            _status_payload_cache.popitem(last=False)
+    # Splice the live sections into the cached recent events rather than re-serializing them.
+    return f"{cached[1][:-1]}, {json.dumps(_api_status_live())[1:]}"
+
+
+def _api_status_live() -> Dict[str, Any]:
+    # Sections that change without a state version bump: counters, queues, timers and decaying windows.
     return {
         "stats": _status_snapshot(),
-        "recent_sales": list(_recent_sales),
-        "recent_listings": list(_recent_listings),
+        "ingest": _ingest_snapshot(),
+        "telegram": _telegram_snapshot(),
+        "alerts": _alerts_snapshot(),
+        "metadata_cache": _metadata_cache.snapshot(),
+        "metadata_resolver": _resolver_snapshot(),
+        "offchain": _offchain_snapshot(),
+        "prewarm": _prewarm_snapshot(),
+        "rarity": _rarity_index_snapshot(),
+        "floors": _floors_snapshot(),
+        "stream": _stream_snapshot(),
+        "responses": _response_snapshot(),
+        "event_store": _event_store_snapshot(),
+        "dedupe": _dedupe_snapshot(),
+        "mintlist": _mintlist_snapshot(),
+        "shared_state": _shared_state_snapshot(),
+        "candles": {**_candle_state, "series": len(_candles), "buckets": sum(len(series) for series in _candles.values())},
+    }
+
+
+def _api_status_payload(since: Optional[int] = None) -> Dict[str, Any]:
+    if since == _state_version:
+        return {"version": _state_version, "changed": False}
+    recent_sales = list(_recent_sales)
+    recent_listings = list(_recent_listings)
+    # A version ahead of ours comes from before a restart; send everything.
+    if since is not None and since < _state_version:
+        recent_sales = [sale for sale in recent_sales if sale.get("version", 0) > since]
+        recent_listings = [listing for listing in recent_listings if listing.get("version", 0) > since]
+    return {
+        "version": _state_version,
+        "changed": True,
+        "recent_sales": recent_sales,
+        "recent_listings": recent_listings,
     }
 
 
+@app.get("/metrics")
+async def metrics() -> Response:
+    return Response(content=_render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/api/sales")
+async def api_sales(
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    mint: Optional[str] = None,
+    buyer: Optional[str] = None,
+    seller: Optional[str] = None,
+    marketplace: Optional[str] = None,
+    start: Optional[float] = Query(None, alias="from"),
+    end: Optional[float] = Query(None, alias="to"),
+) -> Dict[str, Any]:
+    filters = {"mint": mint, "buyer": buyer, "seller": seller, "marketplace": marketplace}
+    return await _event_page("sales", filters, start, end, cursor, limit)
+
+
+@app.get("/api/listings")
+async def api_listings(
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    mint: Optional[str] = None,
+    seller: Optional[str] = None,
+    marketplace: Optional[str] = None,
+    start: Optional[float] = Query(None, alias="from"),
+    end: Optional[float] = Query(None, alias="to"),
+) -> Dict[str, Any]:
+    filters = {"mint": mint, "seller": seller, "marketplace": marketplace}
+    return await _event_page("listings", filters, start, end, cursor, limit)
+
+
+@app.get("/api/candles")
+async def api_candles(
+    request: Request,
+    resolution: str = "1h",
+    marketplace: str = "all",
+    start: Optional[float] = Query(None, alias="from"),
+    end: Optional[float] = Query(None, alias="to"),
+) -> Response:
+    if resolution not in CANDLE_RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of {', '.join(CANDLE_RESOLUTIONS)}")
+    step, keep = CANDLE_RESOLUTIONS[resolution]
+    last = int((end if end is not None else time.time()) // step) * step
+    first = int(start // step) * step if start is not None else last - (CANDLE_DEFAULT_POINTS - 1) * step
+    first = max(first, last - (keep - 1) * step)
+    return _versioned_response(
+        request,
+        f"api:candles:{resolution}:{marketplace}:{first}:{last}",
+        "application/json",
+        lambda: json.dumps(_candle_arrays(resolution, marketplace, first, last)),
+    )
+
+
 @app.post("/dashboard/update")
 async def update_dashboard(
     request: Request,
@@ -203,9 +1320,9 @@ async def update_dashboard(
     await _apply_runtime_updates(updates)
 
     return templates.TemplateResponse(
+        request,
         "dashboard.html",
         {
-            "request": request,
             "config": _config_snapshot(),
             "notice": "Configuration updated. If changes do not apply, restart the server.",
         },
@@ -221,13 +1338,13 @@ async def dashboard_test(
     if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
         error = "Missing TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID."
     else:
-        bot = Bot(TELEGRAM_BOT_TOKEN)
+        bot = await _get_bot()
         await bot.send_message(chat_id=TELEGRAM_CHAT_ID, text="Test message from GeckoPulse.")
 
     return templates.TemplateResponse(
+        request,
         "dashboard.html",
         {
-            "request": request,
             "config": _config_snapshot(),
             "notice": "Test message sent." if not error else None,
             "error": error,
@@ -241,12 +1358,12 @@ async def dashboard_simulate(
     _: HTTPBasicCredentials = Depends(_require_admin),
 ) -> HTMLResponse:
     fake_event, fake_nft = _fake_sale()
-    enriched = _enrich_metadata(fake_nft)
-    _record_sale(fake_event, enriched)
+    enriched = await _enrich_metadata(fake_nft)
+    await _record_sale(fake_event, enriched)
 
     error = None
     if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
-        bot = Bot(TELEGRAM_BOT_TOKEN)
+        bot = await _get_bot()
         try:
             await _send_alert(bot, _format_sale_message(fake_event, enriched), enriched)
         except TelegramError as exc:
@@ -255,9 +1372,9 @@ async def dashboard_simulate(
         error = "Missing TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID."
 
     return templates.TemplateResponse(
+        request,
         "dashboard.html",
         {
-            "request": request,
             "config": _config_snapshot(),
             "notice": "Simulated sale added." if not error else None,
             "error": error,
@@ -271,21 +1388,21 @@ async def dashboard_simulate_listing(
     _: HTTPBasicCredentials = Depends(_require_admin),
 ) -> HTMLResponse:
     fake_event, fake_nft = _fake_listing()
-    enriched = _enrich_metadata(fake_nft)
+    enriched = await _enrich_metadata(fake_nft)
     _record_listing(fake_event, enriched)
 
     error = None
     if SEND_LISTING_ALERTS and TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
-        bot = Bot(TELEGRAM_BOT_TOKEN)
+        bot = await _get_bot()
         try:
             await _send_alert(bot, _format_listing_message(fake_event, enriched), enriched)
         except TelegramError as exc:
             error = f"Telegram error: {exc}"
 
     return templates.TemplateResponse(
+        request,
         "dashboard.html",
         {
-            "request": request,
             "config": _config_snapshot(),
             "notice": "Simulated listing added." if not error else None,
             "error": error,
@@ -293,65 +1410,405 @@ async def dashboard_simulate_listing(
     )
 
 
+@app.post("/dashboard/profile/start")
+async def dashboard_profile_start(
+    request: Request,
+    _: HTTPBasicCredentials = Depends(_require_admin),
+    mode: str = Form("sample"),
+    seconds: str = Form(""),
+) -> HTMLResponse:
+    error = None
+    try:
+        duration = float(seconds or 60)
+    except ValueError:
+        duration = 60.0
+    if mode not in {"sample", "cprofile"}:
+        error = f"Unknown profiler mode: {mode}"
+    elif _profile_session is not None:
+        error = f"A {_profile_session['mode']} session is already running."
+    else:
+        try:
+            _start_profile(mode, duration)
+        except ValueError as exc:
+            error = f"Cannot start the profiler: {exc}"
+
+    return templates.TemplateResponse(
+        request,
+        "dashboard.html",
+        {
+            "config": _config_snapshot(),
+            "notice": f"Profiling started ({mode})." if not error else None,
+            "error": error,
+        },
+    )
+
+
+@app.post("/dashboard/profile/stop")
+async def dashboard_profile_stop(
+    request: Request,
+    _: HTTPBasicCredentials = Depends(_require_admin),
+) -> HTMLResponse:
+    report = _stop_profile()
+    if not report and _profile_result:
+        report = _profile_result["report"]
+
+    return templates.TemplateResponse(
+        request,
+        "dashboard.html",
+        {
+            "config": _config_snapshot(),
+            "notice": "Profiling stopped." if report else None,
+            "error": None if report else "No profiling session has run yet.",
+            "report": report,
+        },
+    )
+
+
+@app.get("/dashboard/profile/download")
+async def dashboard_profile_download(_: HTTPBasicCredentials = Depends(_require_admin)) -> Response:
+    if _profile_result is None:
+        raise HTTPException(status_code=404, detail="No profile has been recorded")
+    return Response(
+        content=_profile_result["content"],
+        media_type=_profile_result["media_type"],
+        headers={"Content-Disposition": f'attachment; filename="{_profile_result["filename"]}"'},
+    )
+
+
+@app.post("/dashboard/memory/snapshot")
+async def dashboard_memory_snapshot(
+    request: Request,
+    _: HTTPBasicCredentials = Depends(_require_admin),
+) -> HTMLResponse:
+    report = None
+    if not tracemalloc.is_tracing():
+        # Only allocations made after this point are traced, so the first snapshot comes later.
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        _memory_snapshots.clear()
+        notice = "tracemalloc started. Take a snapshot once traffic has run for a while."
+    else:
+        snapshot = await asyncio.to_thread(_take_memory_snapshot)
+        previous = _memory_snapshots[-1] if _memory_snapshots else None
+        report = await asyncio.to_thread(_memory_report, snapshot, previous)
+        _memory_snapshots.append(snapshot)
+        notice = f"Snapshot {len(_memory_snapshots)} taken." if previous is None else "Snapshot taken and diffed."
+
+    return templates.TemplateResponse(
+        request,
+        "dashboard.html",
+        {
+            "config": _config_snapshot(),
+            "notice": notice,
+            "report": report,
+        },
+    )
+
+
+@app.post("/dashboard/memory/stop")
+async def dashboard_memory_stop(
+    request: Request,
+    _: HTTPBasicCredentials = Depends(_require_admin),
+) -> HTMLResponse:
+    tracemalloc.stop()
+    _memory_snapshots.clear()
+
+    return templates.TemplateResponse(
+        request,
+        "dashboard.html",
+        {
+            "config": _config_snapshot(),
+            "notice": "tracemalloc stopped and snapshots discarded.",
+        },
+    )
+
+
 @app.post("/webhook/helius")
 async def helius_webhook(request: Request) -> Dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        return await _handle_helius_webhook(request)
+    finally:
+        _webhook_seconds.observe(time.perf_counter() - started)
+
+
+async def _handle_helius_webhook(request: Request) -> Dict[str, Any]:
     payload = await request.json()
     if not isinstance(payload, list):
         raise HTTPException(status_code=400, detail="Expected list payload")
 
     events = [event for event in payload if isinstance(event, dict)]
     if not events:
-        return {"received": 0, "sent": 0}
+        return {"received": 0, "queued": 0}
 
     if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
         logger.error("Missing TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID")
         raise HTTPException(status_code=500, detail="Bot not configured")
 
-    bot = Bot(TELEGRAM_BOT_TOKEN)
-    sent = 0
-
-    for event in events:
-        if event.get("type") != "NFT_SALE":
-            if event.get("type") != "NFT_LISTING":
-                continue
+    candidates = [event for event in events if event.get("type") in {"NFT_SALE", "NFT_LISTING"}]
+    if len(candidates) < len(events):
+        _filter_drops_total.inc("type", amount=len(events) - len(candidates))
+    free = INGEST_QUEUE_SIZE - _ingest_depth()
+    if free <= 0:
+        _ingest_stats["rejected"] += len(candidates)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Ingest queue full",
+            headers={"Retry-After": str(INGEST_RETRY_AFTER_SEC)},
+        )
 
+    claimed = None
+    if SHARED_STATE:
+        # One transaction per batch; a Helius retry landing on another worker loses the claim.
+        signatures = {signature for signature in map(_get_signature, candidates) if signature}
+        claimed = await asyncio.to_thread(_claim_signatures, list(signatures - _recent_signature_set))
+
+    queued = 0
+    overflow: List[Dict[str, Any]] = []
+    for position, event in enumerate(candidates):
+        if queued >= free:
+            # Take what fits and refuse the rest. The accepted events are now remembered as seen, so
+            # the Helius retry of the whole batch skips them and a batch larger than the queue still
+            # gets through in steps.
+            overflow = candidates[position:]
+            break
         _increment_seen()
 
         signature = _get_signature(event)
-        if signature and _seen_signature(signature):
+        trace = _EventTrace(signature, "sale" if event.get("type") == "NFT_SALE" else "listing")
+        if signature and (_seen_signature(signature) or (claimed is not None and signature not in claimed)):
+            _dedupe_hits_total.inc()
             continue
+        trace.mark("dedupe")
 
-        source = (event.get("source") or "").lower()
-        if WATCH_SOURCES and source not in WATCH_SOURCES:
+        nft_info, reason = _filter_event(event)
+        if nft_info is None:
+            _filter_drops_total.inc(reason)
             continue
+        trace.mark("filter")
 
-        nft_info = _extract_nft_info(event)
-        if WATCH_MINTS and nft_info.get("mint") not in WATCH_MINTS:
-            continue
-
-        enriched = _enrich_metadata(nft_info)
+        _enqueue_event(event, nft_info, trace)
+        queued += 1
 
-        if event.get("type") == "NFT_SALE":
-            message = _format_sale_message(event, enriched)
+    if overflow:
+        _ingest_stats["rejected"] += len(overflow)
+        if claimed:
+            # Hand back the claims for events this worker never looked at, or the retry would lose them.
+            unreached = [signature for signature in map(_get_signature, overflow) if signature in claimed]
+            await asyncio.to_thread(_release_signatures, unreached)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Ingest queue full; {len(overflow)} events not accepted",
+            headers={"Retry-After": str(INGEST_RETRY_AFTER_SEC)},
+        )
+    return {"received": len(events), "queued": queued}
+
+
+def _filter_event(event: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    # (nft_info, None) if the event passes the watch filters, else (None, drop reason).
+    source = (event.get("source") or "").lower()
+    if WATCH_SOURCES and source not in WATCH_SOURCES:
+        return None, "source"
+
+    nft_info = _extract_nft_info(event)
+    if WATCH_MINTS and nft_info.get("mint") not in WATCH_MINTS:
+        return None, "mint"
+    return nft_info, None
+
+
+async def _process_event(event: Dict[str, Any], nft_info: Dict[str, Any], trace: _EventTrace) -> None:
+    enriched = await _enrich_metadata(nft_info)
+    bot = await _get_bot()
+    trace.mark("enrich")
+
+    if event.get("type") == "NFT_SALE":
+        message = _format_sale_message(event, enriched)
+        trace.mark("format")
+        if ALERT_COALESCE_WINDOW_SEC > 0 and not _is_priority_sale(enriched):
+            _coalesce_sale(event, enriched, message)
+            trace.mark("coalesce")
+            trace.outcome = "coalesced"
+            return
+        try:
+            await _send_alert(bot, message, enriched)
+        except TelegramError as exc:
+            logger.warning("Telegram send failed: %s", exc)
+            trace.mark("send")
+            trace.outcome = "send_failed"
+            return
+        trace.mark("send")
+        _observe_alert_latency(event)
+        _alert_stats["immediate"] += 1
+        await _record_sale(event, enriched)
+        trace.mark("record")
+        trace.outcome = "sent"
+    else:
+        message = _format_listing_message(event, enriched)
+        trace.mark("format")
+        trace.outcome = "recorded"
+        if SEND_LISTING_ALERTS and LISTING_DIGEST_SEC > 0:
+            _queue_listing_digest(enriched, message)
+            trace.mark("coalesce")
+            trace.outcome = "digest"
+        elif SEND_LISTING_ALERTS:
             try:
                 await _send_alert(bot, message, enriched)
             except TelegramError as exc:
                 logger.warning("Telegram send failed: %s", exc)
-                continue
-            sent += 1
-            _record_sale(event, enriched)
-        else:
-            message = _format_listing_message(event, enriched)
-            if SEND_LISTING_ALERTS:
-                try:
-                    await _send_alert(bot, message, enriched)
-                except TelegramError as exc:
-                    logger.warning("Telegram send failed: %s", exc)
-                    continue
-                sent += 1
-            _record_listing(event, enriched)
+                trace.mark("send")
+                trace.outcome = "send_failed"
+                return
+            trace.mark("send")
+            _observe_alert_latency(event)
+            trace.outcome = "sent"
+        _record_listing(event, enriched)
+        trace.mark("record")
+
+
+def _finish_trace(trace: _EventTrace) -> None:
+    for stage, seconds in trace.stages:
+        _event_stage_seconds.observe(seconds, stage)
+    _event_traces.append((trace.total(), trace))
+
+
+def _slowest_traces() -> List[Dict[str, Any]]:
+    slowest = sorted(_event_traces, key=lambda item: item[0], reverse=True)[:TRACE_SLOWEST]
+    return [
+        {
+            "signature": trace.signature,
+            "type": trace.kind,
+            "outcome": trace.outcome,
+            "time": datetime.fromtimestamp(trace.started_at, tz=timezone.utc).strftime("%H:%M:%S"),
+            "total_ms": round(total * 1000, 1),
+            "stages": [(stage, round(seconds * 1000, 1)) for stage, seconds in trace.stages],
+        }
+        for total, trace in slowest
+    ]
+
 
-    return {"received": len(events), "sent": sent}
+def _observe_alert_latency(event: Dict[str, Any]) -> None:
+    timestamp = event.get("timestamp") or event.get("time")
+    if timestamp:
+        kind = "sale" if event.get("type") == "NFT_SALE" else "listing"
+        _event_to_alert_seconds.observe(max(0.0, time.time() - _parse_event_time(timestamp)), kind)
+
+
+def _start_loop_monitor() -> None:
+    global _loop_watchdog
+    if LOOP_LAG_INTERVAL_MS <= 0:
+        return
+    _spawn(_loop_lag_monitor())
+    if LOOP_LAG_WARN_MS > 0 and _loop_watchdog is None:
+        threshold = LOOP_LAG_WARN_MS / 1000
+        _loop_watchdog = _LoopWatchdog(threading.get_ident(), max(0.01, threshold / 2), threshold)
+        _loop_watchdog.start()
+
+
+def _stop_loop_monitor() -> None:
+    global _loop_watchdog
+    if _loop_watchdog is not None:
+        _loop_watchdog.stopped.set()
+        _loop_watchdog.join()
+        _loop_watchdog = None
+
+
+async def _loop_lag_monitor() -> None:
+    loop = asyncio.get_running_loop()
+    interval = LOOP_LAG_INTERVAL_MS / 1000
+    while True:
+        _loop_lag_stats["heartbeat"] = time.monotonic()
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - expected)
+        _loop_lag_seconds.observe(lag)
+        lag_ms = round(lag * 1000, 1)
+        _loop_lag_stats["last_ms"] = lag_ms
+        _loop_lag_stats["max_ms"] = max(_loop_lag_stats["max_ms"], lag_ms)
+        if LOOP_LAG_WARN_MS > 0 and lag_ms >= LOOP_LAG_WARN_MS:
+            _loop_lag_stats["stalls"] += 1
+            _loop_lag_stats["last_stall_ms"] = lag_ms
+            _loop_lag_stats["last_stall_at"] = _current_time()
+
+
+def _start_ingest_workers() -> None:
+    if _ingest_workers:
+        return
+    _ingest_stats["started_at"] = time.monotonic()
+    for index in range(max(1, INGEST_WORKERS)):
+        queue: asyncio.Queue = asyncio.Queue()
+        _ingest_queues.append(queue)
+        _ingest_busy_time.append(0.0)
+        _ingest_workers.append(asyncio.create_task(_ingest_worker(index, queue)))
+
+
+async def _stop_ingest_workers() -> None:
+    if _ingest_queues:
+        try:
+            await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in _ingest_queues)), INGEST_DRAIN_SEC)
+        except asyncio.TimeoutError:
+            logger.warning("Dropping %d queued events on shutdown.", _ingest_depth())
+    for task in _ingest_workers:
+        task.cancel()
+    await asyncio.gather(*_ingest_workers, return_exceptions=True)
+    _ingest_workers.clear()
+    _ingest_queues.clear()
+    _ingest_busy_time.clear()
+
+
+def _enqueue_event(event: Dict[str, Any], nft_info: Dict[str, Any], trace: _EventTrace) -> None:
+    _start_ingest_workers()
+    # Shard by mint so events for the same NFT are processed in arrival order.
+    key = nft_info.get("mint") or nft_info.get("signature") or ""
+    queue = _ingest_queues[zlib.crc32(key.encode("utf-8")) % len(_ingest_queues)]
+    queue.put_nowait((time.monotonic(), event, nft_info, trace))
+    _ingest_stats["enqueued"] += 1
+
+
+def _ingest_depth() -> int:
+    return sum(queue.qsize() for queue in _ingest_queues)
+
+
+async def _ingest_worker(index: int, queue: asyncio.Queue) -> None:
+    global _ingest_active
+    while True:
+        enqueued_at, event, nft_info, trace = await queue.get()
+        trace.mark("queue")
+        started = time.monotonic()
+        lag = started - enqueued_at
+        _ingest_stats["lag_sec"] = lag
+        _ingest_stats["max_lag_sec"] = max(_ingest_stats["max_lag_sec"], lag)
+        _ingest_active += 1
+        try:
+            await _process_event(event, nft_info, trace)
+            _ingest_stats["processed"] += 1
+        except Exception:
+            _ingest_stats["failed"] += 1
+            trace.mark("error")
+            trace.outcome = "failed"
+            logger.exception("Failed to process event %s", nft_info.get("signature"))
+        finally:
+            _finish_trace(trace)
+            _ingest_active -= 1
+            _ingest_busy_time[index] += time.monotonic() - started
+            queue.task_done()
+
+
+def _ingest_snapshot() -> Dict[str, Any]:
+    workers = len(_ingest_workers)
+    elapsed = time.monotonic() - _ingest_stats["started_at"] if _ingest_stats["started_at"] else 0.0
+    utilisation = sum(_ingest_busy_time) / (elapsed * workers) if elapsed and workers else 0.0
+    return {
+        "queue_depth": _ingest_depth(),
+        "queue_capacity": INGEST_QUEUE_SIZE,
+        "workers": workers,
+        "workers_busy": _ingest_active,
+        "worker_utilisation": round(min(utilisation, 1.0), 4),
+        "lag_sec": round(_ingest_stats["lag_sec"], 3),
+        "max_lag_sec": round(_ingest_stats["max_lag_sec"], 3),
+        "enqueued": _ingest_stats["enqueued"],
+        "processed": _ingest_stats["processed"],
+        "failed": _ingest_stats["failed"],
+        "rejected": _ingest_stats["rejected"],
+    }
 
 
 def _get_signature(event: Dict[str, Any]) -> Optional[str]:
@@ -363,58 +1820,825 @@ def _get_signature(event: Dict[str, Any]) -> Optional[str]:
 
 def _seen_signature(signature: str) -> bool:
     if signature in _recent_signature_set:
+        _dedupe_stats["exact_hits"] += 1
         return True
     if _recent_signatures.maxlen and len(_recent_signatures) >= _recent_signatures.maxlen:
         oldest = _recent_signatures.popleft()
         _recent_signature_set.discard(oldest)
     _recent_signatures.append(signature)
     _recent_signature_set.add(signature)
+    if _signature_filter.check_and_add(signature, time.time()):
+        _dedupe_stats["filter_hits"] += 1
+        return True
     return False
 
 
-async def _load_mintlist(url: str) -> None:
+def _load_signature_filter() -> None:
     try:
-        mints = await asyncio.to_thread(_fetch_mintlist, url)
-    except Exception as exc:
-        logger.warning("Failed to load mintlist from %s: %s", url, exc)
+        data = DEDUPE_PATH.read_bytes()
+    except FileNotFoundError:
+        return
+    except OSError as exc:
+        logger.warning("Failed to read dedupe checkpoint %s: %s", DEDUPE_PATH, exc)
+        return
+    try:
+        loaded = _signature_filter.load_bytes(data)
+    except struct.error:
+        loaded = False
+    if not loaded:
+        logger.warning("Ignoring dedupe checkpoint %s: written with different DEDUPE_* settings or truncated.", DEDUPE_PATH)
+        return
+    _dedupe_stats["loaded"] = _signature_filter.items()
+    logger.info("Loaded %d signatures from the dedupe checkpoint.", _dedupe_stats["loaded"])
+
+
+def _save_signature_filter(data: bytes) -> None:
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = DEDUPE_PATH.with_suffix(".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, DEDUPE_PATH)
+
+
+async def _checkpoint_signature_filter() -> None:
+    items = _signature_filter.items()
+    if items == _dedupe_stats.get("checkpoint_items"):
+        return
+    # Copy the bits on the loop so the thread writes a consistent snapshot.
+    data = _signature_filter.to_bytes()
+    try:
+        await asyncio.to_thread(_save_signature_filter, data)
+    except OSError as exc:
+        logger.warning("Failed to write dedupe checkpoint %s: %s", DEDUPE_PATH, exc)
+        return
+    _dedupe_stats["checkpoint_items"] = items
+    _dedupe_stats["checkpoints"] += 1
+    _dedupe_stats["checkpoint_at"] = _current_time()
+
+
+async def _dedupe_checkpointer() -> None:
+    while True:
+        await asyncio.sleep(DEDUPE_CHECKPOINT_SEC)
+        await _checkpoint_signature_filter()
+
+
+def _dedupe_snapshot() -> Dict[str, Any]:
+    return {
+        "window_sec": DEDUPE_WINDOW_SEC,
+        "generations": len(_signature_filter.filters),
+        "capacity": DEDUPE_CAPACITY,
+        "hashes": _signature_filter.hashes,
+        "items": _signature_filter.items(),
+        "recent_exact": len(_recent_signature_set),
+        "memory_bytes": _signature_filter.memory_bytes(),
+        "fp_rate_target": DEDUPE_FP_RATE,
+        "fp_rate_estimate": round(_signature_filter.fp_rate(), 8),
+        "exact_hits": _dedupe_stats["exact_hits"],
+        "filter_hits": _dedupe_stats["filter_hits"],
+        "loaded": _dedupe_stats["loaded"],
+        "checkpoints": _dedupe_stats["checkpoints"],
+        "checkpoint_at": _dedupe_stats["checkpoint_at"],
+    }
+
+
+def _open_cache_db() -> Optional[sqlite3.Connection]:
+    global _cache_db
+    with _cache_db_lock:
+        if _cache_db is not None:
+            return _cache_db
+        try:
+            STATE_DIR.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(CACHE_DB_PATH), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            conn.commit()
+        except sqlite3.Error as exc:
+            logger.warning("Persistent cache unavailable at %s: %s", CACHE_DB_PATH, exc)
+            return None
+        _cache_db = conn
+        return conn
+
+
+def _close_cache_db() -> None:
+    global _cache_db
+    with _cache_db_lock:
+        if _cache_db is not None:
+            _cache_db.close()
+            _cache_db = None
+
+
+def _cache_db_get(namespace: str, key: str) -> Optional[Tuple[str, float]]:
+    conn = _cache_db or _open_cache_db()
+    if conn is None:
+        return None
+    with _cache_db_lock:
+        try:
+            return conn.execute(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+        except sqlite3.Error as exc:
+            logger.warning("Cache read failed for %s/%s: %s", namespace, key, exc)
+            return None
+
+
+def _cache_db_put(namespace: str, key: str, value: str, expires_at: float) -> None:
+    conn = _cache_db or _open_cache_db()
+    if conn is None:
         return
+    with _cache_db_lock:
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, value, expires_at),
+            )
+            conn.commit()
+        except sqlite3.Error as exc:
+            logger.warning("Cache write failed for %s/%s: %s", namespace, key, exc)
+
+
+def _cache_db_items(namespace: str) -> List[Tuple[str, Any]]:
+    conn = _cache_db or _open_cache_db()
+    if conn is None:
+        return []
+    with _cache_db_lock:
+        try:
+            rows = conn.execute(
+                "SELECT key, value FROM cache WHERE namespace = ? AND expires_at > ?", (namespace, time.time())
+            ).fetchall()
+        except sqlite3.Error as exc:
+            logger.warning("Cache scan failed for %s: %s", namespace, exc)
+            return []
+    return [(key, json.loads(value)) for key, value in rows]
+
+
+def _open_events_db() -> Optional[sqlite3.Connection]:
+    global _events_db
+    with _events_db_lock:
+        if _events_db is not None:
+            return _events_db
+        try:
+            STATE_DIR.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(EVENTS_DB_PATH), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # The import script may write while the server is running.
+            conn.execute("PRAGMA busy_timeout=5000")
+            for table, columns in _EVENT_TABLES.items():
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    "id INTEGER PRIMARY KEY, ts REAL NOT NULL, signature TEXT, mint TEXT, price_sol REAL, "
+                    "marketplace TEXT, buyer TEXT, seller TEXT, data TEXT NOT NULL)"
+                )
+                conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {table}_signature ON {table} (signature, mint)")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_ts ON {table} (ts, id)")
+                for column in columns:
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_{column} ON {table} ({column}, ts, id)")
+            conn.commit()
+        except sqlite3.Error as exc:
+            logger.warning("Event store unavailable at %s: %s", EVENTS_DB_PATH, exc)
+            return None
+        _events_db = conn
+        return conn
+
+
+def _close_events_db() -> None:
+    global _events_db
+    with _events_db_lock:
+        if _events_db is not None:
+            _events_db.close()
+            _events_db = None
+
+
+def _store_event(table: str, ts: float, price_sol: Optional[float], entry: Dict[str, Any]) -> None:
+    _start_event_store()
+    try:
+        _event_store_queue.put_nowait((table, _event_row(ts, price_sol, entry)))
+    except asyncio.QueueFull:
+        _event_store_stats["dropped"] += 1
+
+
+def _event_row(ts: float, price_sol: Optional[float], entry: Dict[str, Any]) -> Tuple[Any, ...]:
+    data = {key: value for key, value in entry.items() if key != "version"}
+    signature = entry.get("signature")
+    return (
+        ts,
+        signature if signature and signature != "Unknown" else None,
+        entry.get("mint"),
+        price_sol,
+        entry.get("marketplace"),
+        entry.get("buyer"),
+        entry.get("seller"),
+        json.dumps(data),
+    )
 
-    if not mints:
-        logger.warning("Mintlist from %s was empty.", url)
+
+def _start_event_store() -> None:
+    global _event_store_queue, _event_store_task
+    if _event_store_task is not None:
         return
+    _event_store_queue = asyncio.Queue(maxsize=EVENT_STORE_QUEUE_SIZE)
+    _event_store_task = asyncio.create_task(_event_store_writer(_event_store_queue))
+
 
-    WATCH_MINTS.update(mints)
-    logger.info("Loaded %d mints from mintlist.", len(mints))
-
-
-def _fetch_mintlist(url: str) -> List[str]:
-    with urllib.request.urlopen(url, timeout=15) as response:
-        data = json.load(response)
-
-    def _extract_mints(value: Any) -> List[str]:
-        if isinstance(value, list):
-            if value and isinstance(value[0], dict):
-                found = []
-                for item in value:
-                    mint = item.get("mint") if isinstance(item, dict) else None
-                    if mint:
-                        found.append(str(mint))
-                return found
-            return [str(item) for item in value if item]
-        if isinstance(value, dict):
-            if "mints" in value:
-                return _extract_mints(value.get("mints"))
-            if "result" in value:
-                return _extract_mints(value.get("result"))
-            if "data" in value:
-                return _extract_mints(value.get("data"))
+async def _stop_event_store() -> None:
+    global _event_store_queue, _event_store_task
+    if _event_store_task is None:
+        return
+    try:
+        await asyncio.wait_for(_event_store_queue.join(), INGEST_DRAIN_SEC)
+    except asyncio.TimeoutError:
+        logger.warning("Dropping %d unwritten events on shutdown.", _event_store_queue.qsize())
+    _event_store_task.cancel()
+    await asyncio.gather(_event_store_task, return_exceptions=True)
+    _event_store_queue = None
+    _event_store_task = None
+
+
+async def _event_store_writer(queue: asyncio.Queue) -> None:
+    while True:
+        batch = [await queue.get()]
+        # Let a burst accumulate so it lands in one transaction.
+        await asyncio.sleep(EVENT_STORE_FLUSH_MS / 1000)
+        while len(batch) < EVENT_STORE_BATCH_MAX and not queue.empty():
+            batch.append(queue.get_nowait())
+        try:
+            await asyncio.to_thread(_write_events, batch)
+        except Exception as exc:
+            _event_store_stats["failed"] += len(batch)
+            logger.warning("Failed to write %d events: %s", len(batch), exc)
+        finally:
+            for _ in batch:
+                queue.task_done()
+
+
+def _write_events(batch: List[Tuple[str, Tuple[Any, ...]]]) -> None:
+    conn = _events_db or _open_events_db()
+    if conn is None:
+        _event_store_stats["failed"] += len(batch)
+        return
+    rows: Dict[str, List[Tuple[Any, ...]]] = {}
+    for table, row in batch:
+        rows.setdefault(table, []).append(row)
+    with _events_db_lock:
+        before = conn.total_changes
+        with conn:
+            for table, table_rows in rows.items():
+                conn.executemany(
+                    f"INSERT OR IGNORE INTO {table} "
+                    "(ts, signature, mint, price_sol, marketplace, buyer, seller, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    table_rows,
+                )
+        written = conn.total_changes - before
+    _event_store_stats["written"] += written
+    _event_store_stats["duplicates"] += len(batch) - written
+    _event_store_stats["batches"] += 1
+    _event_store_stats["max_batch"] = max(_event_store_stats["max_batch"], len(batch))
+
+
+def _query_events(
+    table: str,
+    filters: Dict[str, str],
+    start: Optional[float],
+    end: Optional[float],
+    after: Optional[Tuple[float, int]],
+    limit: int,
+) -> List[Tuple[int, float, Optional[float], str]]:
+    conn = _events_db or _open_events_db()
+    if conn is None:
         return []
+    clauses = [f"{column} = ?" for column in filters]
+    params: List[Any] = list(filters.values())
+    if start is not None:
+        clauses.append("ts >= ?")
+        params.append(start)
+    if end is not None:
+        clauses.append("ts < ?")
+        params.append(end)
+    if after is not None:
+        clauses.append("(ts, id) < (?, ?)")
+        params.extend(after)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    params.append(limit)
+    with _events_db_lock:
+        return conn.execute(
+            f"SELECT id, ts, price_sol, data FROM {table} {where} ORDER BY ts DESC, id DESC LIMIT ?", params
+        ).fetchall()
+
+
+async def _event_page(
+    table: str,
+    filters: Dict[str, Optional[str]],
+    start: Optional[float],
+    end: Optional[float],
+    cursor: Optional[str],
+    limit: int,
+) -> Dict[str, Any]:
+    after = None
+    if cursor:
+        try:
+            ts, _, row_id = cursor.partition(":")
+            after = (float(ts), int(row_id))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    limit = max(1, min(limit, EVENT_PAGE_MAX))
+    active = {column: value for column, value in filters.items() if value}
+    rows = await asyncio.to_thread(_query_events, table, active, start, end, after, limit + 1)
+    items = []
+    for row_id, ts, price_sol, data in rows[:limit]:
+        items.append({**json.loads(data), "id": row_id, "ts": ts, "price_sol": price_sol})
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = f"{last[1]!r}:{last[0]}"
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def _max_event_id(table: str) -> int:
+    conn = _events_db or _open_events_db()
+    if conn is None:
+        return 0
+    with _events_db_lock:
+        return conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+
+
+def _load_recent_events() -> None:
+    # Seed the in-memory recent activity from the store so the status page survives a restart.
+    for table, recent in (("sales", _recent_sales), ("listings", _recent_listings)):
+        if recent:
+            continue
+        try:
+            rows = _query_events(table, {}, None, None, None, recent.maxlen or 40)
+        except sqlite3.Error as exc:
+            logger.warning("Failed to load recent %s: %s", table, exc)
+            continue
+        recent.extend(json.loads(data) for _, _, _, data in rows)
+
+
+def _event_store_snapshot() -> Dict[str, Any]:
+    return {
+        "queue_depth": _event_store_queue.qsize() if _event_store_queue else 0,
+        "batch_max": EVENT_STORE_BATCH_MAX,
+        "flush_ms": EVENT_STORE_FLUSH_MS,
+        **_event_store_stats,
+    }
+
+
+def _open_shared_db() -> Optional[sqlite3.Connection]:
+    global _shared_db
+    with _shared_db_lock:
+        if _shared_db is not None:
+            return _shared_db
+        try:
+            STATE_DIR.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(SHARED_DB_PATH), check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS claims (signature TEXT PRIMARY KEY, claimed_at REAL NOT NULL, pid INTEGER)"
+                " WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS claims_claimed_at ON claims (claimed_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value)")
+        except sqlite3.Error as exc:
+            logger.warning("Shared state unavailable at %s: %s", SHARED_DB_PATH, exc)
+            return None
+        _shared_db = conn
+        return conn
+
+
+def _close_shared_db() -> None:
+    global _shared_db
+    with _shared_db_lock:
+        if _shared_db is not None:
+            _shared_db.close()
+            _shared_db = None
+
+
+def _claim_signatures(signatures: List[str]) -> Optional[set]:
+    # Returns the signatures nobody else had claimed, or None without a shared store so callers
+    # fall back to local dedupe rather than dropping events.
+    conn = _shared_db or _open_shared_db()
+    if conn is None:
+        return None
+    claimed = set()
+    now = time.time()
+    pid = os.getpid()
+    with _shared_db_lock:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for signature in signatures:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO claims (signature, claimed_at, pid) VALUES (?, ?, ?)", (signature, now, pid)
+                )
+                if cursor.rowcount == 1:
+                    claimed.add(signature)
+            conn.execute("COMMIT")
+        except sqlite3.Error as exc:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            logger.warning("Failed to claim signatures: %s", exc)
+            return None
+    _shared_stats["claimed"] += len(claimed)
+    _shared_stats["claim_conflicts"] += len(signatures) - len(claimed)
+    return claimed
+
+
+def _release_signatures(signatures: List[str]) -> None:
+    conn = _shared_db or _open_shared_db()
+    if conn is None or not signatures:
+        return
+    pid = os.getpid()
+    with _shared_db_lock:
+        try:
+            conn.executemany("DELETE FROM claims WHERE signature = ? AND pid = ?", [(signature, pid) for signature in signatures])
+        except sqlite3.Error as exc:
+            logger.warning("Failed to release signature claims: %s", exc)
+            return
+    _shared_stats["claimed"] -= len(signatures)
+
+
+def _shared_add(name: str, amount: int = 1) -> None:
+    _shared_pending[name] = _shared_pending.get(name, 0) + amount
+
+
+def _shared_value(name: str, local: Any) -> Any:
+    # Single-process mode reads the module globals; shared mode adds unsynced local increments.
+    if not SHARED_STATE:
+        return local
+    if name == "last_event_time":
+        return _shared_pending.get(name) or _shared_flushing.get(name) or _shared_totals.get(name) or local
+    return _shared_totals.get(name, 0) + _shared_flushing.get(name, 0) + _shared_pending.get(name, 0)
+
+
+def _remember_local_event(entry: Dict[str, Any]) -> None:
+    # Our own rows come back through the event-store tail; this lets the sync skip them.
+    if not SHARED_STATE:
+        return
+    _local_event_keys[_event_key(entry)] = None
+    while len(_local_event_keys) > EVENT_STORE_QUEUE_SIZE:
+        _local_event_keys.popitem(last=False)
+
+
+def _event_key(entry: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    # Matches the (signature, mint) columns written by _event_row.
+    signature = entry.get("signature")
+    return (signature if signature and signature != "Unknown" else None, entry.get("mint"))
+
+
+def _sync_shared_state(
+    flushing: Dict[str, Any], cursors: Dict[str, int]
+) -> Tuple[Dict[str, Any], Dict[str, List[Tuple[Any, ...]]]]:
+    conn = _shared_db or _open_shared_db()
+    if conn is None:
+        raise sqlite3.OperationalError("shared state store unavailable")
+    now = time.time()
+    with _shared_db_lock:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for name, value in flushing.items():
+                if name == "last_event_time":
+                    conn.execute(
+                        "INSERT INTO counters (name, value) VALUES (?, ?) "
+                        "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+                        (name, value),
+                    )
+                else:
+                    conn.execute(
+                        "INSERT INTO counters (name, value) VALUES (?, ?) "
+                        "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                        (name, value),
+                    )
+            if now - _shared_stats["last_prune"] >= 60:
+                conn.execute("DELETE FROM claims WHERE claimed_at < ?", (now - SHARED_CLAIM_TTL_SEC,))
+                _shared_stats["last_prune"] = now
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        totals = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+
+    rows: Dict[str, List[Tuple[Any, ...]]] = {}
+    events = _events_db or _open_events_db()
+    if events is not None:
+        with _events_db_lock:
+            for table, cursor in cursors.items():
+                rows[table] = events.execute(
+                    f"SELECT id, ts, signature, mint, price_sol, marketplace, buyer, data FROM {table} "
+                    "WHERE id > ? ORDER BY id LIMIT ?",
+                    (cursor, EVENT_STORE_QUEUE_SIZE),
+                ).fetchall()
+    return totals, rows
+
+
+async def _shared_state_syncer() -> None:
+    while True:
+        await asyncio.sleep(SHARED_STATE_SYNC_MS / 1000)
+        await _sync_shared_state_once()
+
+
+async def _sync_shared_state_once() -> None:
+    global _shared_pending, _shared_flushing
+    _shared_flushing, _shared_pending = _shared_pending, {}
+    try:
+        totals, rows = await asyncio.to_thread(_sync_shared_state, _shared_flushing, dict(_shared_cursors))
+    except sqlite3.Error as exc:
+        # Keep the increments for the next attempt.
+        for name, value in _shared_flushing.items():
+            if name == "last_event_time":
+                _shared_pending.setdefault(name, value)
+            else:
+                _shared_pending[name] = _shared_pending.get(name, 0) + value
+        _shared_flushing = {}
+        _shared_stats["failed"] += 1
+        logger.warning("Shared state sync failed: %s", exc)
+        return
+    _shared_flushing = {}
+    _shared_stats["syncs"] += 1
+    changed = totals != _shared_totals
+    _shared_totals.clear()
+    _shared_totals.update(totals)
+    for table, table_rows in rows.items():
+        for row in table_rows:
+            _shared_cursors[table] = row[0]
+            changed = _apply_remote_event(table, *row[1:]) or changed
+    if changed:
+        _bump_state_version()
+
+
+def _apply_remote_event(
+    table: str,
+    ts: float,
+    signature: Optional[str],
+    mint: Optional[str],
+    price_sol: Optional[float],
+    marketplace: Optional[str],
+    buyer: Optional[str],
+    data: str,
+) -> bool:
+    key = (signature, mint)
+    if key in _local_event_keys:
+        del _local_event_keys[key]
+        return False
+    _shared_stats["remote_events"] += 1
+    live = ts >= time.time() - SHARED_LIVE_SEC
+    if table == "sales":
+        if price_sol is not None:
+            _record_market_sale(ts, price_sol, buyer or "")
+            _record_candle(_candles, ts, price_sol, marketplace or "Unknown")
+        if live:
+            sale = {"version": _bump_state_version(), **json.loads(data)}
+            _recent_sales.appendleft(sale)
+            _publish_stream("sale", {"sale": sale, "stats": _status_snapshot()})
+    elif live:
+        listing = {"version": _bump_state_version(), **json.loads(data)}
+        _recent_listings.appendleft(listing)
+        _publish_stream("listing", {"listing": listing})
+    return True
+
+
+def _shared_state_snapshot() -> Dict[str, Any]:
+    return {
+        "enabled": SHARED_STATE,
+        "pid": os.getpid(),
+        "sync_ms": SHARED_STATE_SYNC_MS,
+        "claimed": _shared_stats["claimed"],
+        "claim_conflicts": _shared_stats["claim_conflicts"],
+        "remote_events": _shared_stats["remote_events"],
+        "syncs": _shared_stats["syncs"],
+        "failed": _shared_stats["failed"],
+    }
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_TIMEOUT_SEC, connect=HTTP_CONNECT_TIMEOUT_SEC),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_SEC,
+            ),
+            follow_redirects=True,
+            headers={"User-Agent": f"geckopulse/{BUILD_ID}"},
+        )
+    return _http_client
+
+
+async def _close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    _http_host_limits.clear()
+
+
+def _host_limit(url: str) -> asyncio.Semaphore:
+    host = httpx.URL(url).host
+    limit = _http_host_limits.get(host)
+    if limit is None:
+        limit = asyncio.Semaphore(HTTP_MAX_PER_HOST)
+        _http_host_limits[host] = limit
+    return limit
+
+
+async def _http_json(
+    method: str,
+    url: str,
+    payload: Any = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+) -> Any:
+    client = _get_http_client()
+    kwargs: Dict[str, Any] = {"headers": headers}
+    if payload is not None:
+        kwargs["json"] = payload
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    async with _host_limit(url):
+        response = await client.request(method, url, **kwargs)
+    response.raise_for_status()
+    return response.json()
+
+
+async def _http_get_json(url: str, headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> Any:
+    return await _http_json("GET", url, headers=headers, timeout=timeout)
+
+
+async def _http_post_json(url: str, payload: Any, headers: Optional[Dict[str, str]] = None) -> Any:
+    return await _http_json("POST", url, payload=payload, headers=headers)
 
-    mints = _extract_mints(data)
-    if mints:
-        return mints
 
-    raise ValueError("Unsupported mintlist format")
+def _mintlist_source(url: str) -> bytes:
+    return hashlib.sha256(url.encode()).digest()
+
+
+def _build_watch_mints(listed: _MintIndex, previous: _MintIndex) -> Tuple[_MintIndex, int, int]:
+    # Runs in a thread: the new index is built beside the live one, which keeps serving until it is swapped.
+    env_mints = _MintIndex.from_mints(_parse_csv(os.getenv("WATCH_MINTS", "")))
+    watched = _MintIndex.from_keys(chain(env_mints.keys(), listed.keys())) if env_mints else listed
+    return (watched, *previous.diff(watched))
+
+
+async def _publish_watch_mints(url: str, listed: _MintIndex, **state: Any) -> bool:
+    global WATCH_MINTS
+    watched, added, removed = await asyncio.to_thread(_build_watch_mints, listed, WATCH_MINTS)
+    # The URL may have been changed on the dashboard while this list was downloading.
+    if url != WATCH_MINTLIST_URL:
+        logger.info("Discarding mintlist from %s: WATCH_MINTLIST_URL has changed.", url)
+        return False
+    WATCH_MINTS = watched
+    _mintlist_state.update(state, url=url, listed=len(listed), added=added, removed=removed, loaded_at=_current_time())
+    if added or removed:
+        _bump_state_version()
+    logger.info("Mintlist from %s: %d mints (+%d, -%d).", state["source"], len(listed), added, removed)
+    return True
+
+
+def _read_mintlist_cache(url: str) -> Optional[Tuple[_MintIndex, float, bytes]]:
+    try:
+        data = MINTLIST_CACHE_PATH.read_bytes()
+    except FileNotFoundError:
+        return None
+    except OSError as exc:
+        logger.warning("Failed to read mintlist cache %s: %s", MINTLIST_CACHE_PATH, exc)
+        return None
+    loaded = _MintIndex.from_bytes(data, _mintlist_source(url))
+    if loaded is None:
+        logger.info("Ignoring mintlist cache %s: built from a different URL or truncated.", MINTLIST_CACHE_PATH)
+    return loaded
+
+
+def _save_mintlist_cache(data: bytes) -> None:
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    # Per-process temp name: with several workers each one refreshes and writes the cache.
+    tmp_path = MINTLIST_CACHE_PATH.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, MINTLIST_CACHE_PATH)
+
+
+async def _load_cached_mintlist(url: str) -> bool:
+    async with _mintlist_lock:
+        loaded = await asyncio.to_thread(_read_mintlist_cache, url)
+        if loaded is None:
+            return False
+        listed, fetched_at, meta = loaded
+        try:
+            validators = json.loads(meta) if meta else {}
+        except ValueError:
+            validators = {}
+        return await _publish_watch_mints(url, listed, source="cache", fetched_at=fetched_at, validators=validators)
+
+
+async def _load_mintlist(url: str) -> bool:
+    # True if WATCH_MINTS is now current for url.
+    async with _mintlist_lock:
+        # Revalidate what we already hold, so an unchanged list costs a 304 and no parsing.
+        validators = _mintlist_state["validators"] if _mintlist_state["url"] == url else {}
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        _mintlist_state["checked_at"] = _current_time()
+        try:
+            with _upstream_timer("mintlist"):
+                fetched = await _stream_mintlist(url, headers)
+        except Exception as exc:
+            _mintlist_state["last_error"] = str(exc)
+            logger.warning("Failed to load mintlist from %s: %s", url, exc)
+            return False
+        _mintlist_state["last_error"] = None
+
+        if fetched is None:
+            _mintlist_state["not_modified"] += 1
+            logger.debug("Mintlist at %s is unchanged.", url)
+            return True
+        listed, invalid, validators = fetched
+        if not listed:
+            logger.warning("Mintlist from %s was empty.", url)
+            return False
+
+        fetched_at = time.time()
+        if not await _publish_watch_mints(url, listed, source="network", invalid=invalid, fetched_at=fetched_at, validators=validators):
+            return False
+        if invalid:
+            logger.warning("Skipped %d mintlist entries that are not Solana addresses.", invalid)
+        data = listed.to_bytes(_mintlist_source(url), fetched_at, json.dumps(validators).encode())
+        try:
+            await asyncio.to_thread(_save_mintlist_cache, data)
+        except OSError as exc:
+            logger.warning("Failed to write mintlist cache %s: %s", MINTLIST_CACHE_PATH, exc)
+    return True
+
+
+async def _stream_mintlist(url: str, headers: Dict[str, str]) -> Optional[Tuple[_MintIndex, int, Dict[str, str]]]:
+    # Parse and decode chunk by chunk so the full document and its strings are never held at once.
+    # None means the server answered 304 Not Modified.
+    parser = _MintlistParser()
+    keys: Set[bytes] = set()
+    invalid = 0
+
+    def add(mints: List[str]) -> None:
+        nonlocal invalid
+        for mint in mints:
+            key = _decode_mint(mint)
+            if key is None:
+                invalid += 1
+            else:
+                keys.add(key)
+
+    client = _get_http_client()
+    async with _host_limit(url):
+        async with client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 304:
+                return None
+            response.raise_for_status()
+            validators = {
+                name: response.headers[header]
+                for name, header in (("etag", "etag"), ("last_modified", "last-modified"))
+                if header in response.headers
+            }
+            async for chunk in response.aiter_text():
+                add(parser.feed(chunk))
+    add(parser.feed("", final=True))
+    return await asyncio.to_thread(_MintIndex.from_keys, keys), invalid, validators
+
+
+def _ensure_mintlist_refresher() -> None:
+    global _mintlist_task
+    if not WATCH_MINTLIST_URL or MINTLIST_REFRESH_SEC <= 0 or (_mintlist_task is not None and not _mintlist_task.done()):
+        return
+    _mintlist_task = _spawn(_mintlist_refresher())
+
+
+async def _mintlist_refresher() -> None:
+    delay = MINTLIST_REFRESH_SEC
+    while True:
+        await asyncio.sleep(delay)
+        if not WATCH_MINTLIST_URL:
+            return
+        loaded = await _load_mintlist(WATCH_MINTLIST_URL)
+        delay = MINTLIST_REFRESH_SEC if loaded else min(MINTLIST_REFRESH_SEC, 300)
+
+
+def _mintlist_snapshot() -> Dict[str, Any]:
+    state = {key: value for key, value in _mintlist_state.items() if key != "validators"}
+    return {
+        **state,
+        "url": WATCH_MINTLIST_URL or None,
+        "refresh_sec": MINTLIST_REFRESH_SEC,
+        "watched": len(WATCH_MINTS),
+        "memory_bytes": WATCH_MINTS.memory_bytes(),
+        "etag": _mintlist_state["validators"].get("etag"),
+    }
 
 
 def _extract_nft_info(event: Dict[str, Any]) -> Dict[str, Any]:
@@ -556,17 +2780,343 @@ def _format_listing_message(event: Dict[str, Any], nft: Dict[str, Any]) -> str:
     return "\n".join(lines)
 
 
+def _is_priority_sale(nft: Dict[str, Any]) -> bool:
+    amount_lamports = nft.get("amount_lamports")
+    if not isinstance(amount_lamports, (int, float)):
+        return False
+    price_sol = amount_lamports / LAMPORTS_PER_SOL
+    if price_sol >= WHALE_SOL:
+        return True
+    floor_sol = _floor_snapshot().get("price_sol")
+    return bool(floor_sol and price_sol >= floor_sol * 1.2)
+
+
+def _coalesce_sale(event: Dict[str, Any], nft: Dict[str, Any], message: str) -> None:
+    key = nft.get("buyer") or nft.get("signature") or ""
+    batch = _coalesce_batches.get(key)
+    if batch is None:
+        batch = []
+        _coalesce_batches[key] = batch
+        _spawn(_flush_sale_batch_later(key))
+    batch.append((event, nft, message))
+
+
+async def _flush_sale_batch_later(key: str) -> None:
+    await asyncio.sleep(ALERT_COALESCE_WINDOW_SEC)
+    await _flush_sale_batch(key)
+
+
+async def _flush_sale_batch(key: str) -> None:
+    batch = _coalesce_batches.pop(key, None)
+    if not batch:
+        return
+    try:
+        bot = await _get_bot()
+        if len(batch) == 1:
+            _, nft, message = batch[0]
+            await _send_alert(bot, message, nft)
+        else:
+            await _send_sweep_album(bot, batch)
+            _alert_stats["albums"] += 1
+    except (TelegramError, HTTPException) as exc:
+        logger.warning("Telegram send failed for %d coalesced sales: %s", len(batch), exc)
+        return
+    _alert_stats["coalesced"] += len(batch)
+    for event, nft, _ in batch:
+        _observe_alert_latency(event)
+        await _record_sale(event, nft)
+
+
+async def _send_sweep_album(bot: Bot, batch: List[Tuple[Dict[str, Any], Dict[str, Any], str]]) -> None:
+    caption = _format_sweep_caption([nft for _, nft, _ in batch])
+    images = [nft.get("image") for _, nft, _ in batch if nft.get("image")]
+    if not images:
+        await _governed_send(bot.send_message, chat_id=TELEGRAM_CHAT_ID, text=caption, parse_mode="HTML", disable_web_page_preview=True)
+        return
+    if len(images) == 1:
+        # An album needs two items; one image goes out as a photo with the summary caption.
+        await _governed_send(bot.send_photo, chat_id=TELEGRAM_CHAT_ID, photo=images[0], caption=caption, parse_mode="HTML")
+        return
+    # Telegram albums hold at most 10 items; the summary caption rides on the first one.
+    for start in range(0, len(images), 10):
+        media = [InputMediaPhoto(media=url) for url in images[start:start + 10]]
+        if start == 0:
+            media[0] = InputMediaPhoto(media=images[0], caption=caption, parse_mode="HTML")
+        if len(media) == 1:
+            await _governed_send(bot.send_photo, chat_id=TELEGRAM_CHAT_ID, photo=images[start])
+            continue
+        await _governed_send(bot.send_media_group, chat_id=TELEGRAM_CHAT_ID, media=media)
+
+
+def _format_sweep_caption(nfts: List[Dict[str, Any]]) -> str:
+    buyer = nfts[0].get("buyer") or "Unknown buyer"
+    total_sol = sum(
+        nft["amount_lamports"] / LAMPORTS_PER_SOL
+        for nft in nfts
+        if isinstance(nft.get("amount_lamports"), (int, float))
+    )
+    lines = [
+        "<b>🦎 GeckoPulse • Sweep</b>",
+        f"🧹 <code>{_h(_shorten(buyer))}</code> picked up <b>{len(nfts)}</b> for <b>{total_sol:.4f} SOL</b>",
+    ]
+    footer = f"<a href=\"{_h(_solscan_account_url(buyer))}\">Buyer on Solscan</a>"
+    for index, nft in enumerate(nfts):
+        line = f"• <a href=\"{_h(_tensor_url(nft.get('mint') or ''))}\">{_h(nft.get('name') or 'Unknown NFT')}</a> — {_h(_format_sol(nft.get('amount_lamports')))}"
+        # Album captions are capped at 1024 characters.
+        if len("\n".join(lines + [line, footer])) > 1000:
+            lines.append(f"… and {len(nfts) - index} more")
+            break
+        lines.append(line)
+    lines.append(footer)
+    return "\n".join(lines)
+
+
+def _queue_listing_digest(nft: Dict[str, Any], message: str) -> None:
+    if not _listing_digest:
+        _spawn(_flush_listing_digest_later())
+    _listing_digest.append((nft, message))
+
+
+async def _flush_listing_digest_later() -> None:
+    await asyncio.sleep(LISTING_DIGEST_SEC)
+    await _flush_listing_digest()
+
+
+async def _flush_listing_digest() -> None:
+    pending = list(_listing_digest)
+    _listing_digest.clear()
+    if not pending:
+        return
+    try:
+        bot = await _get_bot()
+        if len(pending) == 1:
+            nft, message = pending[0]
+            await _send_alert(bot, message, nft)
+            return
+        for start in range(0, len(pending), LISTING_DIGEST_MAX_LINES):
+            chunk = [nft for nft, _ in pending[start:start + LISTING_DIGEST_MAX_LINES]]
+            text = _format_listing_digest(chunk, len(pending))
+            await _governed_send(bot.send_message, chat_id=TELEGRAM_CHAT_ID, text=text, parse_mode="HTML", disable_web_page_preview=True)
+        _alert_stats["digests"] += 1
+    except (TelegramError, HTTPException) as exc:
+        logger.warning("Telegram send failed for listing digest of %d: %s", len(pending), exc)
+
+
+def _format_listing_digest(nfts: List[Dict[str, Any]], total: int) -> str:
+    lines = [
+        "<b>🦎 GeckoPulse • Listings Digest</b>",
+        f"{total} new listings",
+    ]
+    for nft in nfts:
+        marketplace = nft.get("marketplace") or "Unknown marketplace"
+        lines.append(
+            f"• <a href=\"{_h(_tensor_url(nft.get('mint') or ''))}\">{_h(nft.get('name') or 'Unknown NFT')}</a>"
+            f" — {_h(_format_sol(nft.get('amount_lamports')))} · {_h(marketplace)}"
+        )
+    return "\n".join(lines)
+
+
+async def _flush_pending_alerts() -> None:
+    for key in list(_coalesce_batches):
+        await _flush_sale_batch(key)
+    await _flush_listing_digest()
+
+
+def _alerts_snapshot() -> Dict[str, Any]:
+    return {
+        "coalesce_window_sec": ALERT_COALESCE_WINDOW_SEC,
+        "listing_digest_sec": LISTING_DIGEST_SEC,
+        "pending_sale_batches": len(_coalesce_batches),
+        "pending_sales": sum(len(batch) for batch in _coalesce_batches.values()),
+        "pending_listings": len(_listing_digest),
+        "immediate": _alert_stats["immediate"],
+        "coalesced": _alert_stats["coalesced"],
+        "albums": _alert_stats["albums"],
+        "digests": _alert_stats["digests"],
+    }
+
+
 async def _send_alert(bot: Bot, message: str, nft: Dict[str, Any]) -> None:
     image_url = nft.get("image")
     tags = nft.get("tags") or []
     has_special = any("Whale" in tag or "Sweep" in tag or "Above Floor" in tag for tag in tags)
     if ALERT_GIF_URL and has_special:
-        await bot.send_animation(chat_id=TELEGRAM_CHAT_ID, animation=ALERT_GIF_URL, caption=message, parse_mode="HTML")
+        await _governed_send(bot.send_animation, chat_id=TELEGRAM_CHAT_ID, animation=ALERT_GIF_URL, caption=message, parse_mode="HTML")
         return
     if image_url:
-        await bot.send_photo(chat_id=TELEGRAM_CHAT_ID, photo=image_url, caption=message, parse_mode="HTML")
+        await _governed_send(bot.send_photo, chat_id=TELEGRAM_CHAT_ID, photo=image_url, caption=message, parse_mode="HTML")
     else:
-        await bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message, parse_mode="HTML", disable_web_page_preview=True)
+        await _governed_send(bot.send_message, chat_id=TELEGRAM_CHAT_ID, text=message, parse_mode="HTML", disable_web_page_preview=True)
+
+
+def _spawn(coro: Any) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+def _build_bot(token: str) -> Bot:
+    request = HTTPXRequest(
+        connection_pool_size=TELEGRAM_POOL_SIZE,
+        connect_timeout=TELEGRAM_CONNECT_TIMEOUT_SEC,
+        read_timeout=TELEGRAM_READ_TIMEOUT_SEC,
+        write_timeout=TELEGRAM_WRITE_TIMEOUT_SEC,
+        media_write_timeout=TELEGRAM_WRITE_TIMEOUT_SEC,
+        pool_timeout=TELEGRAM_POOL_TIMEOUT_SEC,
+    )
+    return Bot(
+        token,
+        base_url=f"{TELEGRAM_API_URL}/bot",
+        base_file_url=f"{TELEGRAM_API_URL}/file/bot",
+        request=request,
+    )
+
+
+async def _start_bot() -> Optional[Bot]:
+    global _bot
+    if not TELEGRAM_BOT_TOKEN:
+        return None
+    async with _bot_lock:
+        if _bot is not None and _bot.token == TELEGRAM_BOT_TOKEN:
+            return _bot
+        bot = _build_bot(TELEGRAM_BOT_TOKEN)
+        try:
+            # get_me opens the pooled connection so the first alert reuses a warm TLS session.
+            await bot.initialize()
+        except TelegramError as exc:
+            logger.warning("Telegram bot warm-up failed: %s", exc)
+        previous, _bot = _bot, bot
+    if previous is not None:
+        _spawn(_retire_bot(previous))
+    return bot
+
+
+async def _get_bot() -> Bot:
+    if _bot is not None and _bot.token == TELEGRAM_BOT_TOKEN:
+        return _bot
+    bot = await _start_bot()
+    if bot is None:
+        raise HTTPException(status_code=500, detail="Bot not configured")
+    return bot
+
+
+async def _retire_bot(bot: Bot) -> None:
+    # Give sends already in flight on the old client time to finish before closing its pool.
+    await asyncio.sleep(TELEGRAM_READ_TIMEOUT_SEC + TELEGRAM_WRITE_TIMEOUT_SEC)
+    await _shutdown_bot(bot)
+
+
+async def _shutdown_bot(bot: Bot) -> None:
+    try:
+        await bot.shutdown()
+    except Exception as exc:
+        logger.warning("Telegram bot shutdown failed: %s", exc)
+
+
+async def _stop_bot() -> None:
+    global _bot
+    async with _bot_lock:
+        bot, _bot = _bot, None
+    if bot is not None:
+        await _shutdown_bot(bot)
+
+
+async def _governed_send(send: Any, **kwargs: Any) -> Any:
+    chat_id = str(kwargs.get("chat_id"))
+    lock = _telegram_chat_locks.setdefault(chat_id, asyncio.Lock())
+    # The per-chat lock is FIFO, so alerts leave in the order they were queued even while throttled.
+    async with lock:
+        attempt = 0
+        while True:
+            await _telegram_throttle(chat_id)
+            started = time.monotonic()
+            try:
+                result = await send(**kwargs)
+            except RetryAfter as exc:
+                _telegram_errors_total.inc(type(exc).__name__)
+                _telegram_stats["retry_after_hits"] += 1
+                if attempt >= TELEGRAM_SEND_RETRIES:
+                    _telegram_stats["failed"] += 1
+                    raise
+                delay = _retry_after_seconds(exc) + random.uniform(0, 1)
+            except TimedOut as exc:
+                _telegram_errors_total.inc(type(exc).__name__)
+                # A read or write timeout may come after Telegram has already posted the message, and a
+                # retry would post the alert twice. Only connect and pool timeouts are known unsent.
+                if not _telegram_request_unsent(exc) or attempt >= TELEGRAM_SEND_RETRIES:
+                    _telegram_stats["failed"] += 1
+                    raise
+                delay = min(30.0, 2 ** attempt) + random.uniform(0, 1)
+            except NetworkError as exc:
+                _telegram_errors_total.inc(type(exc).__name__)
+                if attempt >= TELEGRAM_SEND_RETRIES:
+                    _telegram_stats["failed"] += 1
+                    raise
+                delay = min(30.0, 2 ** attempt) + random.uniform(0, 1)
+            except TelegramError as exc:
+                _telegram_errors_total.inc(type(exc).__name__)
+                _telegram_stats["failed"] += 1
+                raise
+            else:
+                _telegram_latencies.append(time.monotonic() - started)
+                _telegram_send_seconds.observe(time.monotonic() - started, getattr(send, "__name__", "send"))
+                _telegram_stats["sent"] += 1
+                return result
+            attempt += 1
+            _telegram_stats["retries"] += 1
+            _telegram_stats["throttle_sec_total"] += delay
+            logger.info("Telegram send to %s retrying in %.1fs (attempt %d)", chat_id, delay, attempt)
+            await asyncio.sleep(delay)
+
+
+def _telegram_request_unsent(exc: TimedOut) -> bool:
+    return isinstance(exc.__cause__, (httpx.ConnectTimeout, httpx.PoolTimeout))
+
+
+async def _telegram_throttle(chat_id: str) -> None:
+    bucket = _telegram_chat_buckets.get(chat_id)
+    if bucket is None:
+        bucket = _TokenBucket(TELEGRAM_CHAT_RATE_PER_MIN / 60, TELEGRAM_CHAT_BURST)
+        _telegram_chat_buckets[chat_id] = bucket
+    wait = bucket.reserve()
+    if wait:
+        await asyncio.sleep(wait)
+    global_wait = _telegram_global_bucket.reserve()
+    if global_wait:
+        await asyncio.sleep(global_wait)
+    _telegram_stats["throttle_sec_last"] = wait + global_wait
+    _telegram_stats["throttle_sec_total"] += wait + global_wait
+
+
+def _retry_after_seconds(exc: RetryAfter) -> float:
+    value = exc.retry_after
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return float(value or 1)
+
+
+def _telegram_snapshot() -> Dict[str, Any]:
+    latencies = sorted(_telegram_latencies)
+
+    def _pct(q: float) -> float:
+        if not latencies:
+            return 0.0
+        return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 3)
+
+    return {
+        "sent": _telegram_stats["sent"],
+        "failed": _telegram_stats["failed"],
+        "retries": _telegram_stats["retries"],
+        "retry_after_hits": _telegram_stats["retry_after_hits"],
+        "latency_p50_sec": _pct(0.5),
+        "latency_p95_sec": _pct(0.95),
+        "latency_max_sec": round(latencies[-1], 3) if latencies else 0.0,
+        "throttle_sec_total": round(_telegram_stats["throttle_sec_total"], 3),
+        "throttle_sec_last": round(_telegram_stats["throttle_sec_last"], 3),
+        "chat_rate_per_min": TELEGRAM_CHAT_RATE_PER_MIN,
+        "global_rate_per_sec": TELEGRAM_GLOBAL_RATE_PER_SEC,
+    }
 
 
 def _mask_value(value: str, visible: int = 4) -> str:
@@ -584,79 +3134,522 @@ def _current_time() -> str:
 def _increment_seen() -> None:
     global _sales_seen
     _sales_seen += 1
+    if SHARED_STATE:
+        _shared_add("sales_seen")
+    _bump_state_version()
 
 
-def _record_sale(event: Dict[str, Any], nft: Dict[str, Any]) -> None:
+def _bump_state_version() -> int:
+    global _state_version
+    if SHARED_STATE:
+        # Millisecond versions keep ?since= meaningful when requests land on different workers.
+        _state_version = max(_state_version + 1, int(time.time() * 1000))
+    else:
+        _state_version += 1
+    return _state_version
+
+
+async def _record_sale(event: Dict[str, Any], nft: Dict[str, Any]) -> None:
     global _sales_sent, _last_event_time
 
     _sales_sent += 1
     timestamp = event.get("timestamp") or event.get("time") or _current_time()
     _last_event_time = str(timestamp)
+    if SHARED_STATE:
+        _shared_add("sales_sent")
+        _shared_pending["last_event_time"] = _last_event_time
     event_ts = _parse_event_time(timestamp)
 
-    amount_lamports = nft.get("amount_lamports")
-    amount_str = "Unknown"
-    if isinstance(amount_lamports, (int, float)):
-        amount_str = f"{amount_lamports / LAMPORTS_PER_SOL:.4f} SOL"
-
-    enriched = _enrich_metadata(nft)
+    enriched = await _enrich_metadata(nft)
     tags = _sale_tags(nft.get("amount_lamports"), _floor_snapshot(), nft.get("buyer"))
-    _recent_sales.appendleft(
-        {
-            "name": enriched.get("name") or "Unknown NFT",
-            "mint": enriched.get("mint") or "Unknown",
-            "price": amount_str,
-            "marketplace": nft.get("marketplace") or "Unknown",
-            "buyer": nft.get("buyer") or "Unknown",
-            "seller": nft.get("seller") or "Unknown",
-            "signature": nft.get("signature") or "Unknown",
-            "timestamp": _last_event_time,
-            "image": enriched.get("image"),
-            "traits": enriched.get("traits") or [],
-            "collection": enriched.get("collection"),
-            "tags": tags,
-        }
-    )
+    sale = {"version": _bump_state_version(), **_sale_entry(event, nft, enriched, tags)}
+    _recent_sales.appendleft(sale)
+    _remember_local_event(sale)
 
-    if isinstance(amount_lamports, (int, float)) and event_ts:
-        _sales_window.append((event_ts, amount_lamports / LAMPORTS_PER_SOL, nft.get("buyer") or ""))
-        _prune_sales_window()
+    price_sol = _price_sol(nft)
+    if price_sol is not None and event_ts:
+        _record_market_sale(event_ts, price_sol, nft.get("buyer") or "")
+        _record_candle(_candles, event_ts, price_sol, sale["marketplace"])
+    _store_event("sales", event_ts, price_sol, sale)
+    _publish_stream("sale", {"sale": sale, "stats": _status_snapshot()})
 
 
 def _record_listing(event: Dict[str, Any], nft: Dict[str, Any]) -> None:
     timestamp = event.get("timestamp") or event.get("time") or _current_time()
+    listing = {"version": _bump_state_version(), **_listing_entry(event, nft)}
+    _recent_listings.appendleft(listing)
+    _remember_local_event(listing)
+    _store_event("listings", _parse_event_time(timestamp), _price_sol(nft), listing)
+    _publish_stream("listing", {"listing": listing})
+
+
+def _price_sol(nft: Dict[str, Any]) -> Optional[float]:
     amount_lamports = nft.get("amount_lamports")
-    amount_str = "Unknown"
     if isinstance(amount_lamports, (int, float)):
-        amount_str = f"{amount_lamports / LAMPORTS_PER_SOL:.4f} SOL"
+        return amount_lamports / LAMPORTS_PER_SOL
+    return None
 
-    _recent_listings.appendleft(
-        {
-            "name": nft.get("name") or "Unknown NFT",
-            "mint": nft.get("mint") or "Unknown",
-            "price": amount_str,
-            "marketplace": nft.get("marketplace") or "Unknown",
-            "seller": nft.get("seller") or "Unknown",
-            "signature": nft.get("signature") or "Unknown",
-            "timestamp": str(timestamp),
-            "image": nft.get("image"),
-            "traits": nft.get("traits") or [],
-            "collection": nft.get("collection"),
+
+def _price_label(nft: Dict[str, Any]) -> str:
+    price_sol = _price_sol(nft)
+    return f"{price_sol:.4f} SOL" if price_sol is not None else "Unknown"
+
+
+def _sale_entry(
+    event: Dict[str, Any], nft: Dict[str, Any], enriched: Dict[str, Any], tags: List[str]
+) -> Dict[str, Any]:
+    timestamp = event.get("timestamp") or event.get("time") or _current_time()
+    return {
+        "name": enriched.get("name") or "Unknown NFT",
+        "mint": enriched.get("mint") or "Unknown",
+        "price": _price_label(nft),
+        "marketplace": nft.get("marketplace") or "Unknown",
+        "buyer": nft.get("buyer") or "Unknown",
+        "seller": nft.get("seller") or "Unknown",
+        "signature": nft.get("signature") or "Unknown",
+        "timestamp": str(timestamp),
+        "image": enriched.get("image"),
+        "traits": enriched.get("traits") or [],
+        "collection": enriched.get("collection"),
+        "tags": tags,
+    }
+
+
+def _listing_entry(event: Dict[str, Any], nft: Dict[str, Any]) -> Dict[str, Any]:
+    timestamp = event.get("timestamp") or event.get("time") or _current_time()
+    return {
+        "name": nft.get("name") or "Unknown NFT",
+        "mint": nft.get("mint") or "Unknown",
+        "price": _price_label(nft),
+        "marketplace": nft.get("marketplace") or "Unknown",
+        "seller": nft.get("seller") or "Unknown",
+        "signature": nft.get("signature") or "Unknown",
+        "timestamp": str(timestamp),
+        "image": nft.get("image"),
+        "traits": nft.get("traits") or [],
+        "collection": nft.get("collection"),
+    }
+
+
+def _versioned_response(
+    request: Request, key: str, media_type: str, render: Callable[[], str], max_age: float = RESPONSE_MAX_AGE_SEC
+) -> Response:
+    # Bodies are cached per state version for up to max_age seconds and served with a strong ETag.
+    now = time.monotonic()
+    entry = _response_cache.get(key)
+    if entry is None or entry["version"] != _state_version or now - entry["rendered_at"] >= max_age:
+        body = render().encode("utf-8")
+        # The ETag follows the body, so a re-render that changed nothing still answers 304.
+        etag = f"{_state_epoch}-{_state_version}-{zlib.crc32(body):08x}"
+        if entry is None or entry["etag"] != etag:
+            entry = {"version": _state_version, "etag": etag, "bodies": {"identity": body}}
+            _response_cache[key] = entry
+        entry["rendered_at"] = now
+        _response_stats["renders"] += 1
+        while len(_response_cache) > 64:
+            _response_cache.popitem(last=False)
+    else:
+        _response_stats["hits"] += 1
+    _response_cache.move_to_end(key)
+
+    encoding = _negotiate_encoding(request.headers.get("accept-encoding", ""), len(entry["bodies"]["identity"]))
+    etag = f'"{entry["etag"]}"' if encoding == "identity" else f'"{entry["etag"]}-{encoding}"'
+    headers = {
+        "ETag": etag,
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "no-cache",
+        "X-State-Version": str(entry["version"]),
+    }
+    if _etag_matches(request.headers.get("if-none-match"), entry["etag"]):
+        _response_stats["not_modified"] += 1
+        return Response(status_code=304, headers=headers)
+
+    body = entry["bodies"].get(encoding)
+    if body is None:
+        body = _compress(entry["bodies"]["identity"], encoding)
+        entry["bodies"][encoding] = body
+        _response_stats["compressions"] += 1
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def _negotiate_encoding(accept_encoding: str, size: int) -> str:
+    if size < RESPONSE_COMPRESS_MIN_BYTES:
+        return "identity"
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        if token and params.replace(" ", "") not in {"q=0", "q=0.0", "q=0.00", "q=0.000"}:
+            accepted.add(token)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return "identity"
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        # Proxies may weaken the tag; any encoding of the same version matches.
+        tag = candidate.strip().removeprefix("W/").strip('"')
+        if tag == etag or tag.startswith(f"{etag}-"):
+            return True
+    return False
+
+
+def _render_metrics() -> str:
+    lines: List[str] = []
+    for metric in (
+        _webhook_seconds,
+        _upstream_seconds,
+        _telegram_send_seconds,
+        _event_to_alert_seconds,
+        _event_stage_seconds,
+        _loop_lag_seconds,
+    ):
+        lines.extend(metric.render())
+    for metric in (_dedupe_hits_total, _filter_drops_total, _telegram_errors_total):
+        lines.extend(metric.render())
+
+    lines.extend(
+        _render_metric_family(
+            "geckopulse_events_total",
+            "counter",
+            "Webhook sale/listing events seen and sale alerts recorded.",
+            [({"stage": "seen"}, _sales_seen), ({"stage": "sent"}, _sales_sent)],
+        )
+    )
+    cache_samples = []
+    for name, cache in (("metadata", _metadata_cache), ("offchain", _offchain_cache)):
+        for result, key in (("hit", "hits"), ("disk_hit", "disk_hits"), ("negative_hit", "negative_hits"), ("miss", "misses")):
+            cache_samples.append(({"cache": name, "result": result}, cache.stats[key]))
+    cache_samples.append(({"cache": "rarity", "result": "hit"}, _rarity_stats["hits"]))
+    cache_samples.append(({"cache": "rarity", "result": "miss"}, _rarity_stats["misses"]))
+    lines.extend(
+        _render_metric_family("geckopulse_cache_lookups_total", "counter", "Cache lookups by cache and result.", cache_samples)
+    )
+    lines.extend(
+        _render_metric_family(
+            "geckopulse_cache_evictions_total",
+            "counter",
+            "Entries evicted from in-memory caches.",
+            [({"cache": "metadata"}, _metadata_cache.stats["evictions"]), ({"cache": "offchain"}, _offchain_cache.stats["evictions"])],
+        )
+    )
+    lines.extend(
+        _render_metric_family(
+            "geckopulse_cache_entries",
+            "gauge",
+            "Entries held in memory per cache.",
+            [
+                ({"cache": "metadata"}, len(_metadata_cache.entries)),
+                ({"cache": "offchain"}, len(_offchain_cache.entries)),
+                ({"cache": "rarity"}, len(_rarity_index["ranks"])),
+                ({"cache": "signatures"}, len(_recent_signature_set)),
+            ],
+        )
+    )
+    now = time.time()
+    window_samples = []
+    for label, window in _market_windows.items():
+        window.expire(now)
+        window_samples.append(({"window": label}, window.count))
+    lines.extend(
+        _render_metric_family("geckopulse_market_window_sales", "gauge", "Sales inside each rolling market window.", window_samples)
+    )
+    lines.extend(
+        _render_metric_family(
+            "geckopulse_queue_depth",
+            "gauge",
+            "Items waiting in internal queues.",
+            [
+                ({"queue": "ingest"}, _ingest_depth()),
+                ({"queue": "event_store"}, _event_store_queue.qsize() if _event_store_queue else 0),
+                ({"queue": "coalesce"}, sum(len(batch) for batch in _coalesce_batches.values())),
+                ({"queue": "sweep_buyers"}, len(_buyer_events)),
+            ],
+        )
+    )
+    lines.extend(
+        _render_metric_family(
+            "geckopulse_dedupe_filter",
+            "gauge",
+            "Signature Bloom filters: remembered items, memory and estimated false-positive rate.",
+            [
+                ({"value": "items"}, _signature_filter.items()),
+                ({"value": "memory_bytes"}, _signature_filter.memory_bytes()),
+                ({"value": "fp_rate"}, _signature_filter.fp_rate()),
+            ],
+        )
+    )
+    lines.extend(
+        _render_metric_family(
+            "geckopulse_stream_subscribers", "gauge", "Connected /api/stream clients.", [({}, len(_stream_subscribers))]
+        )
+    )
+    return "\n".join(lines) + "\n"
+
+
+def _start_profile(mode: str, seconds: float) -> None:
+    global _profile_session
+    duration = min(max(seconds, 1.0), PROFILE_MAX_SEC)
+    session: Dict[str, Any] = {"mode": mode, "started_at": time.time(), "duration_sec": duration}
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        # Raises ValueError if another profiler (e.g. a debugger) is already attached.
+        profiler.enable()
+        session["profiler"] = profiler
+    else:
+        sampler = _StackSampler(threading.get_ident(), PROFILE_SAMPLE_INTERVAL_MS / 1000)
+        sampler.start()
+        session["sampler"] = sampler
+    session["timer"] = asyncio.get_running_loop().call_later(duration, _auto_stop_profile, session)
+    _profile_session = session
+    logger.info("Profiling started (%s, auto-stop in %.0fs)", mode, duration)
+
+
+def _auto_stop_profile(session: Dict[str, Any]) -> None:
+    if _profile_session is session:
+        _stop_profile()
+
+
+def _stop_profile() -> str:
+    global _profile_session, _profile_result
+    session = _profile_session
+    if session is None:
+        return ""
+    _profile_session = None
+    session["timer"].cancel()
+    elapsed = time.time() - session["started_at"]
+    stamp = datetime.fromtimestamp(session["started_at"], tz=timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    if session["mode"] == "cprofile":
+        profiler = session["profiler"]
+        profiler.disable()
+        profiler.create_stats()
+        # Same format as pstats.Stats.dump_stats, so snakeviz / flameprof / pstats can load it.
+        # Serialized first: pstats.Stats takes the profiler's stats over.
+        content = marshal.dumps(profiler.stats)
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.strip_dirs().sort_stats("cumulative").print_stats(DIAGNOSTICS_REPORT_LINES)
+        report = f"cProfile over {elapsed:.1f}s\n{stream.getvalue().strip()}"
+        _profile_result = {
+            "content": content,
+            "media_type": "application/octet-stream",
+            "filename": f"geckopulse-{stamp}.pstats",
+            "report": report,
+        }
+    else:
+        sampler = session["sampler"]
+        sampler.stopped.set()
+        sampler.join()
+        report = _sample_report(sampler, elapsed)
+        folded = "".join(f"{stack} {count}\n" for stack, count in sorted(sampler.stacks.items()))
+        _profile_result = {
+            "content": folded.encode("utf-8"),
+            "media_type": "text/plain; charset=utf-8",
+            "filename": f"geckopulse-{stamp}.folded",
+            "report": report,
         }
+    logger.info("Profiling stopped (%s after %.1fs)", session["mode"], elapsed)
+    return report
+
+
+def _sample_report(sampler: _StackSampler, elapsed: float) -> str:
+    own: Dict[str, int] = {}
+    total: Dict[str, int] = {}
+    for stack, count in sampler.stacks.items():
+        frames = stack.split(";")
+        own[frames[-1]] = own.get(frames[-1], 0) + count
+        for name in set(frames):
+            total[name] = total.get(name, 0) + count
+    samples = max(sampler.samples, 1)
+    lines = [
+        f"{sampler.samples} samples every {sampler.interval_sec * 1000:g}ms over {elapsed:.1f}s "
+        "(event-loop thread; idle time shows up under select)",
+        f"{'self':>7} {'total':>7}  function",
+    ]
+    for name, count in sorted(total.items(), key=lambda item: item[1], reverse=True)[:DIAGNOSTICS_REPORT_LINES]:
+        lines.append(f"{own.get(name, 0) / samples:>7.1%} {count / samples:>7.1%}  {name}")
+    return "\n".join(lines)
+
+
+def _take_memory_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        )
     )
 
 
+def _memory_report(snapshot: tracemalloc.Snapshot, previous: Optional[tracemalloc.Snapshot]) -> str:
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [
+        f"traced {current / 1e6:.1f}MB (peak {peak / 1e6:.1f}MB), "
+        f"tracemalloc overhead {tracemalloc.get_tracemalloc_memory() / 1e6:.1f}MB",
+        "entries: " + ", ".join(f"{name}={size}" for name, size in _memory_structures()),
+        "",
+    ]
+    if previous is None:
+        lines.append("Top allocations (take another snapshot to see growth):")
+        for stat in snapshot.statistics("lineno")[:DIAGNOSTICS_REPORT_LINES]:
+            lines.append(str(stat))
+    else:
+        lines.append("Growth since the previous snapshot:")
+        for stat in snapshot.compare_to(previous, "lineno")[:DIAGNOSTICS_REPORT_LINES]:
+            lines.append(str(stat))
+    return "\n".join(lines)
+
+
+def _memory_structures() -> List[Tuple[str, int]]:
+    # The long-lived containers worth watching when memory grows.
+    return [
+        ("metadata_cache", len(_metadata_cache.entries)),
+        ("offchain_cache", len(_offchain_cache.entries)),
+        ("rarity_ranks", len(_rarity_index["ranks"])),
+        ("watch_mints", len(WATCH_MINTS)),
+        ("recent_signatures", len(_recent_signature_set)),
+        ("buyer_counts", len(_buyer_counts)),
+        ("candle_buckets", sum(len(buckets) for buckets in _candles.values())),
+        ("response_cache", len(_response_cache)),
+        ("stream_replay", len(_stream_replay)),
+        ("telegram_chats", len(_telegram_chat_locks)),
+        ("http_hosts", len(_http_host_limits)),
+    ]
+
+
+def _diagnostics_snapshot() -> Dict[str, Any]:
+    session = _profile_session
+    return {
+        "profile_mode": session["mode"] if session else None,
+        "profile_started_at": (
+            datetime.fromtimestamp(session["started_at"], tz=timezone.utc).strftime("%H:%M:%S UTC") if session else None
+        ),
+        "profile_stops_in": int(session["started_at"] + session["duration_sec"] - time.time()) if session else None,
+        "profile_max_sec": int(PROFILE_MAX_SEC),
+        "profile_download": _profile_result["filename"] if _profile_result else None,
+        "tracing": tracemalloc.is_tracing(),
+        "memory_snapshots": len(_memory_snapshots),
+        "loop_lag": {key: value for key, value in _loop_lag_stats.items() if key != "heartbeat"},
+        "loop_lag_warn_ms": LOOP_LAG_WARN_MS,
+        "slow_traces": _slowest_traces(),
+        "traced_events": len(_event_traces),
+    }
+
+
+templates.env.globals["diagnostics"] = _diagnostics_snapshot
+
+
+def _response_snapshot() -> Dict[str, Any]:
+    return {
+        "version": _state_version,
+        "cached": len(_response_cache),
+        "brotli": brotli is not None,
+        **_response_stats,
+    }
+
+
+def _publish_stream(event_type: str, data: Dict[str, Any]) -> None:
+    global _stream_event_id
+
+    _stream_event_id += 1
+    frame = f"id: {_stream_id(_stream_event_id)}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n"
+    _stream_replay.append((_stream_event_id, frame))
+    _stream_stats["published"] += 1
+    for key, queue in list(_stream_subscribers.items()):
+        try:
+            queue.put_nowait((_stream_event_id, frame))
+        except asyncio.QueueFull:
+            # A client this far behind reconnects and resumes from the replay buffer.
+            _stream_subscribers.pop(key, None)
+            _stream_stats["dropped_clients"] += 1
+            _close_stream_queue(queue)
+
+
+def _close_stream_queue(queue: asyncio.Queue) -> None:
+    while True:
+        try:
+            queue.put_nowait(None)
+            return
+        except asyncio.QueueFull:
+            queue.get_nowait()
+
+
+def _close_stream_subscribers() -> None:
+    for queue in list(_stream_subscribers.values()):
+        _close_stream_queue(queue)
+    _stream_subscribers.clear()
+
+
+def _stream_id(event_id: int) -> str:
+    # Ids restart at 0 with the process; the epoch keeps an old Last-Event-ID from matching new events.
+    return f"{_state_epoch}-{event_id}"
+
+
+def _stream_backlog(last_event_id: Optional[str]) -> Optional[List[str]]:
+    # None when the client needs a full snapshot.
+    if not last_event_id:
+        return None
+    epoch, _, number = last_event_id.rpartition("-")
+    if epoch != _state_epoch:
+        return None
+    try:
+        last_id = int(number)
+    except ValueError:
+        return None
+    if last_id > _stream_event_id:
+        return None
+    if last_id == _stream_event_id:
+        return []
+    if not _stream_replay or _stream_replay[0][0] > last_id + 1:
+        return None
+    return [frame for event_id, frame in _stream_replay if event_id > last_id]
+
+
+def _stream_snapshot_frame() -> str:
+    payload = {
+        "stats": _status_snapshot(),
+        "recent_sales": list(_recent_sales),
+        "recent_listings": list(_recent_listings),
+    }
+    return f"id: {_stream_id(_stream_event_id)}\ndata: {json.dumps(payload)}\n\n"
+
+
+def _stream_snapshot() -> Dict[str, Any]:
+    return {
+        "subscribers": len(_stream_subscribers),
+        "last_event_id": _stream_event_id,
+        "replay_size": len(_stream_replay),
+        **_stream_stats,
+    }
+
+
 def _status_snapshot() -> Dict[str, Any]:
     volume_24h, sales_24h = _rolling_volume_24h()
     return {
-        "sales_seen": _sales_seen,
-        "sales_sent": _sales_sent,
-        "last_event_time": _last_event_time or "No sales yet",
+        "sales_seen": _shared_value("sales_seen", _sales_seen),
+        "sales_sent": _shared_value("sales_sent", _sales_sent),
+        "last_event_time": _shared_value("last_event_time", _last_event_time) or "No sales yet",
         "watch_sources": sorted(WATCH_SOURCES),
         "watch_mints_count": len(WATCH_MINTS),
         "mintlist_url": WATCH_MINTLIST_URL or "Not set",
         "volume_24h": volume_24h,
         "sales_24h": sales_24h,
+        "market": _market_snapshot(),
     }
 
 
@@ -674,68 +3667,259 @@ def _config_snapshot() -> Dict[str, Any]:
         "send_listing_alerts": str(SEND_LISTING_ALERTS),
     }
 
-def _enrich_metadata(nft: Dict[str, Any]) -> Dict[str, Any]:
+async def _enrich_metadata(nft: Dict[str, Any]) -> Dict[str, Any]:
     if nft.get("image") or nft.get("traits"):
         return nft
     mint = nft.get("mint")
     if not mint:
         return nft
 
-    cached = _metadata_cache.get(mint)
-    if cached:
-        return {**nft, **cached}
+    found, cached = await _metadata_cache.get(mint)
+    if found:
+        return {**nft, **cached} if cached else nft
 
-    metadata = _fetch_metadata(mint)
+    try:
+        metadata = await _fetch_metadata(mint)
+    except Exception:
+        # The lookup failed rather than came back empty; leave it uncached so the next event retries.
+        return nft
     if metadata:
-        _metadata_cache[mint] = metadata
-        _metadata_cache_order.append(mint)
-        if _metadata_cache_order.maxlen and len(_metadata_cache) > _metadata_cache_order.maxlen:
-            while len(_metadata_cache) > _metadata_cache_order.maxlen:
-                oldest = _metadata_cache_order.popleft()
-                _metadata_cache.pop(oldest, None)
+        await _metadata_cache.set(mint, metadata, _metadata_ttl(metadata))
         return {**nft, **metadata}
+    if HELIUS_API_KEY:
+        await _metadata_cache.set(mint, None)
     return nft
 
 
-def _fetch_metadata(mint: str) -> Dict[str, Any]:
+def _metadata_ttl(metadata: Dict[str, Any]) -> Optional[float]:
+    # Metadata missing its off-chain half is retried as soon as a failed lookup would be.
+    return METADATA_NEGATIVE_TTL_SEC if metadata.get("partial") else None
+
+
+async def _fetch_metadata(mint: str) -> Dict[str, Any]:
     if not HELIUS_API_KEY:
         return {}
 
-    url = f"https://mainnet.helius-rpc.com/?api-key={HELIUS_API_KEY}"
-    payload = json.dumps(
-        {
-            "jsonrpc": "2.0",
-            "id": "1",
-            "method": "getAsset",
-            "params": {"id": mint},
-        }
-    ).encode("utf-8")
-    req = urllib.request.Request(url, data=payload, headers={"Content-Type": "application/json"})
-    try:
-        with urllib.request.urlopen(req, timeout=15) as response:
-            data = json.load(response)
-    except Exception as exc:
-        logger.warning("Failed to fetch metadata for %s: %s", mint, exc)
-        return {}
+    # Single-flight: concurrent lookups for the same mint share one resolution.
+    inflight = _metadata_inflight.get(mint)
+    if inflight is not None:
+        _resolver_stats["coalesced"] += 1
+        return await asyncio.shield(inflight)
 
-    result = (data or {}).get("result") if isinstance(data, dict) else None
+    task = asyncio.ensure_future(_resolve_metadata(mint))
+    _metadata_inflight[mint] = task
+    task.add_done_callback(lambda _: _metadata_inflight.pop(mint, None))
+    return await asyncio.shield(task)
+
+
+async def _resolve_metadata(mint: str) -> Dict[str, Any]:
+    result = await _get_asset(mint)
     if not isinstance(result, dict):
         return {}
+    return await _metadata_from_asset(result)
+
+
+def _get_asset(mint: str) -> "asyncio.Future[Optional[Dict[str, Any]]]":
+    global _asset_batch_timer
+    loop = asyncio.get_running_loop()
+    future: asyncio.Future = loop.create_future()
+    _asset_batch.append((mint, future))
+    if len(_asset_batch) >= METADATA_BATCH_MAX:
+        _flush_asset_batch()
+    elif _asset_batch_timer is None:
+        _asset_batch_timer = loop.call_later(METADATA_BATCH_WINDOW_MS / 1000, _flush_asset_batch)
+    return future
+
+
+def _flush_asset_batch() -> None:
+    global _asset_batch_timer
+    if _asset_batch_timer is not None:
+        _asset_batch_timer.cancel()
+        _asset_batch_timer = None
+    if not _asset_batch:
+        return
+    batch = list(_asset_batch)
+    _asset_batch.clear()
+    _spawn(_run_asset_batch(batch))
+
+
+async def _run_asset_batch(batch: List[Tuple[str, asyncio.Future]]) -> None:
+    ids = list(dict.fromkeys(mint for mint, _ in batch))
+    _resolver_stats["requests"] += 1
+    _resolver_stats["mints"] += len(ids)
+    _resolver_stats["max_batch"] = max(_resolver_stats["max_batch"], len(ids))
+
+    url = f"{HELIUS_RPC_URL}/?api-key={HELIUS_API_KEY}"
+    payload = {
+        "jsonrpc": "2.0",
+        "id": "1",
+        "method": "getAssetBatch",
+        "params": {"ids": ids},
+    }
+    assets: Dict[str, Dict[str, Any]] = {}
+    error: Optional[Exception] = None
+    try:
+        with _upstream_timer("helius_get_asset"):
+            data = await _http_post_json(url, payload)
+        result = (data or {}).get("result") if isinstance(data, dict) else None
+        if not isinstance(result, list):
+            raise ValueError(f"unexpected getAssetBatch response: {str(data)[:200]}")
+        for mint, asset in zip(ids, result):
+            if isinstance(asset, dict):
+                assets[asset.get("id") or mint] = asset
+    except Exception as exc:
+        _resolver_stats["failed"] += 1
+        logger.warning("Failed to fetch metadata for %d mints: %s", len(ids), exc)
+        error = exc
+    except BaseException:
+        # Cancelled (e.g. at shutdown): waiters see a failed lookup instead of hanging.
+        error = RuntimeError("getAssetBatch was cancelled")
+        raise
+    finally:
+        # Callers must be able to tell a failed request from a mint Helius does not know.
+        for mint, future in batch:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(assets.get(mint))
+
+
+async def _prewarm_metadata() -> None:
+    mints = list(WATCH_MINTS)
+    _prewarm_state.update(
+        running=True,
+        total=len(mints),
+        done=0,
+        warmed=0,
+        empty=0,
+        failed=0,
+        started_at=time.time(),
+        finished_at=None,
+    )
+    logger.info("Prewarming metadata for %d mints.", len(mints))
+    semaphore = asyncio.Semaphore(max(1, PREWARM_CONCURRENCY))
+
+    def _count(metadata: Any) -> None:
+        _prewarm_state["warmed" if metadata else "empty"] += 1
+        _prewarm_state["done"] += 1
+
+    async def _warm(mint: str, asset: Optional[Dict[str, Any]]) -> None:
+        metadata: Dict[str, Any] = {}
+        if isinstance(asset, dict):
+            async with semaphore:
+                try:
+                    metadata = await _metadata_from_asset(asset)
+                except Exception as exc:
+                    logger.warning("Prewarm failed for %s: %s", mint, exc)
+                    _prewarm_state["failed"] += 1
+                    _prewarm_state["done"] += 1
+                    return
+        await _metadata_cache.set(mint, metadata or None, _metadata_ttl(metadata))
+        _count(metadata)
+
+    async def _warm_slice(missing: List[str]) -> None:
+        # A failed getAssetBatch is retried with backoff; mints that never resolve stay uncached.
+        for delay in (*_PREWARM_RETRY_DELAYS, None):
+            assets = await asyncio.gather(*(_get_asset(mint) for mint in missing), return_exceptions=True)
+            failed = [mint for mint, asset in zip(missing, assets) if isinstance(asset, Exception)]
+            await asyncio.gather(
+                *(_warm(mint, asset) for mint, asset in zip(missing, assets) if not isinstance(asset, Exception))
+            )
+            if not failed:
+                return
+            if delay is None:
+                _prewarm_state["failed"] += len(failed)
+                _prewarm_state["done"] += len(failed)
+                return
+            missing = failed
+            await asyncio.sleep(delay)
+
+    try:
+        # Each slice of uncached mints is queued at once so the resolver sends it as one
+        # full getAssetBatch call; off-chain JSON fetches are then bounded by the semaphore.
+        for start in range(0, len(mints), METADATA_BATCH_MAX):
+            missing = []
+            for mint in mints[start:start + METADATA_BATCH_MAX]:
+                found, cached = await _metadata_cache.get(mint)
+                if found:
+                    _count(cached)
+                else:
+                    missing.append(mint)
+            if not missing:
+                continue
+            await _warm_slice(missing)
+    finally:
+        _prewarm_state["running"] = False
+        _prewarm_state["finished_at"] = time.time()
+    logger.info(
+        "Prewarm finished: %d warmed, %d without metadata, %d failed in %.1fs.",
+        _prewarm_state["warmed"],
+        _prewarm_state["empty"],
+        _prewarm_state["failed"],
+        _prewarm_state["finished_at"] - _prewarm_state["started_at"],
+    )
+
+
+def _prewarm_snapshot() -> Dict[str, Any]:
+    total = _prewarm_state["total"]
+    started_at = _prewarm_state["started_at"]
+    end = _prewarm_state["finished_at"] or time.time()
+    return {
+        "enabled": PREWARM_METADATA,
+        "running": _prewarm_state["running"],
+        "total": total,
+        "done": _prewarm_state["done"],
+        "warmed": _prewarm_state["warmed"],
+        "empty": _prewarm_state["empty"],
+        "failed": _prewarm_state["failed"],
+        "progress": round(_prewarm_state["done"] / total, 4) if total else 0.0,
+        "elapsed_sec": round(end - started_at, 1) if started_at else 0.0,
+    }
 
-    content = result.get("content") or {}
-    name = (result.get("content") or {}).get("metadata", {}).get("name") or content.get("metadata", {}).get("name")
-    image = _extract_image_from_content(content)
-    traits, collection = _extract_offchain_traits(content)
 
+def _resolver_snapshot() -> Dict[str, Any]:
+    requests = _resolver_stats["requests"]
     return {
+        "batch_window_ms": METADATA_BATCH_WINDOW_MS,
+        "batch_max": METADATA_BATCH_MAX,
+        "requests": requests,
+        "mints": _resolver_stats["mints"],
+        "avg_batch": round(_resolver_stats["mints"] / requests, 2) if requests else 0.0,
+        "max_batch": _resolver_stats["max_batch"],
+        "coalesced": _resolver_stats["coalesced"],
+        "failed": _resolver_stats["failed"],
+        "inflight": len(_metadata_inflight),
+    }
+
+
+async def _metadata_from_asset(result: Dict[str, Any]) -> Dict[str, Any]:
+    content = result.get("content") or {}
+    name = (result.get("content") or {}).get("metadata", {}).get("name") or content.get("metadata", {}).get("name")
+    # The off-chain document is fetched once here and shared by the image and trait extractors.
+    partial = False
+    try:
+        offchain = await _fetch_offchain_json(content.get("json_uri"))
+    except Exception:
+        offchain, partial = None, True
+    image = _extract_image_from_content(content, offchain)
+    traits, collection, attributes = _extract_offchain_traits(offchain)
+    onchain_attributes = _attribute_pairs((content.get("metadata") or {}).get("attributes"))
+
+    metadata = {
         "name": name,
         "image": image,
         "traits": traits,
         "collection": collection,
+        "attributes": onchain_attributes or attributes,
     }
+    if partial:
+        metadata["partial"] = True
+    return metadata
 
 
-def _extract_image_from_content(content: Dict[str, Any]) -> Optional[str]:
+def _extract_image_from_content(content: Dict[str, Any], offchain: Optional[Dict[str, Any]]) -> Optional[str]:
     links = content.get("links") or {}
     image = links.get("image") if isinstance(links, dict) else None
 
@@ -749,55 +3933,149 @@ def _extract_image_from_content(content: Dict[str, Any]) -> Optional[str]:
 
     image = _normalize_image_url(image)
 
-    if not image:
-        json_uri = content.get("json_uri")
-        json_uri = _normalize_image_url(json_uri)
-        if json_uri:
-            try:
-                with urllib.request.urlopen(json_uri, timeout=15) as response:
-                    offchain = json.load(response)
-                image = _normalize_image_url(offchain.get("image") or offchain.get("image_url"))
-            except Exception as exc:
-                logger.warning("Failed to fetch offchain JSON %s: %s", json_uri, exc)
-                return None
+    if not image and offchain:
+        image = _normalize_image_url(offchain.get("image") or offchain.get("image_url"))
     return image
 
 
-def _extract_offchain_traits(content: Dict[str, Any]) -> Tuple[List[str], Optional[str]]:
-    json_uri = content.get("json_uri")
+def _extract_offchain_traits(offchain: Optional[Dict[str, Any]]) -> Tuple[List[str], Optional[str], List[List[str]]]:
+    if not offchain:
+        return [], None, []
+
+    attributes = _attribute_pairs(offchain.get("attributes"))
+    traits = [f"{trait_type}: {value}" for trait_type, value in attributes[:4]]
+
+    collection = offchain.get("collection", {}).get("name") if isinstance(offchain.get("collection"), dict) else offchain.get("collection")
+    return traits, collection, attributes
+
+
+async def _fetch_offchain_json(json_uri: Optional[str]) -> Optional[Dict[str, Any]]:
     json_uri = _normalize_image_url(json_uri)
     if not json_uri:
-        return [], None
+        return None
+
+    address = _content_address(json_uri)
+    key = ":".join(address) if address else json_uri
+    # Content-addressed documents are immutable, so they are cached by CID / Arweave tx id.
+    if address:
+        found, cached = await _offchain_cache.get(key)
+        if found:
+            return cached
+
+    inflight = _offchain_inflight.get(key)
+    if inflight is not None:
+        return await asyncio.shield(inflight)
+
+    task = asyncio.ensure_future(_load_offchain_json(json_uri, key, address is not None))
+    _offchain_inflight[key] = task
+    task.add_done_callback(lambda _: _offchain_inflight.pop(key, None))
+    return await asyncio.shield(task)
+
 
+async def _load_offchain_json(json_uri: str, key: str, cacheable: bool) -> Optional[Dict[str, Any]]:
+    _offchain_stats["fetches"] += 1
     try:
-        with urllib.request.urlopen(json_uri, timeout=15) as response:
-            offchain = json.load(response)
+        with _upstream_timer("offchain_json"):
+            offchain = await _hedged_get_json(_gateway_urls(json_uri))
     except Exception as exc:
-        logger.warning("Failed to fetch traits from %s: %s", json_uri, exc)
-        return [], None
-
-    traits = []
-    attributes = offchain.get("attributes") or []
-    if isinstance(attributes, list):
-        for attr in attributes[:4]:
-            if not isinstance(attr, dict):
-                continue
-            trait_type = attr.get("trait_type") or attr.get("type")
-            value = attr.get("value")
-            if trait_type and value is not None:
-                traits.append(f"{trait_type}: {value}")
+        _offchain_stats["failed"] += 1
+        logger.warning("Failed to fetch offchain JSON %s: %s", json_uri, exc)
+        raise
+    if cacheable:
+        await _offchain_cache.set(key, offchain)
+    return offchain
+
+
+async def _hedged_get_json(urls: List[str]) -> Dict[str, Any]:
+    # Start on the first gateway and add the next one whenever the current leaders have not
+    # answered within the hedge delay; the first valid JSON object wins and the rest are cancelled.
+    pending: set = set()
+    started: Dict[asyncio.Future, str] = {}
+    last_error: Optional[BaseException] = None
+    remaining = list(urls)
+    try:
+        while remaining or pending:
+            if remaining:
+                url = remaining.pop(0)
+                task = asyncio.ensure_future(_http_get_json(url))
+                started[task] = url
+                pending.add(task)
+                if len(started) > 1:
+                    _offchain_stats["hedges"] += 1
+            timeout = OFFCHAIN_HEDGE_DELAY_MS / 1000 if remaining else None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    last_error = task.exception()
+                    continue
+                result = task.result()
+                if isinstance(result, dict):
+                    host = httpx.URL(started[task]).host
+                    _offchain_wins[host] = _offchain_wins.get(host, 0) + 1
+                    return result
+                last_error = ValueError(f"unexpected JSON from {started[task]}")
+    finally:
+        for task in pending:
+            task.cancel()
+    raise last_error or ValueError("no gateways configured")
+
+
+def _content_address(url: str) -> Optional[Tuple[str, str]]:
+    parsed = urlsplit(url)
+    suffix = f"?{parsed.query}" if parsed.query else ""
+    if "/ipfs/" in parsed.path:
+        return "ipfs", parsed.path.split("/ipfs/", 1)[1] + suffix
+    if ".ipfs." in parsed.netloc:
+        return "ipfs", parsed.netloc.split(".ipfs.", 1)[0] + parsed.path + suffix
+    if parsed.netloc in _arweave_hosts and parsed.path.strip("/"):
+        return "ar", parsed.path.lstrip("/") + suffix
+    return None
+
+
+def _gateway_urls(url: str) -> List[str]:
+    address = _content_address(url)
+    if address is None:
+        return [url]
+    kind, path = address
+    gateways = IPFS_GATEWAYS if kind == "ipfs" else ARWEAVE_GATEWAYS
+    return [gateway.rstrip("/") + "/" + path for gateway in gateways] or [url]
+
+
+def _offchain_snapshot() -> Dict[str, Any]:
+    return {
+        "fetches": _offchain_stats["fetches"],
+        "failed": _offchain_stats["failed"],
+        "hedges": _offchain_stats["hedges"],
+        "hedge_delay_ms": OFFCHAIN_HEDGE_DELAY_MS,
+        "gateway_wins": dict(_offchain_wins),
+        "cache": _offchain_cache.snapshot(),
+    }
 
-    collection = offchain.get("collection", {}).get("name") if isinstance(offchain.get("collection"), dict) else offchain.get("collection")
-    return traits, collection
+
+def _attribute_pairs(attributes: Any) -> List[List[str]]:
+    pairs: List[List[str]] = []
+    if not isinstance(attributes, list):
+        return pairs
+    for attr in attributes:
+        if not isinstance(attr, dict):
+            continue
+        trait_type = attr.get("trait_type") or attr.get("type")
+        value = attr.get("value")
+        if trait_type and value is not None:
+            pairs.append([str(trait_type), str(value)])
+    return pairs
 
 
 def _normalize_image_url(url: Optional[str]) -> Optional[str]:
     if not url:
         return None
     if url.startswith("ipfs://"):
-        return "https://ipfs.io/ipfs/" + url.replace("ipfs://", "").lstrip("/")
+        path = url.replace("ipfs://", "").lstrip("/")
+        if path.startswith("ipfs/"):
+            path = path[len("ipfs/"):]
+        return IPFS_GATEWAYS[0].rstrip("/") + "/" + path
     if url.startswith("ar://"):
-        return "https://arweave.net/" + url.replace("ar://", "").lstrip("/")
+        return ARWEAVE_GATEWAYS[0].rstrip("/") + "/" + url.replace("ar://", "").lstrip("/")
     return url
 
 
@@ -813,6 +4091,18 @@ def _shorten(value: str, left: int = 4, right: int = 4) -> str:
     return f"{value[:left]}…{value[-right:]}"
 
 
+def _format_sol(amount_lamports: Any) -> str:
+    if isinstance(amount_lamports, (int, float)):
+        return f"{amount_lamports / LAMPORTS_PER_SOL:.4f} SOL"
+    return "Unknown price"
+
+
+def _solscan_account_url(address: str) -> str:
+    if not address or address.startswith("Unknown"):
+        return "https://solscan.io/"
+    return f"https://solscan.io/account/{address}"
+
+
 def _tensor_url(mint: str) -> str:
     if not mint or mint.startswith("Unknown"):
         return "https://www.tensor.trade/"
@@ -827,67 +4117,246 @@ def _solscan_url(mint: str, signature: str) -> str:
     return "https://solscan.io/"
 
 
-def _floor_snapshot() -> Dict[str, Any]:
-    global _floor_cache_time, _floor_cache
-    if not TENSOR_COLLECTION_ID:
+def _floor_snapshot(collection_id: Optional[str] = None) -> Dict[str, Any]:
+    # Never touches the network: returns the last value the background refresher stored.
+    collection_id = collection_id or TENSOR_COLLECTION_ID
+    if not collection_id:
+        return {}
+    state = _floor_state.get(collection_id)
+    if not state or state["price_sol"] is None:
         return {}
-    now = datetime.now(timezone.utc).timestamp()
-    if _floor_cache_time and now - _floor_cache_time < 60 and _floor_cache:
-        return _floor_cache
+    return {
+        "price_sol": state["price_sol"],
+        "raw": state["raw"],
+        "age_sec": time.time() - state["updated_at"],
+    }
+
+
+def _floor_collections() -> List[str]:
+    return list(dict.fromkeys(c for c in [TENSOR_COLLECTION_ID, *TENSOR_COLLECTION_IDS] if c))
+
+
+def _ensure_floor_refresher() -> None:
+    global _floor_task
+    if not _floor_collections() or (_floor_task is not None and not _floor_task.done()):
+        return
+    _floor_task = _spawn(_floor_refresher())
+
+
+async def _floor_refresher() -> None:
+    while True:
+        now = time.time()
+        due = [c for c in _floor_collections() if _floor_state.get(c, {}).get("next_refresh", 0) <= now]
+        if due:
+            await asyncio.gather(*(_refresh_floor(c) for c in due))
+        await asyncio.sleep(1)
+
 
-    url = f"https://api.tensor.so/sol/collections/{TENSOR_COLLECTION_ID}/floor"
+async def _refresh_floor(collection_id: str) -> None:
+    state = _floor_state.setdefault(
+        collection_id,
+        {"price_sol": None, "raw": None, "updated_at": None, "failures": 0, "last_error": None, "next_refresh": 0.0},
+    )
+    url = f"{TENSOR_API_URL}/sol/collections/{collection_id}/floor"
     try:
-        with urllib.request.urlopen(url, timeout=15) as response:
-            data = json.load(response)
+        with _upstream_timer("tensor_floor"):
+            data = await _http_get_json(url)
+        price_lamports = data.get("price") if isinstance(data, dict) else None
+        if not isinstance(price_lamports, (int, float)):
+            raise ValueError("response has no price")
     except Exception as exc:
-        logger.warning("Failed to fetch Tensor floor: %s", exc)
-        return {}
+        state["failures"] += 1
+        state["last_error"] = str(exc)
+        backoff = min(FLOOR_MAX_BACKOFF_SEC, FLOOR_REFRESH_SEC * 2 ** state["failures"])
+        state["next_refresh"] = time.time() + backoff
+        logger.warning("Failed to fetch Tensor floor for %s: %s (retry in %.0fs)", collection_id, exc, backoff)
+        return
 
-    price_lamports = data.get("price") if isinstance(data, dict) else None
-    if not isinstance(price_lamports, (int, float)):
-        return {}
+    now = time.time()
+    state.update(
+        price_sol=price_lamports / LAMPORTS_PER_SOL,
+        raw=data,
+        updated_at=now,
+        failures=0,
+        last_error=None,
+        next_refresh=now + FLOOR_REFRESH_SEC,
+    )
+    _bump_state_version()
 
-    _floor_cache = {
-        "price_sol": price_lamports / LAMPORTS_PER_SOL,
-        "raw": data,
-    }
-    _floor_cache_time = now
-    return _floor_cache
+
+def _floors_snapshot() -> Dict[str, Any]:
+    now = time.time()
+    floors = {}
+    for collection_id in _floor_collections():
+        state = _floor_state.get(collection_id) or {}
+        updated_at = state.get("updated_at")
+        age = now - updated_at if updated_at else None
+        floors[collection_id] = {
+            "price_sol": state.get("price_sol"),
+            "age_sec": round(age, 1) if age is not None else None,
+            "stale": age is None or age > FLOOR_REFRESH_SEC * 3,
+            "failures": state.get("failures", 0),
+            "last_error": state.get("last_error"),
+        }
+    return {"refresh_sec": FLOOR_REFRESH_SEC, "collections": floors}
 
 
 def _rarity_snapshot(mint: str) -> Dict[str, Any]:
-    if not HOWRARE_API_KEY or not mint or mint.startswith("Unknown"):
+    if not mint or mint.startswith("Unknown"):
         return {}
-    now = time.time()
-    cached = _rarity_cache.get(mint)
-    if cached and now - _rarity_cache_time.get(mint, 0) < 3600:
-        return cached
-
-    url = f"https://api.howrare.is/v0.1/rarity/{mint}"
-    req = urllib.request.Request(url, headers={"X-HOWRARE-API-KEY": HOWRARE_API_KEY})
-    try:
-        with urllib.request.urlopen(req, timeout=15) as response:
-            data = json.load(response)
-    except Exception as exc:
-        logger.warning("Failed to fetch rarity for %s: %s", mint, exc)
+    index = _rarity_index
+    rank = index["ranks"].get(mint)
+    # A partial trait index would rank against part of the collection; show no badge until it is whole.
+    if not rank or not index["total"] or not index["complete"]:
+        _rarity_stats["misses"] += 1
         return {}
+    _rarity_stats["hits"] += 1
+    return {
+        "rank": rank,
+        "percentile": rank / index["total"] * 100,
+    }
+
+
+def _rarity_enabled() -> bool:
+    return RARITY_SOURCE == "traits" or bool(HOWRARE_API_KEY)
+
+
+def _ensure_rarity_refresher() -> None:
+    global _rarity_task
+    if not _rarity_enabled() or (_rarity_task is not None and not _rarity_task.done()):
+        return
+    _rarity_task = _spawn(_rarity_refresher())
+
+
+async def _rarity_refresher() -> None:
+    row = await asyncio.to_thread(_cache_db_get, "rarity", RARITY_SOURCE)
+    if row is not None:
+        stored = json.loads(row[0])
+        _publish_rarity_index(stored.get("ranks") or {}, stored.get("updated_at"), stored.get("complete", True))
+    updated_at = _rarity_index["updated_at"] or 0
+    delay = max(0.0, updated_at + RARITY_REFRESH_SEC - time.time()) if _rarity_index["complete"] else 0.0
+    retry = min(RARITY_REFRESH_SEC, 300)
+    while True:
+        if delay:
+            await asyncio.sleep(delay)
+        try:
+            complete = await _refresh_rarity_index()
+        except Exception as exc:
+            _rarity_state["last_error"] = str(exc)
+            logger.warning("Failed to refresh rarity index: %s", exc)
+            complete = False
+        if complete:
+            delay, retry = RARITY_REFRESH_SEC, min(RARITY_REFRESH_SEC, 300)
+        else:
+            # Back off while the index stays incomplete, up to the normal refresh interval.
+            delay, retry = retry, min(retry * 2, RARITY_REFRESH_SEC)
+
 
+async def _refresh_rarity_index() -> bool:
+    _rarity_state["loading"] = True
+    try:
+        if RARITY_SOURCE == "traits":
+            # Local scoring needs the collection's traits, so let the metadata prewarm finish first.
+            while _prewarm_state["running"]:
+                await asyncio.sleep(5)
+            ranks, coverage = await asyncio.to_thread(_rank_by_trait_rarity)
+        else:
+            ranks, coverage = await _fetch_howrare_ranks(), 1.0
+    finally:
+        _rarity_state["loading"] = False
+    previous, _rarity_state["coverage"] = _rarity_state["coverage"], round(coverage, 4)
+    complete = coverage >= RARITY_MIN_COVERAGE
+    if not complete and _rarity_state["coverage"] != previous:
+        logger.warning(
+            "Trait rarity covers %.1f%% of the resolved mints (need %.1f%%); rarity badges stay off until more traits are cached.",
+            coverage * 100,
+            RARITY_MIN_COVERAGE * 100,
+        )
+    if not ranks:
+        raise ValueError(f"no ranks from {RARITY_SOURCE}")
+
+    updated_at = time.time()
+    _publish_rarity_index(ranks, updated_at, complete)
+    _rarity_state["last_error"] = None
+    payload = json.dumps({"ranks": ranks, "updated_at": updated_at, "complete": complete})
+    await asyncio.to_thread(_cache_db_put, "rarity", RARITY_SOURCE, payload, updated_at + RARITY_REFRESH_SEC * 4)
+    logger.info("Rarity index refreshed from %s: %d ranked mints.", RARITY_SOURCE, len(ranks))
+    return complete
+
+
+def _publish_rarity_index(ranks: Dict[str, int], updated_at: Optional[float], complete: bool = True) -> None:
+    global _rarity_index
+    total = max([len(ranks), *ranks.values()]) if ranks else 0
+    # Swap in a whole new dict so readers never see a half-built index.
+    _rarity_index = {"ranks": ranks, "total": total, "updated_at": updated_at, "complete": complete}
+    _bump_state_version()
+
+
+async def _fetch_howrare_ranks() -> Dict[str, int]:
+    url = f"{HOWRARE_API_URL}/v0.1/collections/{HOWRARE_COLLECTION}"
+    headers = {"X-HOWRARE-API-KEY": HOWRARE_API_KEY} if HOWRARE_API_KEY else None
+    with _upstream_timer("howrare"):
+        data = await _http_get_json(url, headers=headers, timeout=max(HTTP_TIMEOUT_SEC, 60))
     result = (data or {}).get("result", {}) if isinstance(data, dict) else {}
-    info = result.get("data") if isinstance(result, dict) else {}
-    if not info:
-        return {}
+    info = result.get("data") if isinstance(result, dict) else None
+    items = info.get("items") if isinstance(info, dict) else info
+    ranks: Dict[str, int] = {}
+    for item in items or []:
+        if not isinstance(item, dict):
+            continue
+        mint = item.get("mint")
+        rank = item.get("rank")
+        if mint and isinstance(rank, (int, float)):
+            ranks[str(mint)] = int(rank)
+    return ranks
+
+
+def _rank_by_trait_rarity() -> Tuple[Dict[str, int], float]:
+    collection: Dict[str, List[Tuple[str, str]]] = {}
+    resolved = 0
+    for mint, value in _cache_db_items("metadata"):
+        # Coverage is measured against mints whose metadata resolved; failed and partial lookups do not count.
+        if not value or value.get("partial") or mint not in WATCH_MINTS:
+            continue
+        resolved += 1
+        attributes = value.get("attributes") or []
+        if attributes:
+            collection[mint] = [(str(t), str(v)) for t, v in attributes]
+    total = len(collection)
+    # Without a watchlist the size of the collection is unknown, so the index never counts as complete.
+    coverage = total / resolved if WATCH_MINTS and resolved else 0.0
+    if not total:
+        return {}, coverage
+
+    counts: Dict[Tuple[str, str], int] = {}
+    for attributes in collection.values():
+        # Trait count is scored like any other trait, as the common statistical rarity tools do.
+        for pair in attributes + [("#traits", str(len(attributes)))]:
+            counts[pair] = counts.get(pair, 0) + 1
+
+    # Information-content scoring: a trait held by n of N mints contributes log2(N / n).
+    weights = {pair: math.log2(total / count) for pair, count in counts.items()}
+    scores = {
+        mint: sum(weights[pair] for pair in attributes + [("#traits", str(len(attributes)))])
+        for mint, attributes in collection.items()
+    }
+    ordered = sorted(scores, key=lambda mint: (-scores[mint], mint))
+    return {mint: position + 1 for position, mint in enumerate(ordered)}, coverage
 
-    rank = info.get("rank")
-    total = len(WATCH_MINTS) if WATCH_MINTS else 10000
-    percentile = (rank / total) * 100 if isinstance(rank, (int, float)) and total else None
 
-    rarity = {
-        "rank": rank,
-        "percentile": percentile or 0,
+def _rarity_index_snapshot() -> Dict[str, Any]:
+    updated_at = _rarity_index["updated_at"]
+    return {
+        "enabled": _rarity_enabled(),
+        "source": RARITY_SOURCE,
+        "ranked": len(_rarity_index["ranks"]),
+        "total": _rarity_index["total"],
+        "complete": _rarity_index["complete"],
+        "coverage": _rarity_state["coverage"],
+        "age_sec": round(time.time() - updated_at, 1) if updated_at else None,
+        "loading": _rarity_state["loading"],
+        "last_error": _rarity_state["last_error"],
     }
-    _rarity_cache[mint] = rarity
-    _rarity_cache_time[mint] = now
-    return rarity
 
 
 def _sale_tags(amount_lamports: Optional[float], floor_info: Dict[str, Any], buyer: Optional[str]) -> List[str]:
@@ -914,30 +4383,178 @@ def _sale_tags(amount_lamports: Optional[float], floor_info: Dict[str, Any], buy
 def _detect_sweep(buyer: Optional[str]) -> int:
     if not buyer:
         return 0
-    now = time.time()
-    cutoff = now - SWEEP_WINDOW_SEC
-    count = 0
-    for ts, _, b in _sales_window:
-        if ts >= cutoff and b == buyer:
-            count += 1
+    _expire_buyer_counts(time.time())
+    count = _buyer_counts.get(buyer, 0)
     return count if count >= SWEEP_COUNT else 0
 
 
-def _prune_sales_window() -> None:
-    cutoff = time.time() - 86400
-    while _sales_window and _sales_window[0][0] < cutoff:
-        _sales_window.popleft()
+def _record_market_sale(event_ts: float, price_sol: float, buyer: str) -> None:
+    now = time.time()
+    for window in _market_windows.values():
+        window.add(event_ts, price_sol, now)
+    if buyer and event_ts >= now - SWEEP_WINDOW_SEC:
+        _buyer_events.append((event_ts, buyer))
+        _buyer_counts[buyer] = _buyer_counts.get(buyer, 0) + 1
+
+
+def _expire_buyer_counts(now: float) -> None:
+    cutoff = now - SWEEP_WINDOW_SEC
+    while _buyer_events and _buyer_events[0][0] < cutoff:
+        _, buyer = _buyer_events.popleft()
+        remaining = _buyer_counts.get(buyer, 0) - 1
+        if remaining > 0:
+            _buyer_counts[buyer] = remaining
+        else:
+            _buyer_counts.pop(buyer, None)
 
 
 def _rolling_volume_24h() -> Tuple[float, int]:
-    cutoff = time.time() - 86400
-    total = 0.0
+    window = _market_windows["24h"]
+    window.expire(time.time())
+    return round(window.volume, 2), window.count
+
+
+def _record_candle(candles: Dict[Tuple[str, str], Dict[int, List[float]]], ts: float, price: float, marketplace: str) -> None:
+    for resolution, (step, keep) in CANDLE_RESOLUTIONS.items():
+        bucket = int(ts // step) * step
+        for market in ("all", marketplace):
+            series = candles.setdefault((resolution, market), {})
+            candle = series.get(bucket)
+            if candle is None:
+                series[bucket] = [ts, price, price, price, price, ts, price, 1]
+                if len(series) > keep + 64:
+                    _prune_candles(series, step, keep)
+                continue
+            # Sales can arrive out of order, so open/close follow event time, not arrival.
+            if ts < candle[0]:
+                candle[0], candle[1] = ts, price
+            if ts >= candle[5]:
+                candle[5], candle[4] = ts, price
+            candle[2] = max(candle[2], price)
+            candle[3] = min(candle[3], price)
+            candle[6] += price
+            candle[7] += 1
+
+
+def _merge_candles(
+    target: Dict[Tuple[str, str], Dict[int, List[float]]], source: Dict[Tuple[str, str], Dict[int, List[float]]]
+) -> None:
+    for key, series in source.items():
+        live = target.setdefault(key, {})
+        for bucket, candle in series.items():
+            current = live.get(bucket)
+            if current is None:
+                live[bucket] = candle
+                continue
+            if candle[0] < current[0]:
+                current[0], current[1] = candle[0], candle[1]
+            if candle[5] > current[5]:
+                current[5], current[4] = candle[5], candle[4]
+            current[2] = max(current[2], candle[2])
+            current[3] = min(current[3], candle[3])
+            current[6] += candle[6]
+            current[7] += candle[7]
+        step, keep = CANDLE_RESOLUTIONS[key[0]]
+        _prune_candles(live, step, keep)
+
+
+def _prune_candles(series: Dict[int, List[float]], step: int, keep: int) -> None:
+    oldest = max(series) - (keep - 1) * step
+    for bucket in [bucket for bucket in series if bucket < oldest]:
+        del series[bucket]
+
+
+def _candle_arrays(resolution: str, marketplace: str, first: int, last: int) -> Dict[str, Any]:
+    step, _ = CANDLE_RESOLUTIONS[resolution]
+    series = _candles.get((resolution, marketplace), {})
+    arrays: Dict[str, List[float]] = {"t": [], "o": [], "h": [], "l": [], "c": [], "v": [], "n": []}
+    for bucket in range(first, last + step, step):
+        candle = series.get(bucket)
+        if candle is None:
+            continue
+        arrays["t"].append(bucket)
+        arrays["o"].append(round(candle[1], 6))
+        arrays["h"].append(round(candle[2], 6))
+        arrays["l"].append(round(candle[3], 6))
+        arrays["c"].append(round(candle[4], 6))
+        arrays["v"].append(round(candle[6], 6))
+        arrays["n"].append(candle[7])
+    return {"resolution": resolution, "marketplace": marketplace, "step": step, **arrays}
+
+
+async def _rebuild_candles(max_id: int) -> None:
+    _candle_state["rebuilding"] = True
+    try:
+        rebuilt, count = await asyncio.to_thread(_load_candles, max_id)
+    except sqlite3.Error as exc:
+        logger.warning("Failed to rebuild candles from the event store: %s", exc)
+        return
+    finally:
+        _candle_state["rebuilding"] = False
+    _merge_candles(_candles, rebuilt)
+    _candle_state["rebuilt_sales"] = count
+    _bump_state_version()
+    logger.info("Rebuilt candles from %d stored sales.", count)
+
+
+async def _rebuild_market_windows(max_id: int) -> None:
+    try:
+        rows = await asyncio.to_thread(_load_market_sales, max_id)
+    except sqlite3.Error as exc:
+        logger.warning("Failed to rebuild market windows from the event store: %s", exc)
+        return
+    for ts, price_sol, buyer in rows:
+        _record_market_sale(ts, price_sol, buyer or "")
+    logger.info("Replayed %d stored sales into the market windows.", len(rows))
+
+
+def _load_market_sales(max_id: int) -> List[Tuple[float, float, Optional[str]]]:
+    since = time.time() - max(window.span_sec for window in _market_windows.values())
+    # A private connection so the scan does not hold up the event writer.
+    conn = sqlite3.connect(str(EVENTS_DB_PATH))
+    try:
+        # In time order, so the rings and the sweep counters are filled the way live sales fill them.
+        return conn.execute(
+            "SELECT ts, price_sol, buyer FROM sales WHERE ts >= ? AND id <= ? AND price_sol IS NOT NULL ORDER BY ts",
+            (since, max_id),
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def _load_candles(max_id: int) -> Tuple[Dict[Tuple[str, str], Dict[int, List[float]]], int]:
+    since = time.time() - max(step * keep for step, keep in CANDLE_RESOLUTIONS.values())
+    candles: Dict[Tuple[str, str], Dict[int, List[float]]] = {}
     count = 0
-    for ts, price, _ in _sales_window:
-        if ts >= cutoff:
-            total += price
+    # A private connection so the scan does not hold up the event writer.
+    conn = sqlite3.connect(str(EVENTS_DB_PATH))
+    try:
+        rows = conn.execute(
+            "SELECT ts, price_sol, marketplace FROM sales WHERE ts >= ? AND id <= ? AND price_sol IS NOT NULL",
+            (since, max_id),
+        )
+        for ts, price_sol, marketplace in rows:
+            _record_candle(candles, ts, price_sol, marketplace or "Unknown")
             count += 1
-    return round(total, 2), count
+    finally:
+        conn.close()
+    return candles, count
+
+
+def _market_snapshot() -> Dict[str, Any]:
+    now = time.time()
+    snapshot = {}
+    for label, window in _market_windows.items():
+        window.expire(now)
+        median = window.quantile(0.5)
+        p90 = window.quantile(0.9)
+        snapshot[label] = {
+            "volume": round(window.volume, 2),
+            "sales": window.count,
+            "median": round(median, 4) if median is not None else None,
+            "p90": round(p90, 4) if p90 is not None else None,
+        }
+    return snapshot
 
 
 def _parse_event_time(value: Any) -> float:
@@ -953,7 +4570,7 @@ def _parse_event_time(value: Any) -> float:
 
 
 def _fake_sale() -> Tuple[Dict[str, Any], Dict[str, Any]]:
-    mint = next(iter(sorted(WATCH_MINTS)), "SimMint111111111111111111111111111111111")
+    mint = next(iter(WATCH_MINTS), "SimMint111111111111111111111111111111111")
     timestamp = _current_time()
     event = {
         "type": "NFT_SALE",
@@ -980,7 +4597,7 @@ def _fake_sale() -> Tuple[Dict[str, Any], Dict[str, Any]]:
 
 
 def _fake_listing() -> Tuple[Dict[str, Any], Dict[str, Any]]:
-    mint = next(iter(sorted(WATCH_MINTS)), "SimMint111111111111111111111111111111111")
+    mint = next(iter(WATCH_MINTS), "SimMint111111111111111111111111111111111")
     timestamp = _current_time()
     event = {
         "type": "NFT_LISTING",
@@ -1036,6 +4653,12 @@ async def _apply_runtime_updates(updates: Dict[str, str]) -> None:
     HELIUS_API_KEY = updates.get("HELIUS_API_KEY", HELIUS_API_KEY) or HELIUS_API_KEY
     TENSOR_COLLECTION_ID = updates.get("TENSOR_COLLECTION_ID", TENSOR_COLLECTION_ID) or TENSOR_COLLECTION_ID
     HOWRARE_API_KEY = updates.get("HOWRARE_API_KEY", HOWRARE_API_KEY) or HOWRARE_API_KEY
+    if "TELEGRAM_BOT_TOKEN" in updates:
+        await _start_bot()
+    if "HOWRARE_API_KEY" in updates:
+        _ensure_rarity_refresher()
+    if "TENSOR_COLLECTION_ID" in updates:
+        _ensure_floor_refresher()
     if "SEND_LISTING_ALERTS" in updates:
         SEND_LISTING_ALERTS = updates.get("SEND_LISTING_ALERTS", "").strip().lower() in {"1", "true", "yes"}
 
@@ -1047,6 +4670,11 @@ async def _apply_runtime_updates(updates: Dict[str, str]) -> None:
     watch_mintlist_url = updates.get("WATCH_MINTLIST_URL")
     if watch_mintlist_url is not None:
         WATCH_MINTLIST_URL = watch_mintlist_url.strip()
-        WATCH_MINTS = set(_parse_csv(os.getenv("WATCH_MINTS", "")))
         if WATCH_MINTLIST_URL:
-            await _load_mintlist(WATCH_MINTLIST_URL)
+            # The current list keeps filtering until the new one has been downloaded and swapped in.
+            _spawn(_load_mintlist(WATCH_MINTLIST_URL))
+            _ensure_mintlist_refresher()
+        else:
+            WATCH_MINTS = _MintIndex.from_mints(_parse_csv(os.getenv("WATCH_MINTS", "")))
+            _mintlist_state.update(url=None, source=None, listed=0, invalid=0, validators={})
+    _bump_state_version()
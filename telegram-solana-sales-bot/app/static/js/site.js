@@ -34,33 +34,34 @@ countEls.forEach(el => {
 const salesChartCanvas = document.getElementById('salesChart');
 let salesChart;
 
-const parsePrice = price => {
-  if (!price) return null;
-  const match = price.match(/([0-9.]+)/);
-  return match ? parseFloat(match[1]) : null;
-};
+const CANDLE_RESOLUTION = '1h';
+const CANDLE_RANGE_SEC = 14 * 24 * 3600;
 
-const buildChartData = sales => {
-  const sorted = [...sales].reverse();
-  const labels = sorted.map(item => item.timestamp);
-  const data = sorted.map(item => parsePrice(item.price));
-  return { labels, data };
-};
+const formatBucket = t =>
+  new Date(t * 1000).toLocaleString(undefined, { month: 'short', day: 'numeric', hour: '2-digit', minute: '2-digit' });
 
-const renderSalesChart = sales => {
+const renderSalesChart = candles => {
   if (!salesChartCanvas || typeof Chart === 'undefined') return;
-  const { labels, data } = buildChartData(sales);
   const chartData = {
-    labels,
+    labels: candles.t.map(formatBucket),
     datasets: [
       {
-        label: 'Sale price (SOL)',
-        data,
+        type: 'line',
+        label: `Close price (SOL, ${candles.resolution})`,
+        data: candles.c,
         borderColor: '#f6c067',
         backgroundColor: 'rgba(246, 192, 103, 0.2)',
         tension: 0.32,
         fill: true,
         pointRadius: 3,
+        yAxisID: 'y',
+      },
+      {
+        type: 'bar',
+        label: 'Volume (SOL)',
+        data: candles.v,
+        backgroundColor: 'rgba(120, 200, 180, 0.35)',
+        yAxisID: 'y1',
       },
     ],
   };
@@ -72,13 +73,13 @@ const renderSalesChart = sales => {
   }
 
   salesChart = new Chart(salesChartCanvas, {
-    type: 'line',
     data: chartData,
     options: {
       responsive: true,
       scales: {
         x: { ticks: { color: '#b7c7c2' }, grid: { color: 'rgba(255,255,255,0.06)' } },
         y: { ticks: { color: '#b7c7c2' }, grid: { color: 'rgba(255,255,255,0.06)' } },
+        y1: { position: 'right', ticks: { color: '#b7c7c2' }, grid: { drawOnChartArea: false } },
       },
       plugins: {
         legend: { labels: { color: '#f4f7f4' } },
@@ -87,6 +88,26 @@ const renderSalesChart = sales => {
   });
 };
 
+const loadCandles = async () => {
+  try {
+    const from = Math.floor(Date.now() / 1000) - CANDLE_RANGE_SEC;
+    const response = await fetch(`/api/candles?resolution=${CANDLE_RESOLUTION}&from=${from}`);
+    if (!response.ok) return;
+    renderSalesChart(await response.json());
+  } catch (err) {
+    console.warn('Candle load failed', err);
+  }
+};
+
+let candleRefresh;
+const scheduleCandleRefresh = () => {
+  if (!salesChartCanvas || candleRefresh) return;
+  candleRefresh = setTimeout(() => {
+    candleRefresh = undefined;
+    loadCandles();
+  }, 2000);
+};
+
 const renderSalesTable = sales => {
   const container = document.getElementById('recentSales');
   const countEl = document.getElementById('salesCount');
@@ -186,7 +207,7 @@ const updateStatusPage = payload => {
 
   renderSalesTable(recentSales);
   renderListingsTable(recentListings);
-  renderSalesChart(recentSales);
+  scheduleCandleRefresh();
   renderTicker(recentSales);
 };
 
@@ -202,21 +223,38 @@ const pollStatus = async () => {
 };
 
 if (salesChartCanvas) {
-  if (window.__recentSales) {
-    renderSalesChart(window.__recentSales);
-  }
+  loadCandles();
   if (window.EventSource) {
+    const RECENT_LIMIT = 40;
+    const streamState = { stats: {}, recent_sales: [], recent_listings: [] };
     const source = new EventSource('/api/stream');
-    source.onmessage = event => {
+    const onStream = handler => event => {
       try {
-        const payload = JSON.parse(event.data);
-        updateStatusPage(payload);
+        handler(JSON.parse(event.data));
+        updateStatusPage(streamState);
       } catch (err) {
         console.warn('Stream parse failed', err);
       }
     };
+    source.onmessage = onStream(payload => {
+      Object.assign(streamState, payload);
+    });
+    source.addEventListener(
+      'sale',
+      onStream(delta => {
+        streamState.recent_sales = [delta.sale, ...streamState.recent_sales].slice(0, RECENT_LIMIT);
+        if (delta.stats) streamState.stats = delta.stats;
+      })
+    );
+    source.addEventListener(
+      'listing',
+      onStream(delta => {
+        streamState.recent_listings = [delta.listing, ...streamState.recent_listings].slice(0, RECENT_LIMIT);
+      })
+    );
     source.onerror = () => {
-      source.close();
+      // EventSource reconnects on its own and resumes with Last-Event-ID; poll only if it gives up.
+      if (source.readyState !== EventSource.CLOSED) return;
       pollStatus();
       setInterval(pollStatus, 10000);
     };
@@ -0,0 +1,248 @@
+"""Offline load test: runs the bot against local upstream stand-ins and drives /webhook/helius.
+
+    python scripts/bench_load.py --rate 5 --batch-size 4 --duration 30 --latency-ms 30 --error-rate 0.01
+
+The bot runs as a uvicorn subprocess with every upstream (Helius, Tensor, HowRare,
+IPFS, Telegram) pointed at bench_upstreams.py, so nothing leaves the machine.
+Reports webhook throughput and latency percentiles, time from POST to the
+Telegram request, and the bot's memory growth.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+import bench_upstreams
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _rss_mb(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            rss = next((int(line.split()[1]) / 1024 for line in status if line.startswith("VmRSS:")), None)
+    except OSError:
+        return None
+    if rss is None:
+        return None
+    # With --workers the supervisor's children do the work; count them too.
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as children:
+            rss += sum(_rss_mb(int(child)) or 0.0 for child in children.read().split())
+    except OSError:
+        pass
+    return rss
+
+
+def _bot_env(args: argparse.Namespace, upstream: str, state_dir: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    # Everything the bot would read from .env is set explicitly so the real config is never used.
+    env.update(
+        TELEGRAM_BOT_TOKEN="123456:bench",
+        TELEGRAM_CHAT_ID="-1001",
+        HELIUS_API_KEY="bench",
+        TENSOR_COLLECTION_ID="galacticgeckos",
+        HOWRARE_API_KEY="bench",
+        ADMIN_USER="",
+        ADMIN_PASSWORD="",
+        WATCH_SOURCES="tensor",
+        WATCH_MINTS="",
+        WATCH_MINTLIST_URL="",
+        SEND_LISTING_ALERTS="false",
+        HELIUS_RPC_URL=f"{upstream}/helius",
+        TENSOR_API_URL=f"{upstream}/tensor",
+        HOWRARE_API_URL=f"{upstream}/howrare",
+        TELEGRAM_API_URL=f"{upstream}/telegram",
+        IPFS_GATEWAYS=f"{upstream}/ipfs/",
+        STATE_DIR=state_dir,
+        SHARED_STATE="true" if args.workers > 1 else "false",
+        ALERT_COALESCE_WINDOW_SEC=str(args.coalesce_sec),
+        TELEGRAM_CHAT_RATE_PER_MIN=str(args.telegram_rate_per_min),
+        TELEGRAM_CHAT_BURST=str(max(1, int(args.telegram_rate_per_min / 60))),
+        TELEGRAM_GLOBAL_RATE_PER_SEC=str(max(30.0, args.telegram_rate_per_min / 60)),
+    )
+    return env
+
+
+async def _wait_healthy(client: httpx.AsyncClient, url: str, process: subprocess.Popen) -> None:
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit("Bot process exited during startup")
+        try:
+            if (await client.get(f"{url}/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise SystemExit("Bot did not become healthy within 30s")
+
+
+async def run(args: argparse.Namespace) -> None:
+    upstream_port = args.upstream_port or _free_port()
+    bot_port = args.bot_port or _free_port()
+    upstream = f"http://127.0.0.1:{upstream_port}"
+    bot_url = f"http://127.0.0.1:{bot_port}"
+    bench_upstreams.apply_fault_arguments(args)
+    bench_upstreams.serve_in_thread(upstream_port)
+
+    state_dir = tempfile.mkdtemp(prefix="bench-state-")
+    log_path = Path(state_dir) / "bot.log"
+    log_file = open(log_path, "w")
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(bot_port), "--workers", str(args.workers), "--log-level", "warning",
+        ],
+        cwd=PROJECT_DIR,
+        env=_bot_env(args, upstream, state_dir),
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+    # Pooled keep-alive connections stick to whichever worker accepted them; with several
+    # workers, open one per batch so the load spreads like independent Helius deliveries.
+    keepalive = args.connections if args.workers == 1 else 0
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=keepalive)
+    try:
+        async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+            await _wait_healthy(client, bot_url, process)
+            await asyncio.sleep(1)  # let the rarity and floor refreshers finish their first pass
+            rss_start = _rss_mb(process.pid)
+
+            latencies: List[float] = []
+            codes: Counter = Counter()
+            sent_at: Dict[str, float] = {}
+            sent_events: List[dict] = []
+            rng = random.Random(args.seed)
+            tasks = []
+
+            async def post(batch: List[dict]) -> None:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(f"{bot_url}/webhook/helius", json=batch)
+                    codes[response.status_code] += 1
+                except httpx.HTTPError as exc:
+                    codes[type(exc).__name__] += 1
+                    return
+                latencies.append(time.perf_counter() - started)
+
+            interval = 1 / args.rate
+            start = time.perf_counter()
+            total = int(args.duration * args.rate)
+            index = 0
+            # Open-loop: batches go out on schedule whether or not earlier ones have been answered.
+            for n in range(total):
+                delay = start + n * interval - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                batch = []
+                for _ in range(args.batch_size):
+                    if sent_events and rng.random() < args.duplicate_ratio:
+                        batch.append(rng.choice(sent_events))
+                        continue
+                    index += 1
+                    listing = rng.random() < args.listing_ratio
+                    event = bench_upstreams.sample_event(args.seed * 10_000_000 + index, args.mints, listing=listing)
+                    if not listing:
+                        sent_at[event["signature"]] = time.time()
+                    sent_events.append(event)
+                    batch.append(event)
+                tasks.append(asyncio.ensure_future(post(batch)))
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - start
+
+            drain_deadline = time.monotonic() + args.drain_sec
+            while time.monotonic() < drain_deadline and len(set(sent_at) & set(bench_upstreams.alerts)) < len(sent_at):
+                await asyncio.sleep(0.25)
+            rss_end = _rss_mb(process.pid)
+            status = (await client.get(f"{bot_url}/api/status")).json()
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        log_file.close()
+
+    alert_delays = [bench_upstreams.alerts[sig] - ts for sig, ts in sent_at.items() if sig in bench_upstreams.alerts]
+    events_sent = total * args.batch_size
+
+    def ms(value: float) -> str:
+        return f"{value * 1000:.1f}ms"
+
+    print(f"batches={total} events={events_sent} unique_sales={len(sent_at)} elapsed={elapsed:.1f}s")
+    print(f"throughput={events_sent / elapsed:.0f} events/s ({total / elapsed:.1f} batches/s) responses={dict(codes)}")
+    print(
+        "webhook latency "
+        f"p50={ms(_percentile(latencies, 0.5))} p95={ms(_percentile(latencies, 0.95))} "
+        f"p99={ms(_percentile(latencies, 0.99))} max={ms(max(latencies, default=float('nan')))}"
+    )
+    print(
+        f"time to alert ({len(alert_delays)}/{len(sent_at)} delivered) "
+        f"p50={ms(_percentile(alert_delays, 0.5))} p95={ms(_percentile(alert_delays, 0.95))} "
+        f"p99={ms(_percentile(alert_delays, 0.99))}"
+    )
+    if rss_start is not None and rss_end is not None:
+        print(f"bot rss start={rss_start:.1f}MB end={rss_end:.1f}MB growth={rss_end - rss_start:+.1f}MB")
+    ingest = status.get("ingest", {})
+    telegram = status.get("telegram", {})
+    print(
+        f"ingest processed={ingest.get('processed')} failed={ingest.get('failed')} rejected={ingest.get('rejected')} "
+        f"max_lag={ingest.get('max_lag_sec')}s; telegram sent={telegram.get('sent')} retries={telegram.get('retries')}"
+    )
+    print(f"duplicate alerts={sum(bench_upstreams.repeat_alerts.values())}")
+    print(f"bot log: {log_path}")
+    print("upstream requests " + ", ".join(f"{name}={counter['requests']}" for name, counter in bench_upstreams.stats.items()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test the webhook pipeline against local upstream stand-ins.")
+    parser.add_argument("--rate", type=float, default=5, help="webhook batches per second")
+    parser.add_argument("--batch-size", type=int, default=4, help="events per webhook batch")
+    parser.add_argument("--duration", type=float, default=20, help="seconds of load")
+    parser.add_argument("--mints", type=int, default=bench_upstreams.COLLECTION_SIZE, help="distinct mints in the traffic")
+    parser.add_argument("--listing-ratio", type=float, default=0.2)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.05, help="fraction of events re-sent (Helius retries)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers; more than one enables SHARED_STATE")
+    parser.add_argument("--connections", type=int, default=64, help="HTTP connections to the bot")
+    parser.add_argument("--coalesce-sec", type=float, default=0, help="ALERT_COALESCE_WINDOW_SEC for the bot")
+    parser.add_argument(
+        "--telegram-rate-per-min",
+        type=float,
+        default=60_000,
+        help="per-chat Telegram budget; the default is high so the pipeline, not the rate limit, is measured",
+    )
+    parser.add_argument("--drain-sec", type=float, default=15, help="how long to wait for outstanding alerts")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--bot-port", type=int)
+    parser.add_argument("--upstream-port", type=int)
+    bench_upstreams.add_fault_arguments(parser)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Microbenchmarks for the per-event hot path, run offline against synthetic state.
+
+    python scripts/bench_micro.py [--seconds 1.0] [--sales 20000]
+
+Each benchmark reports the best and median time per call over several rounds.
+"""
+
+import argparse
+import itertools
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+# Isolate from the real .env before the app module reads its config.
+os.environ.update(
+    STATE_DIR=tempfile.mkdtemp(prefix="bench-micro-"),
+    TELEGRAM_BOT_TOKEN="",
+    TELEGRAM_CHAT_ID="",
+    HELIUS_API_KEY="",
+    HOWRARE_API_KEY="",
+    WATCH_MINTLIST_URL="",
+    WATCH_MINTS="",
+    TENSOR_COLLECTION_ID="galacticgeckos",
+)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import bench_upstreams  # noqa: E402
+from app import main as bot  # noqa: E402
+
+ROUNDS = 5
+
+
+def _seed_state(sales: int) -> None:
+    now = time.time()
+    bot._floor_state["galacticgeckos"] = {
+        "price_sol": bench_upstreams.FLOOR_LAMPORTS / bot.LAMPORTS_PER_SOL,
+        "raw": {"price": bench_upstreams.FLOOR_LAMPORTS},
+        "updated_at": now,
+        "failures": 0,
+        "last_error": None,
+        "next_refresh": now + 60,
+    }
+    ranks = {bench_upstreams.sample_mint(i): i + 1 for i in range(bench_upstreams.COLLECTION_SIZE)}
+    bot._publish_rarity_index(ranks, now)
+    # Spread sales over the 7d window so every rolling window has data.
+    for i in range(sales):
+        event = bench_upstreams.sample_event(i, ts=int(now - (sales - i) * 7 * 86400 / sales))
+        info = bot._extract_nft_info(event)
+        price = info["amount_lamports"] / bot.LAMPORTS_PER_SOL
+        bot._record_market_sale(event["timestamp"], price, info["buyer"])
+        bot._record_candle(bot._candles, event["timestamp"], price, "TENSOR")
+    for i in range(bot._recent_sales.maxlen or 40):
+        event = bench_upstreams.sample_event(sales + i)
+        bot._recent_sales.appendleft(bot._sale_entry(event, bot._extract_nft_info(event), {}, []))
+
+
+def _measure(func: Callable[[int], None], seconds: float) -> Tuple[float, float, int]:
+    # Find a loop count that takes roughly seconds / ROUNDS, then time ROUNDS runs of it.
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        func(loops)
+        elapsed = time.perf_counter() - started
+        if elapsed >= seconds / ROUNDS / 4:
+            break
+        loops *= 4
+    loops = max(1, int(loops * (seconds / ROUNDS) / elapsed))
+    timings: List[float] = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        func(loops)
+        timings.append((time.perf_counter() - started) / loops)
+    return min(timings), statistics.median(timings), loops
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmark the per-event hot path.")
+    parser.add_argument("--seconds", type=float, default=1.0, help="time budget per benchmark")
+    parser.add_argument("--sales", type=int, default=20000, help="sales preloaded into the rolling windows")
+    args = parser.parse_args()
+
+    _seed_state(args.sales)
+    event = bench_upstreams.sample_event(args.sales + 1000)
+    nft = bot._extract_nft_info(event)
+    enriched = {
+        **nft,
+        "name": "Galactic Gecko #1234",
+        "image": "https://bench.invalid/geckos/1234.png",
+        "traits": ["Background: Nebula", "Body: Lava", "Eyes: Laser", "Headwear: Crown"],
+        "collection": "Galactic Geckos",
+    }
+
+    def extract(n: int) -> None:
+        for _ in range(n):
+            bot._extract_nft_info(event)
+
+    def format_sale(n: int) -> None:
+        for _ in range(n):
+            bot._format_sale_message(event, enriched)
+
+    def sale_tags(n: int) -> None:
+        floor_info = bot._floor_snapshot()
+        for _ in range(n):
+            bot._sale_tags(nft["amount_lamports"], floor_info, nft["buyer"])
+
+    signatures = itertools.count()
+
+    def seen_signature(n: int) -> None:
+        # Fresh signatures: the exact set misses and every live Bloom filter is probed.
+        for i in itertools.islice(signatures, n):
+            bot._seen_signature(f"bench-signature-{i}")
+
+    watch_index = bot._MintIndex.from_mints(bench_upstreams.sample_mint(i) for i in range(100_000))
+    # Alternate hits and misses against a 100k-mint watchlist.
+    probes = [bench_upstreams.sample_mint(i * 1000 + (i % 2) * 100_000) for i in range(100)]
+
+    def watch_mint(n: int) -> None:
+        for i in range(n):
+            probes[i % 100] in watch_index
+
+    def status_snapshot(n: int) -> None:
+        for _ in range(n):
+            bot._status_snapshot()
+
+    benchmarks = [
+        ("_extract_nft_info", extract),
+        ("_format_sale_message", format_sale),
+        ("_sale_tags", sale_tags),
+        ("_seen_signature", seen_signature),
+        ("_MintIndex lookup", watch_mint),
+        ("_status_snapshot", status_snapshot),
+    ]
+    print(f"{'benchmark':<24}{'best':>12}{'median':>12}{'ops/s':>14}{'loops':>10}")
+    for name, func in benchmarks:
+        best, median, loops = _measure(func, args.seconds)
+        print(f"{name:<24}{best * 1e6:>10.2f}us{median * 1e6:>10.2f}us{1 / median:>14,.0f}{loops:>10}")
+    bot._close_cache_db()
+    bot._close_events_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""Local stand-ins for Helius RPC, Tensor, HowRare, IPFS and the Telegram Bot API.
+
+Used by bench_load.py, or run on its own and point the bot at it:
+
+    python scripts/bench_upstreams.py --port 8900 --latency-ms 40 --error-rate 0.02
+
+    HELIUS_RPC_URL=http://127.0.0.1:8900/helius
+    TENSOR_API_URL=http://127.0.0.1:8900/tensor
+    HOWRARE_API_URL=http://127.0.0.1:8900/howrare
+    TELEGRAM_API_URL=http://127.0.0.1:8900/telegram
+    IPFS_GATEWAYS=http://127.0.0.1:8900/ipfs/
+
+Latency and error rates can be changed at runtime with POST /_faults and counters are at GET /_stats.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from urllib.parse import unquote_plus
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+SERVICES = ("helius", "tensor", "howrare", "ipfs", "telegram")
+COLLECTION_SIZE = 5000
+FLOOR_LAMPORTS = 8_500_000_000
+TRAITS = {
+    "Background": ["Nebula", "Void", "Aurora", "Sunset", "Gold"],
+    "Body": ["Green", "Blue", "Lava", "Crystal", "Zombie"],
+    "Eyes": ["Sleepy", "Laser", "Visor", "Wink", "Cyclops"],
+    "Headwear": ["None", "Cap", "Helmet", "Crown", "Halo"],
+    "Outfit": ["Suit", "Hoodie", "Armor", "Robe", "Spacesuit"],
+}
+_BASE58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_SIGNATURE_RE = re.compile(r"solscan\.io/tx/([1-9A-HJ-NP-Za-km-z]{32,90})")
+
+faults: Dict[str, Dict[str, float]] = {
+    service: {"latency_ms": 0.0, "jitter_ms": 0.0, "error_rate": 0.0} for service in SERVICES
+}
+stats: Dict[str, Counter] = {service: Counter() for service in SERVICES}
+# Signature -> time.time() the first Telegram request mentioning it arrived.
+alerts: Dict[str, float] = {}
+# Signature -> how many later Telegram requests mentioned it again (duplicate alerts).
+repeat_alerts: Counter = Counter()
+
+
+def _base58(data: bytes) -> str:
+    number = int.from_bytes(data, "big")
+    encoded = ""
+    while number:
+        number, rem = divmod(number, 58)
+        encoded = _BASE58[rem] + encoded
+    return "1" * (len(data) - len(data.lstrip(b"\0"))) + encoded
+
+
+def sample_mint(index: int) -> str:
+    return _base58(hashlib.sha256(f"mint-{index}".encode()).digest())
+
+
+def sample_signature(index: int) -> str:
+    return _base58(hashlib.sha512(f"sig-{index}".encode()).digest())
+
+
+def _gecko_index(mint: str) -> int:
+    return int.from_bytes(hashlib.sha256(mint.encode()).digest()[:4], "big") % COLLECTION_SIZE
+
+
+def _attributes(mint: str) -> List[Dict[str, str]]:
+    rng = random.Random(mint)
+    # Skewed choice so some trait values are genuinely rare.
+    return [
+        {"trait_type": trait, "value": values[min(int(rng.expovariate(1.2)), len(values) - 1)]}
+        for trait, values in TRAITS.items()
+    ]
+
+
+def sample_event(index: int, mint_count: int = COLLECTION_SIZE, listing: bool = False, ts: Optional[int] = None) -> Dict[str, Any]:
+    # A Helius enhanced-transaction payload shaped like the ones the webhook receives.
+    rng = random.Random(index)
+    mint = sample_mint(rng.randrange(mint_count))
+    seller = sample_mint(10_000_000 + rng.randrange(2000))
+    buyer = sample_mint(20_000_000 + rng.randrange(500))
+    amount = int(FLOOR_LAMPORTS * rng.lognormvariate(0.1, 0.35))
+    kind = "NFT_LISTING" if listing else "NFT_SALE"
+    nft_event = {
+        "amount": amount,
+        "buyer": "" if listing else buyer,
+        "description": f"{seller} {'listed' if listing else 'sold'} Galactic Gecko for {amount / 1e9:.2f} SOL on TENSOR.",
+        "fee": 5000,
+        "feePayer": seller if listing else buyer,
+        "nfts": [{"mint": mint, "tokenStandard": "NonFungible"}],
+        "saleType": "" if listing else "INSTANT_SALE",
+        "seller": seller,
+        "signature": sample_signature(index),
+        "slot": 250_000_000 + index,
+        "source": "TENSOR",
+        "staking": False,
+        "timestamp": ts or int(time.time()),
+        "type": kind,
+    }
+    return {
+        "description": nft_event["description"],
+        "type": kind,
+        "source": "TENSOR",
+        "fee": 5000,
+        "feePayer": nft_event["feePayer"],
+        "signature": nft_event["signature"],
+        "slot": nft_event["slot"],
+        "timestamp": nft_event["timestamp"],
+        "nativeTransfers": [{"fromUserAccount": buyer, "toUserAccount": seller, "amount": amount}],
+        "tokenTransfers": [
+            {"fromUserAccount": seller, "toUserAccount": buyer, "mint": mint, "tokenAmount": 1, "tokenStandard": "NonFungible"}
+        ],
+        "accountData": [],
+        "events": {"nft": nft_event},
+    }
+
+
+def _asset(mint: str) -> Dict[str, Any]:
+    number = _gecko_index(mint)
+    return {
+        "interface": "ProgrammableNFT",
+        "id": mint,
+        "content": {
+            "json_uri": f"ipfs://bafybench{hashlib.sha1(mint.encode()).hexdigest()}/{number}.json",
+            "files": [{"uri": f"https://bench.invalid/geckos/{number}.png", "mime": "image/png"}],
+            "metadata": {"name": f"Galactic Gecko #{number}", "symbol": "GGSG", "attributes": _attributes(mint)},
+            "links": {"image": f"https://bench.invalid/geckos/{number}.png"},
+        },
+        "grouping": [{"group_key": "collection", "group_value": "GGSGcollection111111111111111111111111111111"}],
+    }
+
+
+async def _inject(service: str) -> Optional[JSONResponse]:
+    fault = faults[service]
+    stats[service]["requests"] += 1
+    delay = fault["latency_ms"] + random.uniform(0, fault["jitter_ms"])
+    if delay > 0:
+        await asyncio.sleep(delay / 1000)
+    if fault["error_rate"] and random.random() < fault["error_rate"]:
+        stats[service]["errors"] += 1
+        if service == "telegram":
+            body = {
+                "ok": False,
+                "error_code": 429,
+                "description": "Too Many Requests: retry after 1",
+                "parameters": {"retry_after": 1},
+            }
+            return JSONResponse(body, status_code=429)
+        return JSONResponse({"error": "injected failure"}, status_code=503)
+    return None
+
+
+def _message(method: str, message_id: int, chat_id: Any) -> Dict[str, Any]:
+    message: Dict[str, Any] = {
+        "message_id": message_id,
+        "date": int(time.time()),
+        "chat": {"id": int(chat_id) if str(chat_id).lstrip("-").isdigit() else -1001, "type": "supergroup", "title": "Bench"},
+    }
+    if method in {"sendPhoto", "sendMediaGroup"}:
+        message["photo"] = [{"file_id": "bench", "file_unique_id": "bench", "width": 512, "height": 512}]
+    elif method == "sendAnimation":
+        message["animation"] = {
+            "file_id": "bench",
+            "file_unique_id": "bench",
+            "width": 320,
+            "height": 320,
+            "duration": 2,
+        }
+    else:
+        message["text"] = "bench"
+    return message
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(title="Bench upstreams")
+
+    @app.post("/helius/")
+    async def helius(request: Request) -> Any:
+        failure = await _inject("helius")
+        if failure:
+            return failure
+        payload = await request.json()
+        method = payload.get("method")
+        params = payload.get("params") or {}
+        stats["helius"][method] += 1
+        if method == "getAssetBatch":
+            result: Any = [_asset(mint) for mint in params.get("ids") or []]
+        elif method == "getAsset":
+            result = _asset(params.get("id") or "")
+        else:
+            return JSONResponse({"jsonrpc": "2.0", "id": payload.get("id"), "error": {"code": -32601}}, status_code=400)
+        return {"jsonrpc": "2.0", "id": payload.get("id"), "result": result}
+
+    @app.get("/tensor/sol/collections/{collection_id}/floor")
+    async def tensor_floor(collection_id: str) -> Any:
+        failure = await _inject("tensor")
+        return failure or {"collection": collection_id, "price": FLOOR_LAMPORTS}
+
+    @app.get("/howrare/v0.1/collections/{collection}")
+    async def howrare(collection: str) -> Any:
+        failure = await _inject("howrare")
+        if failure:
+            return failure
+        items = [{"mint": sample_mint(index), "rank": index + 1} for index in range(COLLECTION_SIZE)]
+        return {"result": {"data": {"collection": collection, "items": items}}}
+
+    @app.get("/ipfs/{path:path}")
+    async def ipfs(path: str) -> Any:
+        failure = await _inject("ipfs")
+        if failure:
+            return failure
+        number = path.rsplit("/", 1)[-1].split(".", 1)[0]
+        mint = sample_mint(int(number)) if number.isdigit() else path
+        return {
+            "name": f"Galactic Gecko #{number}",
+            "image": f"https://bench.invalid/geckos/{number}.png",
+            "attributes": _attributes(mint),
+            "collection": {"name": "Galactic Geckos"},
+        }
+
+    @app.post("/telegram/bot{token}/{method}")
+    async def telegram(token: str, method: str, request: Request) -> Any:
+        received = time.time()
+        failure = await _inject("telegram")
+        if failure:
+            return failure
+        stats["telegram"][method] += 1
+        if method == "getMe":
+            return {"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}}
+        body = unquote_plus((await request.body()).decode("utf-8", "ignore"))
+        for signature in set(_SIGNATURE_RE.findall(body)):
+            if signature in alerts:
+                repeat_alerts[signature] += 1
+            alerts.setdefault(signature, received)
+        chat_match = re.search(r"chat_id\W+(-?\d+)", body)
+        chat_id = chat_match.group(1) if chat_match else -1001
+        message_id = sum(stats["telegram"].values())
+        if method == "sendMediaGroup":
+            count = max(1, body.count('"type": "photo"') + body.count('"type":"photo"'))
+            return {"ok": True, "result": [_message(method, message_id + i, chat_id) for i in range(count)]}
+        return {"ok": True, "result": _message(method, message_id, chat_id)}
+
+    @app.post("/_faults")
+    async def set_faults(request: Request) -> Any:
+        # {"telegram": {"latency_ms": 200, "error_rate": 0.05}, "*": {...}}
+        for service, values in (await request.json()).items():
+            for name in SERVICES if service == "*" else [service]:
+                faults[name].update({key: float(value) for key, value in values.items() if key in faults[name]})
+        return faults
+
+    @app.get("/_stats")
+    async def get_stats() -> Any:
+        return {"faults": faults, "requests": {service: dict(counter) for service, counter in stats.items()}, "alerts": len(alerts)}
+
+    return app
+
+
+def serve_in_thread(port: int) -> uvicorn.Server:
+    # Starts the stand-ins in a daemon thread and returns once they accept requests.
+    server = uvicorn.Server(uvicorn.Config(create_app(), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline or not thread.is_alive():
+            raise SystemExit(f"Bench upstreams failed to start on port {port}")
+        time.sleep(0.05)
+    return server
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added latency for every upstream")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="random extra latency, uniform 0..jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of upstream requests that fail")
+    for service in SERVICES:
+        parser.add_argument(f"--{service}-latency-ms", type=float, help=f"latency override for {service}")
+        parser.add_argument(f"--{service}-error-rate", type=float, help=f"error rate override for {service}")
+
+
+def apply_fault_arguments(args: argparse.Namespace) -> None:
+    for service in SERVICES:
+        latency = getattr(args, f"{service}_latency_ms")
+        error_rate = getattr(args, f"{service}_error_rate")
+        faults[service].update(
+            latency_ms=args.latency_ms if latency is None else latency,
+            jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate if error_rate is None else error_rate,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve local stand-ins for the bot's upstream APIs.")
+    parser.add_argument("--port", type=int, default=8900)
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+    apply_fault_arguments(args)
+    uvicorn.run(create_app(), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Import archived Helius NFT_SALE / NFT_LISTING payloads into the event store.
+
+Dumps can be JSON arrays, webhook batches or JSONL (optionally .gz) and are parsed
+incrementally, so file size does not matter. No Telegram alerts are sent.
+
+    python scripts/import_history.py dumps/2025-*.jsonl.gz
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import main as bot  # noqa: E402
+
+CHUNK_SIZE = 1 << 20
+# Longest record we wait for before treating it as corrupt and resyncing at the next newline.
+MAX_PENDING = 8 * CHUNK_SIZE
+SEPARATORS = " \t\r\n,[]"
+PROGRESS_SEC = 5.0
+
+
+def _open_dump(path: Path) -> TextIO:
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def iter_events(path: Path, stats: Optional[Counter] = None) -> Iterator[Dict[str, Any]]:
+    # Array brackets and commas between objects are skipped, so a top-level array, an array of
+    # webhook batches and one object or batch per line all flatten to the same stream of events.
+    # A malformed record is skipped up to the next newline and counted as invalid_json.
+    stats = stats if stats is not None else Counter()
+    decoder = json.JSONDecoder()
+    with _open_dump(path) as fp:
+        buf, pos, eof = "", 0, False
+        while True:
+            while pos < len(buf) and buf[pos] in SEPARATORS:
+                pos += 1
+            if pos == len(buf):
+                if eof:
+                    return
+                buf, pos = fp.read(CHUNK_SIZE), 0
+                eof = not buf
+                continue
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as exc:
+                # Strings cannot hold raw newlines, so a record that is merely cut off by the chunk
+                # boundary fails on its last line. A newline after the error means the record is bad.
+                newline = buf.find("\n", exc.pos)
+                if newline != -1:
+                    stats["invalid_json"] += 1
+                    pos = newline + 1
+                    continue
+                if eof:
+                    stats["invalid_json"] += 1
+                    return
+                if len(buf) - pos > MAX_PENDING:
+                    # One line longer than any real record: drop it rather than buffer the file.
+                    stats["invalid_json"] += 1
+                    buf, pos = _skip_line(fp), 0
+                    eof = not buf
+                    continue
+                chunk = fp.read(CHUNK_SIZE)
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            pos = end
+            if isinstance(value, dict):
+                yield value
+            if pos > CHUNK_SIZE:
+                buf, pos = buf[pos:], 0
+
+
+def _skip_line(fp: TextIO) -> str:
+    # Read past the next newline and return what follows it.
+    while True:
+        chunk = fp.read(CHUNK_SIZE)
+        newline = chunk.find("\n")
+        if not chunk or newline != -1:
+            return chunk[newline + 1 :] if chunk else ""
+
+
+async def _build_rows(
+    chunk: List[Tuple[Dict[str, Any], Dict[str, Any]]], enrich: bool
+) -> List[Tuple[str, Tuple[Any, ...]]]:
+    if enrich:
+        enriched = await asyncio.gather(*(bot._enrich_metadata(nft) for _, nft in chunk))
+    else:
+        enriched = [nft for _, nft in chunk]
+
+    rows = []
+    for (event, nft), metadata in zip(chunk, enriched):
+        timestamp = event.get("timestamp") or event.get("time") or bot._current_time()
+        ts = bot._parse_event_time(timestamp)
+        if event.get("type") == "NFT_SALE":
+            entry = bot._sale_entry(event, nft, metadata, [])
+            rows.append(("sales", bot._event_row(ts, bot._price_sol(nft), entry)))
+        else:
+            entry = bot._listing_entry(event, metadata)
+            rows.append(("listings", bot._event_row(ts, bot._price_sol(nft), entry)))
+    return rows
+
+
+async def replay(paths: List[Path], batch_size: int, enrich: bool) -> Counter:
+    stats: Counter = Counter()
+    chunk: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+    writer: Optional[asyncio.Future] = None
+    started = last_report = time.monotonic()
+
+    async def flush() -> None:
+        nonlocal writer
+        rows = await _build_rows(chunk, enrich)
+        chunk.clear()
+        # Build the next batch while the previous one is being written.
+        if writer is not None:
+            await writer
+        writer = asyncio.ensure_future(asyncio.to_thread(bot._write_events, rows))
+
+    for path in paths:
+        for event in iter_events(path, stats):
+            stats["read"] += 1
+            if event.get("type") not in {"NFT_SALE", "NFT_LISTING"}:
+                stats["skipped_type"] += 1
+                continue
+            nft_info, reason = bot._filter_event(event)
+            if nft_info is None:
+                stats[f"filtered_{reason}"] += 1
+                continue
+            chunk.append((event, nft_info))
+            if len(chunk) >= batch_size:
+                await flush()
+
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_SEC:
+                last_report = now
+                rate = stats["read"] / (now - started)
+                print(f"{stats['read']} read, {bot._event_store_stats['written']} written, {rate:.0f} events/s", file=sys.stderr)
+
+    if chunk:
+        await flush()
+    if writer is not None:
+        await writer
+    stats["written"] = bot._event_store_stats["written"]
+    stats["duplicates"] = bot._event_store_stats["duplicates"]
+    stats["failed"] = bot._event_store_stats["failed"]
+    stats["elapsed_ms"] = int((time.monotonic() - started) * 1000)
+    return stats
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Import archived Helius sale/listing payloads into the event store.")
+    parser.add_argument("paths", nargs="+", type=Path, help="JSON or JSONL dumps, optionally gzip-compressed")
+    parser.add_argument("--batch-size", type=int, default=2000, help="events per write transaction (default 2000)")
+    parser.add_argument("--no-enrich", action="store_true", help="skip Helius metadata lookups (names, images, traits)")
+    args = parser.parse_args()
+
+    missing = [str(path) for path in args.paths if not path.is_file()]
+    if missing:
+        raise SystemExit(f"Not found: {', '.join(missing)}")
+    if bot._open_events_db() is None:
+        raise SystemExit(f"Cannot open the event store at {bot.EVENTS_DB_PATH}")
+
+    try:
+        if bot.WATCH_MINTLIST_URL:
+            await bot._load_mintlist(bot.WATCH_MINTLIST_URL)
+        stats = await replay(args.paths, max(1, args.batch_size), not args.no_enrich)
+    finally:
+        await bot._close_http_client()
+        bot._close_cache_db()
+        bot._close_events_db()
+
+    elapsed = max(stats.pop("elapsed_ms"), 1) / 1000
+    for key, value in sorted(stats.items()):
+        print(f"{key}={value}")
+    print(f"elapsed={elapsed:.2f}s rate={stats['read'] / elapsed:.0f} events/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
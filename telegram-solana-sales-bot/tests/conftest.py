@@ -0,0 +1,24 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# The app reads its config once at import, so every test module shares this environment.
+# Set it before anything imports the app, and keep the real .env out of it.
+os.environ.update(
+    STATE_DIR=tempfile.mkdtemp(prefix="test-bot-"),
+    TELEGRAM_BOT_TOKEN="123456:test",
+    TELEGRAM_CHAT_ID="-1001",
+    HELIUS_API_KEY="",
+    HOWRARE_API_KEY="",
+    ADMIN_USER="",
+    ADMIN_PASSWORD="",
+    WATCH_SOURCES="tensor",
+    WATCH_MINTS="",
+    WATCH_MINTLIST_URL="",
+    SHARED_STATE="false",
+    INGEST_QUEUE_SIZE="3",
+)
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
@@ -0,0 +1,47 @@
+import struct
+
+import pytest
+
+from app import main as bot
+
+WINDOW_SEC = 60.0
+GENERATIONS = 4
+
+
+def _filter() -> bot._SignatureFilter:
+    return bot._SignatureFilter(WINDOW_SEC, GENERATIONS, 1000, 0.001)
+
+
+def test_signature_is_remembered_for_the_window_then_forgotten():
+    signatures = _filter()
+    start = signatures.filters[0].started_at
+    span = signatures.span_sec
+
+    # The latest insert into the first filter is the one it must hold the longest.
+    inserted = start + span - 0.1
+    assert not signatures.check_and_add("sig", inserted)
+    assert signatures.check_and_add("sig", inserted + WINDOW_SEC)
+    assert not signatures.check_and_add("other", inserted + WINDOW_SEC)
+    assert not signatures.check_and_add("sig", start + span * GENERATIONS)
+
+
+def test_round_trips_through_bytes():
+    signatures = _filter()
+    now = signatures.filters[0].started_at
+    for index in range(50):
+        signatures.check_and_add(f"sig-{index}", now + index)
+
+    restored = _filter()
+    assert restored.load_bytes(signatures.to_bytes())
+    assert restored.items() == signatures.items()
+    assert all(restored.check_and_add(f"sig-{index}", now + 50) for index in range(50))
+
+
+def test_rejects_bytes_written_with_other_settings_or_truncated():
+    data = _filter().to_bytes()
+
+    assert not bot._SignatureFilter(WINDOW_SEC * 2, GENERATIONS, 1000, 0.001).load_bytes(data)
+    assert not bot._SignatureFilter(WINDOW_SEC, GENERATIONS, 5000, 0.001).load_bytes(data)
+    assert not _filter().load_bytes(data[:-1])
+    with pytest.raises(struct.error):
+        _filter().load_bytes(data[:10])
@@ -0,0 +1,55 @@
+import gzip
+import json
+from collections import Counter
+
+import pytest
+
+import import_history
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # Records straddle many chunk boundaries at this size.
+    monkeypatch.setattr(import_history, "CHUNK_SIZE", 64)
+    monkeypatch.setattr(import_history, "MAX_PENDING", 4 * 64)
+
+
+def _event(index: int) -> dict:
+    return {"type": "NFT_SALE", "signature": f"sig-{index}", "description": "x" * (index % 50)}
+
+
+def test_corrupt_line_is_skipped_and_counted(tmp_path):
+    lines = [json.dumps(_event(index)) for index in range(200)]
+    lines[5] = lines[5][:-7] + "oops"
+    path = tmp_path / "dump.jsonl"
+    path.write_text("\n".join(lines) + "\n")
+
+    stats = Counter()
+    signatures = [event["signature"] for event in import_history.iter_events(path, stats)]
+
+    assert signatures == [f"sig-{index}" for index in range(200) if index != 5]
+    assert stats["invalid_json"] == 1
+
+
+def test_overlong_line_is_dropped_without_buffering_the_file(tmp_path):
+    lines = [json.dumps(_event(index)) for index in range(20)]
+    lines[3] = '{"signature": "' + "y" * 10_000
+    path = tmp_path / "dump.jsonl.gz"
+    with gzip.open(path, "wt") as fp:
+        fp.write("\n".join(lines) + "\n")
+
+    stats = Counter()
+    signatures = [event["signature"] for event in import_history.iter_events(path, stats)]
+
+    assert signatures == [f"sig-{index}" for index in range(20) if index != 3]
+    assert stats["invalid_json"] == 1
+
+
+def test_array_and_batches_flatten_to_events(tmp_path):
+    events = [_event(index) for index in range(30)]
+    path = tmp_path / "dump.json"
+    path.write_text(json.dumps([events[:10], events[10:]], indent=2))
+
+    signatures = [event["signature"] for event in import_history.iter_events(path)]
+
+    assert signatures == [event["signature"] for event in events]
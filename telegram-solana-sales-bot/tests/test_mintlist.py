@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from app import main as bot
+
+MINTS = [bot._encode_mint(bytes([index + 1]) * 31 + bytes([index])) for index in range(40)]
+
+
+def _parse(text: str, size: int) -> list:
+    parser = bot._MintlistParser()
+    found = []
+    for start in range(0, len(text), size):
+        found += parser.feed(text[start : start + size])
+    return found + parser.feed("", final=True)
+
+
+@pytest.mark.parametrize(
+    "document",
+    [
+        MINTS,
+        [{"mint": mint, "name": f"Gecko #{index}", "rank": index} for index, mint in enumerate(MINTS)],
+        {"mints": MINTS},
+        {"result": [{"id": 1, "mint": mint, "tags": ["a", "b"]} for mint in MINTS]},
+        {"count": len(MINTS), "data": MINTS, "next": None},
+    ],
+    ids=["list", "objects", "mints", "result", "data"],
+)
+@pytest.mark.parametrize("size", [1, 7, 64, 1 << 16])
+def test_parser_handles_every_shape_in_split_chunks(document, size):
+    assert _parse(json.dumps(document, indent=1), size) == MINTS
+
+
+def test_parser_skips_non_string_values():
+    assert _parse('["a", 12, null, true, "b", {"other": "c"}]', 3) == ["a", "b"]
+
+
+def test_parser_rejects_a_truncated_document():
+    parser = bot._MintlistParser()
+    parser.feed(json.dumps(MINTS)[:-10])
+    with pytest.raises(ValueError):
+        parser.feed("", final=True)
+
+
+def test_base58_round_trip():
+    for mint in MINTS:
+        assert bot._encode_mint(bot._decode_mint(mint)) == mint
+    assert bot._decode_mint("not-base58!") is None
+    assert bot._decode_mint("abc") is None
+
+
+def test_index_lookup():
+    index = bot._MintIndex.from_mints(MINTS + ["not-a-mint"])
+    assert len(index) == len(MINTS)
+    assert all(mint in index for mint in MINTS)
+    assert bot._encode_mint(bytes(32)) not in index
+    assert sorted(index) == sorted(MINTS)
+
+
+def test_index_round_trips_through_bytes():
+    index = bot._MintIndex.from_mints(MINTS)
+    source = bot._mintlist_source("https://example.com/mints.json")
+    data = index.to_bytes(source, 1700000000.5, b'{"etag": "x"}')
+
+    loaded, fetched_at, meta = bot._MintIndex.from_bytes(data, source)
+    assert list(loaded) == list(index)
+    assert all(mint in loaded for mint in MINTS)
+    assert (fetched_at, meta) == (1700000000.5, b'{"etag": "x"}')
+
+
+def test_index_rejects_other_source_or_truncated_bytes():
+    source = bot._mintlist_source("https://example.com/mints.json")
+    data = bot._MintIndex.from_mints(MINTS).to_bytes(source, 0.0)
+
+    assert bot._MintIndex.from_bytes(data, bot._mintlist_source("https://example.com/other.json")) is None
+    assert bot._MintIndex.from_bytes(data[:-1], source) is None
+    assert bot._MintIndex.from_bytes(data[:10], source) is None
+
+
+def test_index_diff_counts_added_and_removed():
+    old = bot._MintIndex.from_mints(MINTS[:30])
+    new = bot._MintIndex.from_mints(MINTS[10:])
+    assert old.diff(new) == (10, 10)
+    assert new.diff(old) == (10, 10)
+    assert old.diff(old) == (0, 0)
+    assert bot._MintIndex().diff(old) == (30, 0)
+    assert old.diff(bot._MintIndex()) == (0, 30)
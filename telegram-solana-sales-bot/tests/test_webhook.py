@@ -0,0 +1,57 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main as bot
+
+
+def _sale(index: int) -> dict:
+    return {
+        "type": "NFT_SALE",
+        "source": "TENSOR",
+        "signature": f"test-signature-{index}",
+        "timestamp": 1700000000 + index,
+        "events": {"nft": {"amount": 1_000_000_000, "buyer": "buyer", "nfts": [{"mint": f"mint-{index}"}]}},
+    }
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    # Stand in for the worker queues so the depth only changes when the test drains it.
+    events = []
+    monkeypatch.setattr(bot, "_enqueue_event", lambda event, nft_info, trace: events.append(event))
+    monkeypatch.setattr(bot, "_ingest_depth", lambda: len(events))
+    return events
+
+
+def test_oversized_batch_is_accepted_in_steps(queued):
+    client = TestClient(bot.app)
+    batch = [_sale(index) for index in range(7)]
+
+    response = client.post("/webhook/helius", json=batch)
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == str(bot.INGEST_RETRY_AFTER_SEC)
+    assert [event["signature"] for event in queued] == [event["signature"] for event in batch[:3]]
+
+    # Helius retries the whole batch; what was accepted is skipped, the next slice goes in.
+    queued.clear()
+    response = client.post("/webhook/helius", json=batch)
+    assert response.status_code == 429
+    assert [event["signature"] for event in queued] == [event["signature"] for event in batch[3:6]]
+
+    queued.clear()
+    response = client.post("/webhook/helius", json=batch)
+    assert response.status_code == 200
+    assert response.json() == {"received": 7, "queued": 1}
+    assert [event["signature"] for event in queued] == [batch[6]["signature"]]
+
+
+def test_full_queue_rejects_without_marking_events_seen(queued):
+    client = TestClient(bot.app)
+    queued.extend([_sale(100), _sale(101), _sale(102)])
+
+    response = client.post("/webhook/helius", json=[_sale(103)])
+    assert response.status_code == 429
+
+    queued.clear()
+    response = client.post("/webhook/helius", json=[_sale(103)])
+    assert response.json() == {"received": 1, "queued": 1}